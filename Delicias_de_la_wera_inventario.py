@@ -1,4 +1,4 @@
-"""
+r"""
 Delicias de la Wera - app local (todo en uno)
 Guardar como: delicias_de_la_wera.py
 
@@ -12,14 +12,83 @@ Compilar a .exe (opcional):
     pip install pyinstaller
     pyinstaller --onefile delicias_de_la_wera.py
     pyinstaller --onefile --noconsole delicias_de_la_wera.py
+
+Compilar optimizado para arranque (recomendado para la tienda):
+    pyinstaller --onedir --noconsole --splash splash.png ^
+        --exclude-module matplotlib --exclude-module scipy ^
+        --exclude-module IPython --exclude-module pytest ^
+        delicias_de_la_wera.py
+    (--splash es opcional; la app cierra la imagen sola cuando ya hay ventana)
+
+Arranque en frío: --onefile vs --onedir
+    --onefile descomprime TODO el paquete (python, pandas, numpy, openpyxl)
+    en una carpeta temporal en CADA arranque y la borra al salir; ese costo
+    ocurre antes de que Python empiece y crece con el tamaño del .exe.
+    --onedir deja todo ya descomprimido junto al .exe: el arranque solo paga
+    importar módulos y leer el Excel. Para comparar en la máquina de la
+    tienda (reiniciar antes para que sea arranque en frío):
+        Measure-Command { .\dist\delicias_de_la_wera.exe --salir-al-iniciar }
+        Measure-Command { .\dist\delicias_de_la_wera\delicias_de_la_wera.exe --salir-al-iniciar }
+    La diferencia entre ambos tiempos es lo que cuesta la descompresión.
+    Estos tiempos NO se han medido: hace falta el .exe en la máquina de la tienda.
+    Lo medido (sin empaquetar, libro de prueba de 100 000 ventas, --perfil-arranque):
+    3.2 s hasta ver Inventario; Ventas (11.3 s) se lee después en otro hilo.
+
+Perfil de importación / carga (escribe perfil_arranque.txt):
+    python delicias_de_la_wera.py --perfil-arranque
+    python -X importtime delicias_de_la_wera.py --perfil-arranque  (detalle por módulo)
+
+Memoria al leer una hoja Ventas grande (genera un libro de prueba):
+    python delicias_de_la_wera.py --bench-lectura-ventas 1000000
+
+Consolidar varias tiendas: secuencial vs paralelo (tiendas, ventas por tienda):
+    python delicias_de_la_wera.py --bench-consolidacion 4 100000
+
+Latencia del modo escáner por lectura y por cobro, necesita pantalla (escaneos, ventas):
+    python delicias_de_la_wera.py --bench-escaner 500 100000
+
+Conciliación bancaria (transferencias, movimientos del estado de cuenta):
+    python delicias_de_la_wera.py --bench-conciliacion 1000000 300000
+
+Latencia del cubo de ventas con historiales de varios tamaños:
+    python delicias_de_la_wera.py --bench-cubo 100000 1000000 3000000
+
+Revisión de datos al arrancar (ventas en memoria, con errores sembrados):
+    python delicias_de_la_wera.py --bench-revision 1000000
 """
+import time
+_T_ARRANQUE = time.perf_counter()
+
 import os
+import sys
+import contextlib
 import shutil
-import pandas as pd
+import importlib
+import itertools
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, filedialog
 
+
+class _ModuloPerezoso:
+    """Importa el módulo real la primera vez que se usa (pandas tarda en cargar)."""
+
+    def __init__(self, nombre):
+        self._nombre = nombre
+        self._modulo = None
+
+    def __getattr__(self, attr):
+        if self._modulo is None:
+            self._modulo = importlib.import_module(self._nombre)
+        return getattr(self._modulo, attr)
+
+
+pd = _ModuloPerezoso("pandas")
+np = _ModuloPerezoso("numpy")
+
 # Archivo único con varias hojas
 DATA_FILE = "delicias_de_la_wera.xlsx"
 BACKUP_DIR = "backups"
@@ -31,8 +100,41 @@ SHEET_DEU = "Deudas"
 SHEET_TRA = "Transferencias"
 SHEET_RES = "ResumenPagos"
 SHEET_GAN = "Ganancias"  # resumen mensual (ventas + ganancia)
+SHEET_LOT = "Lotes"      # lotes de costo (cada abasto), se consumen FIFO
+HOJAS = (SHEET_INV, SHEET_VEN, SHEET_DEU, SHEET_TRA, SHEET_RES, SHEET_GAN, SHEET_LOT)
 
 INV_COLS = ["Código", "Nombre", "PrecioCompra", "PrecioVenta", "Stock", "Categoría"]
+VEN_COLS = ["Fecha","Código","Nombre","Cantidad","PrecioVenta","PrecioCompra","Total","Ganancia",
+            "Persona","Tipo","Descripción"]
+LOT_COLS = ["Fecha", "Código", "Cantidad", "PrecioCompra", "Restante"]
+
+# Lectura por bloques de Ventas
+TAM_BLOQUE_VENTAS = 50_000
+
+# Caché de resultados (reportes, deudores, resumen de pagos)
+CACHE_MAX_ENTRADAS = 32
+
+# Venta rápida con escáner
+RETARDO_GUARDADO_MS = 800   # agrupa cobros seguidos en una sola escritura del Excel
+RETARDO_REFRESCO_MS = 400   # refresco completo de la tabla tras cobrar
+
+# Cubo de ventas (día × hora × Categoría × Tipo × Código)
+CUBO_MAX_PENDIENTES = 5000  # celdas nuevas que se juntan antes de integrarlas al cubo
+
+# Antigüedad de deudas (días desde el Fiado): (etiqueta, día máximo)
+TRAMOS_ANTIGUEDAD = (("0-30", 30), ("31-60", 60), ("61-90", 90), ("90+", None))
+
+# Conciliación bancaria
+CONCILIACION_TOLERANCIA_DIAS = 3  # días de diferencia aceptados entre venta y depósito
+CONCILIACION_FILAS_VISTA = 2000   # filas que se muestran en la ventana (el Excel lleva todas)
+REVISION_FILAS_VISTA = 2000       # problemas que se listan en la revisión de datos (el resumen cuenta todos)
+
+# Velocidad de venta / reorden
+VENTANAS_VELOCIDAD = (7, 30, 90)  # días
+VENTANA_REFERENCIA = 30           # ventana usada para cobertura y reorden
+DIAS_ENTREGA = 3                  # lo que tarda el proveedor en surtir
+DIAS_SEGURIDAD = 2                # colchón para el punto de reorden
+DIAS_OBJETIVO = 14                # días de venta que debe cubrir una compra
 
 
 # -------------------- Helpers para archivos (todo en uno) --------------------
@@ -50,6 +152,7 @@ def asegurarmisarchivos():
         df_tra = pd.DataFrame(columns=["Fecha","Código","Nombre","Cantidad","Precio","Total","Persona","Cuenta","Descripción"])
         df_res = pd.DataFrame(columns=["Persona", "TotalEfectivo", "TotalTransferencia", "TotalFiado", "TotalPagado", "DeudaActual", "UltimaActualizacion"])
         df_gan = pd.DataFrame(columns=["Mes", "TotalVentasMes", "TotalGananciaMes", "UltimaActualizacion"])
+        df_lot = pd.DataFrame(columns=LOT_COLS)
 
         with pd.ExcelWriter(DATA_FILE, engine="openpyxl") as w:
             df_inv.to_excel(w, sheet_name=SHEET_INV, index=False)
@@ -58,6 +161,7 @@ def asegurarmisarchivos():
             df_tra.to_excel(w, sheet_name=SHEET_TRA, index=False)
             df_res.to_excel(w, sheet_name=SHEET_RES, index=False)
             df_gan.to_excel(w, sheet_name=SHEET_GAN, index=False)
+            df_lot.to_excel(w, sheet_name=SHEET_LOT, index=False)
 
     if not os.path.exists(BACKUP_DIR):
         os.makedirs(BACKUP_DIR, exist_ok=True)
@@ -79,72 +183,359 @@ def _df_vacio_por_hoja(sheet):
         return pd.DataFrame(columns=["Persona", "TotalEfectivo", "TotalTransferencia", "TotalFiado", "TotalPagado", "DeudaActual", "UltimaActualizacion"])
     if sheet == SHEET_GAN:
         return pd.DataFrame(columns=["Mes", "TotalVentasMes", "TotalGananciaMes", "UltimaActualizacion"])
+    if sheet == SHEET_LOT:
+        return pd.DataFrame(columns=LOT_COLS)
     return pd.DataFrame()
 
 
-def cargar_hoja(sheet):
+def _columna_numerica(df, columna, invalidos=None, entero=False):
+    """
+    pd.to_numeric(errors="coerce").fillna(0) de una columna leída como texto.
+    "inf" / "-inf" cuentan como ilegibles (también quedan en 0).
+    Si se pasa invalidos (dict), anota las posiciones con texto que no es número.
+    """
+    num = pd.to_numeric(df[columna], errors="coerce")
+    num = num.where(np.isfinite(num))
+    if invalidos is not None:
+        malos = np.flatnonzero(num.isna().to_numpy() & df[columna].notna().to_numpy())
+        if len(malos):
+            texto = df[columna].iloc[malos].astype(str).str.strip()
+            malos = malos[(texto != "").to_numpy()]
+        if len(malos):
+            invalidos[columna] = malos.tolist()
+    num = num.fillna(0)
+    return num.astype(int) if entero else num
+
+
+def cargar_hoja(sheet, xls=None, invalidos=None):
     """
     Carga una hoja del Excel sin recursión (evita RecursionError).
     Si falla leer, devuelve DF vacío con columnas correctas.
+    xls: pd.ExcelFile ya abierto (de este u otro libro), para no volver a parsear el libro por cada hoja.
+    invalidos: dict opcional; recibe columna -> posiciones (0-based) con texto que no es número
+    (esas celdas quedan en 0, como siempre).
     """
-    asegurarmisarchivos()
+    propio = xls is None
     try:
-        xls = pd.ExcelFile(DATA_FILE, engine="openpyxl")
+        if propio:
+            asegurarmisarchivos()
+            xls = pd.ExcelFile(DATA_FILE, engine="openpyxl")
         if sheet not in xls.sheet_names:
             return _df_vacio_por_hoja(sheet)
 
-        df = pd.read_excel(DATA_FILE, sheet_name=sheet, dtype=str, engine="openpyxl")
+        if sheet == SHEET_VEN:
+            # Ventas puede ser enorme: se lee por bloques ya tipado (ver leer_ventas_streaming)
+            df, agregados = leer_ventas_streaming(libro=xls.book)
+            if invalidos is not None:
+                invalidos.update(agregados["invalidos"])
+            return df
+
+        df = xls.parse(sheet_name=sheet, dtype=str)
     except Exception:
         return _df_vacio_por_hoja(sheet)
+    finally:
+        if propio and xls is not None:
+            xls.close()
 
     # Normalización por hoja
     if sheet == SHEET_INV:
         for c in INV_COLS:
             if c not in df.columns:
                 df[c] = ""
-        df["PrecioCompra"] = pd.to_numeric(df["PrecioCompra"], errors="coerce").fillna(0.0)
-        df["PrecioVenta"] = pd.to_numeric(df["PrecioVenta"], errors="coerce").fillna(0.0)
-        df["Stock"] = pd.to_numeric(df["Stock"], errors="coerce").fillna(0).astype(int)
-
-    elif sheet == SHEET_VEN:
-        for c in ["Fecha","Código","Nombre","Cantidad","PrecioVenta","PrecioCompra","Total","Ganancia","Persona","Tipo","Descripción"]:
-            if c not in df.columns:
-                df[c] = ""
-        df["Cantidad"] = pd.to_numeric(df["Cantidad"], errors="coerce").fillna(0).astype(int)
-        df["PrecioVenta"] = pd.to_numeric(df["PrecioVenta"], errors="coerce").fillna(0.0)
-        df["PrecioCompra"] = pd.to_numeric(df["PrecioCompra"], errors="coerce").fillna(0.0)
-        df["Total"] = pd.to_numeric(df["Total"], errors="coerce").fillna(0.0)
-        df["Ganancia"] = pd.to_numeric(df["Ganancia"], errors="coerce").fillna(0.0)
+        df["PrecioCompra"] = _columna_numerica(df, "PrecioCompra", invalidos)
+        df["PrecioVenta"] = _columna_numerica(df, "PrecioVenta", invalidos)
+        df["Stock"] = _columna_numerica(df, "Stock", invalidos, entero=True)
 
     elif sheet == SHEET_DEU:
         for c in ["Persona","Adeuda","Pagado","TotalDeuda", "Estado"]:
             if c not in df.columns:
                 df[c] = ""
-        df["Adeuda"] = pd.to_numeric(df["Adeuda"], errors="coerce").fillna(0.0)
-        df["Pagado"] = pd.to_numeric(df["Pagado"], errors="coerce").fillna(0.0)
-        df["TotalDeuda"] = pd.to_numeric(df["TotalDeuda"], errors="coerce").fillna(0.0)
+        df["Adeuda"] = _columna_numerica(df, "Adeuda", invalidos)
+        df["Pagado"] = _columna_numerica(df, "Pagado", invalidos)
+        df["TotalDeuda"] = _columna_numerica(df, "TotalDeuda", invalidos)
 
     elif sheet == SHEET_RES:
         for c in ["Persona", "TotalEfectivo", "TotalTransferencia", "TotalFiado", "TotalPagado", "DeudaActual", "UltimaActualizacion"]:
             if c not in df.columns:
                 df[c] = ""
-        df["TotalEfectivo"] = pd.to_numeric(df["TotalEfectivo"], errors="coerce").fillna(0.0)
-        df["TotalTransferencia"] = pd.to_numeric(df["TotalTransferencia"], errors="coerce").fillna(0.0)
-        df["TotalFiado"] = pd.to_numeric(df["TotalFiado"], errors="coerce").fillna(0.0)
-        df["TotalPagado"] = pd.to_numeric(df["TotalPagado"], errors="coerce").fillna(0.0)
-        df["DeudaActual"] = pd.to_numeric(df["DeudaActual"], errors="coerce").fillna(0.0)
+        df["TotalEfectivo"] = _columna_numerica(df, "TotalEfectivo", invalidos)
+        df["TotalTransferencia"] = _columna_numerica(df, "TotalTransferencia", invalidos)
+        df["TotalFiado"] = _columna_numerica(df, "TotalFiado", invalidos)
+        df["TotalPagado"] = _columna_numerica(df, "TotalPagado", invalidos)
+        df["DeudaActual"] = _columna_numerica(df, "DeudaActual", invalidos)
 
     elif sheet == SHEET_GAN:
         for c in ["Mes", "TotalVentasMes", "TotalGananciaMes", "UltimaActualizacion"]:
             if c not in df.columns:
                 df[c] = ""
-        df["TotalVentasMes"] = pd.to_numeric(df["TotalVentasMes"], errors="coerce").fillna(0.0)
-        df["TotalGananciaMes"] = pd.to_numeric(df["TotalGananciaMes"], errors="coerce").fillna(0.0)
+        df["TotalVentasMes"] = _columna_numerica(df, "TotalVentasMes", invalidos)
+        df["TotalGananciaMes"] = _columna_numerica(df, "TotalGananciaMes", invalidos)
+
+    elif sheet == SHEET_LOT:
+        for c in LOT_COLS:
+            if c not in df.columns:
+                df[c] = ""
+        df["Cantidad"] = _columna_numerica(df, "Cantidad", invalidos, entero=True)
+        df["PrecioCompra"] = _columna_numerica(df, "PrecioCompra", invalidos)
+        df["Restante"] = _columna_numerica(df, "Restante", invalidos, entero=True)
+
+    return df
+
+
+def leer_hojas_chicas(archivo=None):
+    """
+    Todas las hojas menos Ventas (la grande se lee aparte, en otro hilo) con una sola
+    apertura del libro. No toca Tk: main() la corre en otro hilo mientras se ve el aviso
+    de carga. Devuelve ({hoja: df}, {hoja: {columna: posiciones ilegibles}}).
+    """
+    invalidos = {h: {} for h in HOJAS}
+    try:
+        xls = pd.ExcelFile(archivo or DATA_FILE, engine="openpyxl")
+    except Exception:
+        xls = None  # libro ilegible: cada hoja queda vacía y Ventas marca el error (no se guarda)
+    with xls if xls is not None else contextlib.nullcontext():
+        hojas = {
+            SHEET_INV: cargar_hoja(SHEET_INV, xls, invalidos[SHEET_INV]),
+            SHEET_DEU: cargar_hoja(SHEET_DEU, xls, invalidos[SHEET_DEU]),
+            SHEET_TRA: cargar_hoja(SHEET_TRA, xls),
+            SHEET_RES: cargar_hoja(SHEET_RES, xls, invalidos[SHEET_RES]),
+            SHEET_GAN: cargar_hoja(SHEET_GAN, xls, invalidos[SHEET_GAN]),
+            SHEET_LOT: cargar_hoja(SHEET_LOT, xls, invalidos[SHEET_LOT]),
+        }
+    return hojas, invalidos
 
+
+def _a_numero(v, invalido=0.0):
+    """
+    Como pd.to_numeric(errors="coerce").fillna(0) pero para un solo valor.
+    invalido: lo que se devuelve para texto que no es número o para infinito
+    (vacío sigue siendo 0).
+    """
+    if v is None or isinstance(v, bool):
+        return 0.0
+    if isinstance(v, (int, float)):
+        x = float(v)
+    else:
+        t = str(v).strip()
+        try:
+            x = float(t)
+        except ValueError:
+            return invalido if t else 0.0
+    if x != x:
+        return 0.0  # NaN -> 0
+    return invalido if abs(x) == float("inf") else x
+
+
+def _a_texto(v):
+    """Como dtype=str de read_excel: celdas vacías quedan NaN."""
+    return float("nan") if v is None else (v if isinstance(v, str) else str(v))
+
+
+def _claves_texto(serie, limpiar=True):
+    """
+    Factoriza una columna de texto como fillna("").astype(str)(.str.strip()).
+    El strip se hace sobre los valores distintos (unos cientos de personas en
+    vez de un millón de filas). Devuelve (códigos int, valores distintos).
+    """
+    codigos, distintos = pd.factorize(serie)
+    textos = pd.Index(distintos).astype(str)
+    if limpiar:
+        textos = textos.str.strip()
+    codigos_textos, valores = pd.factorize(np.append(textos.to_numpy(dtype=object), ""))
+    return codigos_textos[codigos], np.asarray(valores, dtype=object)  # -1 (vacío) -> ""
+
+
+def _texto_limpio(serie):
+    """serie.fillna("").astype(str).str.strip() vía _claves_texto."""
+    codigos, valores = _claves_texto(serie)
+    return pd.Series(valores[codigos], index=serie.index)
+
+
+def _sumas_por_clave(codigos, n_claves, **columnas):
+    """Sumas por código (np.bincount) de cada arreglo numérico; DataFrame de n_claves filas."""
+    return pd.DataFrame({
+        c: np.bincount(codigos, weights=np.asarray(v, dtype=float), minlength=n_claves)
+        for c, v in columnas.items()
+    })
+
+
+def leer_ventas_streaming(archivo=None, libro=None, tam_bloque=TAM_BLOQUE_VENTAS):
+    """
+    Lee la hoja Ventas por bloques (openpyxl read_only + iter_rows) llenando
+    columnas ya tipadas: números en array('d') / array('q'), textos en listas.
+    No se arma el DataFrame intermedio todo-texto de read_excel(dtype=str).
+
+    Mientras lee acumula agregados (sin contar Tipo == Pago ni fechas ilegibles):
+      "mensual":  Mes -> [Total, Ganancia]
+      "producto": (Código, Nombre) -> [Cantidad, Total, Ganancia]
+
+    Los números que no se pudieron leer (texto, infinito, Cantidad fuera de
+    rango) quedan en 0 y sus posiciones (0-based) en agregados["invalidos"][columna],
+    para la revisión de datos.
+
+    Devuelve (df_ven, agregados). libro: workbook openpyxl ya abierto (opcional).
+    """
+    from array import array
+    import openpyxl
+
+    numericas = {"PrecioVenta", "PrecioCompra", "Total", "Ganancia"}
+    nan = float("nan")
+    agregados = {"mensual": {}, "producto": {}, "filas": 0, "invalidos": {}}
+
+    propio = libro is None
+    if propio:
+        libro = openpyxl.load_workbook(archivo or DATA_FILE, read_only=True, data_only=True)
+    try:
+        if SHEET_VEN not in libro.sheetnames:
+            return _df_vacio_por_hoja(SHEET_VEN), agregados
+
+        filas = libro[SHEET_VEN].iter_rows(values_only=True)
+        encabezado = next(filas, None) or ()
+        pos = {}
+        for i, nombre in enumerate(encabezado):
+            if nombre is not None and str(nombre) not in pos:
+                pos[str(nombre)] = i
+
+        cols = {}
+        for c in VEN_COLS:
+            if c == "Cantidad":
+                cols[c] = array("q")
+            elif c in numericas:
+                cols[c] = array("d")
+            else:
+                cols[c] = []
+
+        n = 0
+        while True:
+            bloque = [f for f in itertools.islice(filas, tam_bloque) if any(v is not None for v in f)]
+            if not bloque:
+                break
+            n += len(bloque)
+
+            # columnas del bloque (las que falten en la hoja quedan "" / 0, como en cargar_hoja)
+            por_col = {}
+            for c in VEN_COLS:
+                i = pos.get(c)
+                if i is None:
+                    por_col[c] = [0] * len(bloque) if (c == "Cantidad" or c in numericas) else [""] * len(bloque)
+                else:
+                    por_col[c] = [f[i] if i < len(f) else None for f in bloque]
+
+            for c in VEN_COLS:
+                if c == "Cantidad" or c in numericas:
+                    # texto no numérico / infinito -> NaN para ubicarlo; luego 0 como antes
+                    valores = np.array([_a_numero(v, nan) for v in por_col[c]], dtype=np.float64)
+                    if c == "Cantidad":
+                        # lo que no cabe en int64 tampoco se puede guardar como Cantidad
+                        valores[np.abs(valores) >= 2.0 ** 63] = nan
+                    malos = np.flatnonzero(np.isnan(valores))
+                    if len(malos):
+                        valores[malos] = 0.0
+                        agregados["invalidos"].setdefault(c, []).extend((malos + n - len(bloque)).tolist())
+                    cols[c].frombytes((valores.astype(np.int64) if c == "Cantidad" else valores).tobytes())
+                else:
+                    por_col[c] = [_a_texto(v) for v in por_col[c]]
+                    cols[c].extend(por_col[c])
+
+            # agregados al vuelo sobre los valores ya tipados del bloque
+            ini = len(cols["Total"]) - len(bloque)
+            _sumar_agregados(agregados, pd.DataFrame({
+                **{c: por_col[c] for c in ("Fecha", "Código", "Nombre", "Tipo")},
+                **{c: cols[c][ini:] for c in ("Cantidad", "Total", "Ganancia")},
+            }))
+    finally:
+        if propio:
+            libro.close()
+
+    agregados["filas"] = n
+    datos = {}
+    for c in VEN_COLS:
+        if c == "Cantidad":
+            datos[c] = np.frombuffer(cols[c], dtype=np.int64) if n else np.zeros(0, dtype=np.int64)
+        elif c in numericas:
+            datos[c] = np.frombuffer(cols[c], dtype=np.float64) if n else np.zeros(0)
+        else:
+            datos[c] = np.empty(n, dtype=object)
+            datos[c][:] = cols[c]
+            cols[c] = None  # soltar la lista antes de pasar a la siguiente columna
+    return pd.DataFrame(datos, columns=VEN_COLS, copy=False), agregados
+
+
+def _sumar_agregados(agregados, ven):
+    """
+    Suma a los agregados las filas de ven (columnas de Ventas). Como en reportes y
+    auditoría: sin Pago, y el mes sale de la Fecha interpretada (ISO8601); las
+    filas con fecha ilegible no entran en ninguno de los dos agregados.
+    """
+    dt = pd.to_datetime(ven["Fecha"], errors="coerce", format="ISO8601")
+    ok = ((ven["Tipo"].astype(object) != "Pago") & dt.notna()).to_numpy()
+    if not ok.any():
+        return
+    v = ven[ok]
+    num = pd.DataFrame({
+        "Cantidad": pd.to_numeric(v["Cantidad"], errors="coerce").fillna(0).astype("int64"),
+        "Total": pd.to_numeric(v["Total"], errors="coerce").fillna(0.0),
+        "Ganancia": pd.to_numeric(v["Ganancia"], errors="coerce").fillna(0.0),
+    })
+
+    por_mes = num[["Total", "Ganancia"]].groupby(dt[ok].dt.to_period("M").to_numpy()).sum()
+    for mes, t, g in por_mes.itertuples():
+        m = agregados["mensual"].setdefault(mes.strftime("%Y-%m"), [0.0, 0.0])
+        m[0] += t
+        m[1] += g
+
+    por_producto = num.groupby([v["Código"].astype(object), v["Nombre"].astype(object)], dropna=False).sum()
+    for (codigo, nombre), q, t, g in por_producto.itertuples():
+        p = agregados["producto"].setdefault((str(codigo), str(nombre)), [0, 0.0, 0.0])
+        p[0] += int(q)
+        p[1] += t
+        p[2] += g
+
+
+def acumular_venta(agregados, fecha, codigo, nombre, cantidad, total, ganancia):
+    """Suma una venta nueva (no Pago) a los agregados mensual / por producto."""
+    dt = pd.to_datetime(fecha, errors="coerce", format="ISO8601")
+    if pd.isna(dt):
+        return
+    m = agregados["mensual"].setdefault(dt.strftime("%Y-%m"), [0.0, 0.0])
+    m[0] += total
+    m[1] += ganancia
+    p = agregados["producto"].setdefault((str(codigo), str(nombre)), [0, 0.0, 0.0])
+    p[0] += int(cantidad)
+    p[1] += total
+    p[2] += ganancia
+
+
+def agregados_desde_ventas(df_ven):
+    """
+    Los mismos agregados que junta leer_ventas_streaming, pero sobre un df_ven
+    ya en memoria (tras recostear o reconstruir Ventas).
+    """
+    agregados = {"mensual": {}, "producto": {}, "filas": len(df_ven), "invalidos": {}}
+    _sumar_agregados(agregados, df_ven)
+    return agregados
+
+
+def ganancias_desde_agregados(agregados):
+    """Hoja Ganancias armada con los totales mensuales que junta leer_ventas_streaming."""
+    mensual = agregados["mensual"]
+    df = pd.DataFrame(
+        [(mes, t, g) for mes, (t, g) in sorted(mensual.items())],
+        columns=["Mes", "TotalVentasMes", "TotalGananciaMes"],
+    )
+    df["UltimaActualizacion"] = datetime.now().isoformat()
     return df
 
 
-def guardar_todo(df_inv, df_ven, df_deu, df_tra, df_res, df_gan):
+def juntar_ventas(base, pendientes):
+    """Ventas completa: la hoja en memoria más las filas agregadas después (se puede llamar en otro hilo)."""
+    if not pendientes:
+        return base
+    return pd.concat([base, pd.DataFrame(pendientes)], ignore_index=True)
+
+
+def guardar_todo(df_inv, df_ven, df_deu, df_tra, df_res, df_gan, df_lot):
+    """Escribe todas las hojas (el libro se reemplaza: una hoja que no se pase se perdería)."""
     with pd.ExcelWriter(DATA_FILE, engine="openpyxl") as w:
         df_inv.to_excel(w, sheet_name=SHEET_INV, index=False)
         df_ven.to_excel(w, sheet_name=SHEET_VEN, index=False)
@@ -152,6 +543,357 @@ def guardar_todo(df_inv, df_ven, df_deu, df_tra, df_res, df_gan):
         df_tra.to_excel(w, sheet_name=SHEET_TRA, index=False)
         df_res.to_excel(w, sheet_name=SHEET_RES, index=False)
         df_gan.to_excel(w, sheet_name=SHEET_GAN, index=False)
+        df_lot.to_excel(w, sheet_name=SHEET_LOT, index=False)
+
+
+def perfil_arranque(archivo_salida="perfil_arranque.txt"):
+    """
+    Mide las etapas pesadas del arranque (imports y lectura del Excel)
+    y escribe un reporte en consola y en archivo_salida.
+    """
+    etapas = [("intérprete + tkinter (hasta aquí)", (time.perf_counter() - _T_ARRANQUE) * 1000)]
+
+    def medir(nombre, fn):
+        t = time.perf_counter()
+        r = fn()
+        etapas.append((nombre, (time.perf_counter() - t) * 1000))
+        return r
+
+    medir("import pandas", lambda: importlib.import_module("pandas"))
+    medir("import openpyxl", lambda: importlib.import_module("openpyxl"))
+    medir("asegurar archivos", asegurarmisarchivos)
+    xls = medir("abrir libro", lambda: pd.ExcelFile(DATA_FILE, engine="openpyxl"))
+    with xls:
+        for hoja in (SHEET_INV, SHEET_DEU, SHEET_TRA, SHEET_RES, SHEET_GAN, SHEET_LOT):
+            medir(f"hoja {hoja}", lambda h=hoja: cargar_hoja(h, xls))
+
+    total = sum(ms for _, ms in etapas)  # hasta poder mostrar Inventario
+
+    # lo que ya no retrasa la ventana: se mide aparte y no entra en el total
+    diferidas = []
+
+    def medir_diferida(nombre, fn):
+        t = time.perf_counter()
+        r = fn()
+        diferidas.append((nombre, (time.perf_counter() - t) * 1000))
+        return r
+
+    df_ven, _, _ = medir_diferida("Ventas + velocidades (otro hilo)", lambda: leer_ventas_y_velocidad(DATA_FILE))
+    medir_diferida("reportes (al abrir la pestaña)", lambda: calcular_reportes(df_ven, "Todo", date.today()))
+
+    lineas = [f"Perfil de arranque - {datetime.now().isoformat(timespec='seconds')}",
+              f"{'Etapa':<36}{'ms':>10}{'%':>8}"]
+    for nombre, ms in etapas:
+        lineas.append(f"{nombre:<36}{ms:>10.1f}{(ms / total * 100 if total else 0):>7.1f}%")
+    lineas.append(f"{'TOTAL (hasta ver Inventario)':<36}{total:>10.1f}")
+    lineas.append("")
+    lineas.append("Fuera del arranque (antes se calculaba al iniciar):")
+    for nombre, ms in diferidas:
+        lineas.append(f"{nombre:<36}{ms:>10.1f}")
+    lineas.append(f"{'Con Ventas antes de la ventana':<36}{total + diferidas[0][1]:>10.1f}")
+    reporte = "\n".join(lineas)
+
+    print(reporte)
+    with open(archivo_salida, "w", encoding="utf-8") as f:
+        f.write(reporte + "\n")
+    return etapas
+
+
+def _generar_libro_prueba(ruta, n_filas, desfase=0):
+    """Libro sintético (Inventario + Ventas con n_filas) para los bench; desfase varía los datos."""
+    import openpyxl
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(SHEET_INV)
+    ws.append(INV_COLS)
+    for i in range(5000):
+        ws.append([str(i), f"Producto {i}", 12.5, 20.0, (i * 7 + desfase) % 40, f"Cat {i % 12}"])
+
+    ws = wb.create_sheet(SHEET_VEN)
+    ws.append(VEN_COLS)
+    base = datetime(2023, 1, 1)
+    for i in range(n_filas):
+        k = i + desfase
+        fecha = datetime.fromordinal(base.toordinal() + k % 700).isoformat()
+        tipo = ("Efectivo", "Transferencia", "Fiado", "Pago")[k % 4]
+        ws.append([fecha, str(k % 5000), f"Producto {k % 5000}", 1 + k % 3, 20.0, 12.5,
+                   20.0 * (1 + k % 3), 7.5 * (1 + k % 3), f"Cliente {k % 800}", tipo, ""])
+
+    for hoja in (SHEET_DEU, SHEET_TRA, SHEET_RES, SHEET_GAN):
+        wb.create_sheet(hoja).append(list(_df_vacio_por_hoja(hoja).columns))
+    wb.save(ruta)
+
+
+def bench_lectura_ventas(n_filas=1_000_000):
+    """
+    Compara memoria pico (tracemalloc) y tiempo de leer Ventas:
+    read_excel(dtype=str) + conversión (camino anterior) vs leer_ventas_streaming.
+    Genera un libro de prueba con n_filas en una carpeta temporal.
+    """
+    import tempfile
+    import tracemalloc
+
+    carpeta = tempfile.mkdtemp(prefix="bench_ventas_")
+    ruta = os.path.join(carpeta, "ventas.xlsx")
+    print(f"Generando {n_filas} filas en {ruta} ...")
+    _generar_libro_prueba(ruta, n_filas)
+
+    def anterior():
+        df = pd.read_excel(ruta, sheet_name=SHEET_VEN, dtype=str, engine="openpyxl")
+        df["Cantidad"] = pd.to_numeric(df["Cantidad"], errors="coerce").fillna(0).astype(int)
+        for c in ("PrecioVenta", "PrecioCompra", "Total", "Ganancia"):
+            df[c] = pd.to_numeric(df[c], errors="coerce").fillna(0.0)
+        return df
+
+    def medir(nombre, fn):
+        # tiempo sin tracemalloc (lo vuelve muy lento); la memoria en otra pasada
+        t = time.perf_counter()
+        fn()
+        seg = time.perf_counter() - t
+        tracemalloc.start()
+        df = fn()
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        final = df.memory_usage(deep=True).sum()
+        print(f"{nombre:<22}{seg:>9.1f} s{pico / 2**20:>11.0f} MB{final / 2**20:>11.0f} MB")
+
+    print(f"{'Lectura':<22}{'tiempo':>11}{'pico':>14}{'DataFrame':>14}")
+    medir("read_excel(dtype=str)", anterior)
+    medir("por bloques", lambda: leer_ventas_streaming(ruta)[0])
+    shutil.rmtree(carpeta, ignore_errors=True)
+
+
+def bench_consolidacion(n_tiendas=4, n_filas=100_000):
+    """Tiempo de consolidar n_tiendas libros sintéticos: secuencial vs un proceso por libro."""
+    import tempfile
+
+    carpeta = tempfile.mkdtemp(prefix="bench_tiendas_")
+    rutas = []
+    print(f"Generando {n_tiendas} libros de {n_filas} ventas en {carpeta} ...")
+    for t in range(n_tiendas):
+        ruta = os.path.join(carpeta, f"tienda_{t + 1}.xlsx")
+        _generar_libro_prueba(ruta, n_filas, desfase=t * 37)
+        rutas.append(ruta)
+
+    t0 = time.perf_counter()
+    consolidar_tiendas(rutas, paralelo=False)
+    seq = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    res = consolidar_tiendas(rutas, paralelo=True)
+    par = time.perf_counter() - t0
+
+    print(f"Núcleos: {os.cpu_count()} | procesos usados: {min(n_tiendas, os.cpu_count() or 1)}")
+    print(f"Secuencial: {seq:.1f} s | Paralelo: {par:.1f} s | Aceleración: {seq / par:.2f}x")
+    print(f"Ventas consolidadas: {len(res['ventas'])} filas")
+    shutil.rmtree(carpeta, ignore_errors=True)
+
+
+def bench_escaner(n_escaneos=500, n_ventas=100_000):
+    """
+    Latencia del modo escáner con la ventana real (necesita pantalla): cada lectura
+    es código + Enter en la caja del escáner y cada 5 lecturas se cobra con F12.
+    Reporta p50/p95/máx por evento; lo diferido (refresco y guardado) se mide aparte.
+    """
+    import tempfile
+
+    carpeta = tempfile.mkdtemp(prefix="bench_escaner_")
+    anterior = os.getcwd()
+    os.chdir(carpeta)
+    try:
+        print(f"Generando libro con {n_ventas} ventas en {carpeta} ...")
+        _generar_libro_prueba(DATA_FILE, n_ventas)
+        root = _ventana_principal()
+        app = DeliciasApp(root)
+        root.update()
+        root.update()
+        app.scan_entry.focus_force()
+        root.update()
+
+        stocks = pd.to_numeric(app.df_inv["Stock"], errors="coerce").fillna(0)
+        codigos = app.df_inv.loc[stocks >= 10, "Código"].astype(str).tolist()
+        lecturas, cobros, diferido = [], [], []
+        for i in range(n_escaneos):
+            app.scan_var.set(codigos[i % len(codigos)])
+            t0 = time.perf_counter()
+            app.scan_entry.event_generate("<Return>")
+            root.update_idletasks()
+            lecturas.append((time.perf_counter() - t0) * 1000)
+            if i % 5 == 4:
+                t0 = time.perf_counter()
+                app.scan_entry.event_generate("<F12>")
+                root.update_idletasks()
+                cobros.append((time.perf_counter() - t0) * 1000)
+            t0 = time.perf_counter()
+            root.update()  # timers: refresco y guardado diferidos
+            diferido.append((time.perf_counter() - t0) * 1000)
+
+        def resumen(nombre, ms):
+            ms = sorted(ms)
+            p50, p95 = ms[len(ms) // 2], ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+            print(f"{nombre:<10} n={len(ms):<5} p50={p50:6.1f} ms  p95={p95:6.1f} ms  máx={ms[-1]:6.1f} ms")
+
+        resumen("Lectura", lecturas)
+        if cobros:
+            resumen("Cobro F12", cobros)
+        print(f"Diferido (entre lecturas): máx {max(diferido):.1f} ms")
+        app._al_cerrar()
+    finally:
+        os.chdir(anterior)
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+
+def bench_conciliacion(n_transferencias=1_000_000, n_movimientos=300_000):
+    """Tiempo de conciliar n_transferencias contra un estado de cuenta CSV sintético de n_movimientos."""
+    import tempfile
+
+    rng = np.random.default_rng(7)
+    fechas = pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 5 * 365 * 24 * 60, n_transferencias), unit="min")
+    df_tra = pd.DataFrame({
+        "Fecha": fechas.strftime("%Y-%m-%dT%H:%M:%S"),
+        "Total": rng.integers(1, 400, n_transferencias) * 2.5,
+        "Persona": "Cliente " + pd.Series(rng.integers(0, 3000, n_transferencias)).astype(str),
+        "Cuenta": pd.Series(rng.integers(1000, 9999, n_transferencias)).astype(str),
+    })
+    elegidas = rng.choice(n_transferencias, min(n_movimientos, n_transferencias), replace=False)
+    banco = pd.DataFrame({
+        "Fecha": (fechas[elegidas] + pd.to_timedelta(rng.integers(0, 3, len(elegidas)), unit="D")).strftime("%d/%m/%Y"),
+        "Concepto": "SPEI RECIBIDO",
+        "Abono": df_tra["Total"].to_numpy()[elegidas],
+        "Cuenta": "****" + df_tra["Cuenta"].to_numpy()[elegidas],
+    })
+    carpeta = tempfile.mkdtemp(prefix="bench_banco_")
+    ruta = os.path.join(carpeta, "estado.csv")
+    banco.to_csv(ruta, index=False)
+
+    t0 = time.perf_counter()
+    mov = leer_estado_cuenta(ruta)
+    t1 = time.perf_counter()
+    res = conciliar_transferencias(df_tra, mov)
+    t2 = time.perf_counter()
+    print(f"Lectura CSV ({len(mov)} movimientos): {t1 - t0:.2f} s | Conciliación: {t2 - t1:.2f} s")
+    print(res["Estado"].value_counts().to_string())
+    shutil.rmtree(carpeta, ignore_errors=True)
+
+
+def bench_cubo(tamanos=(100_000, 1_000_000)):
+    """
+    Latencia de consultas al cubo con historiales de distinto tamaño (mismo catálogo
+    y ventas por día; un historial más grande son más años hacia atrás): debe
+    quedarse igual aunque Ventas crezca. Como referencia, el mismo "por hora" con
+    groupby directo sobre Ventas.
+    """
+    import statistics
+
+    n_prod = 2000
+    por_dia = 800
+    fin = pd.Timestamp("2026-01-01")
+    inv = pd.DataFrame({
+        "Código": np.arange(n_prod).astype(str),
+        "Categoría": [f"Cat {i % 15}" for i in range(n_prod)],
+    })
+
+    def medir(fn, veces=20):
+        ms = []
+        for _ in range(veces):
+            t0 = time.perf_counter()
+            fn()
+            ms.append((time.perf_counter() - t0) * 1000)
+        return statistics.median(ms)
+
+    print(f"{'Ventas':>10} {'años':>5} {'celdas':>9} {'armar':>8} {'transf/cat mes':>15} {'por hora':>9} "
+          f"{'top día':>8} {'groupby Ventas':>15}")
+    for n in tamanos:
+        rng = np.random.default_rng(n)
+        segundos = np.sort(rng.integers(0, n // por_dia * 86400, n))
+        fechas = fin - pd.Timedelta(days=n // por_dia) + pd.to_timedelta(segundos, unit="s")
+        df_ven = pd.DataFrame({
+            "Fecha": fechas.strftime("%Y-%m-%dT%H:%M:%S"),
+            "Código": rng.integers(0, n_prod, n).astype(str),
+            "Cantidad": rng.integers(1, 4, n),
+            "Total": rng.integers(10, 300, n) * 1.0,
+            "Ganancia": rng.integers(1, 80, n) * 1.0,
+            "Tipo": rng.choice(["Efectivo", "Transferencia", "Fiado", "Pago"], n),
+        })
+        cubo = CuboVentas()
+        t0 = time.perf_counter()
+        cubo.reconstruir(df_ven, inv)
+        armar = time.perf_counter() - t0
+
+        ultimo = fechas[-1].date()
+        mes = ultimo.replace(day=1)
+        q_mes = medir(lambda: cubo.consultar(["Categoría"], mes, ultimo, Tipo="Transferencia"))
+        q_hora = medir(lambda: cubo.consultar(["Hora"]))
+        q_dia = medir(lambda: cubo.consultar(["Código"], ultimo, ultimo))
+
+        def directo():
+            v = df_ven[df_ven["Tipo"] != "Pago"]
+            v.groupby(pd.to_datetime(v["Fecha"], format="ISO8601").dt.hour)["Total"].sum()
+
+        q_raw = medir(directo, veces=3)
+        print(f"{n:>10} {n / por_dia / 365:>5.1f} {cubo.celdas():>9} {armar:>7.1f}s {q_mes:>13.1f}ms {q_hora:>7.1f}ms "
+              f"{q_dia:>6.1f}ms {q_raw:>13.1f}ms")
+
+
+def bench_revision(n_filas=1_000_000):
+    """
+    Tiempo de revisar_datos con n_filas de Ventas armadas en memoria (sin Excel),
+    con algunos errores sembrados de cada tipo. Objetivo: muy por debajo de 1 s.
+    """
+    n_prod, n_personas = 5000, 800
+    rng = np.random.default_rng(n_filas)
+    k = np.arange(n_filas)
+    tipos = np.array(["Efectivo", "Transferencia", "Fiado", "Pago"], dtype=object)[k % 4]
+    fechas = (pd.Timestamp("2023-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 700 * 86400, n_filas)), unit="s"))
+    df_ven = pd.DataFrame({
+        "Fecha": fechas.strftime("%Y-%m-%dT%H:%M:%S").astype(object),
+        "Código": (k % n_prod).astype(str).astype(object),
+        "Nombre": "",
+        "Cantidad": 1 + k % 3,
+        "PrecioVenta": 20.0,
+        "PrecioCompra": 12.5,
+        "Total": 20.0 * (1 + k % 3),
+        "Ganancia": 7.5 * (1 + k % 3),
+        "Persona": pd.Series(k % n_personas).map("Cliente {}".format).astype(object),
+        "Tipo": tipos,
+        "Descripción": "",
+    }, columns=VEN_COLS)
+    df_ven.loc[rng.integers(0, n_filas, 50), "Fecha"] = "31/02/2024"
+    df_inv = pd.DataFrame({
+        "Código": np.arange(n_prod - 10).astype(str),  # los últimos 10 códigos quedan huérfanos
+        "Nombre": "", "PrecioCompra": 12.5, "PrecioVenta": 20.0,
+        "Stock": rng.integers(-2, 40, n_prod - 10), "Categoría": "",
+    }, columns=INV_COLS)
+    df_inv.loc[[5, 6], "Código"] = "7"
+    rec = reconstruir_derivadas(df_ven)
+    df_deu = rec[SHEET_DEU].copy()
+    df_deu.loc[df_deu.index[:5], "Adeuda"] += 1
+    df_tra = df_ven[df_ven["Tipo"] == "Transferencia"][_df_vacio_por_hoja(SHEET_TRA).columns.intersection(VEN_COLS)]
+    invalidos = {SHEET_VEN: {"Total": rng.integers(0, n_filas, 20).tolist()}}
+
+    tiempos = []
+    for _ in range(3):
+        t0 = time.perf_counter()
+        problemas, _ = revisar_datos(df_inv, df_ven, df_tra, df_deu, rec[SHEET_RES], rec[SHEET_GAN], None, invalidos)
+        tiempos.append(time.perf_counter() - t0)
+    print(f"Ventas: {n_filas} filas | revisión: {min(tiempos) * 1000:.0f} ms (mejor de 3)")
+    print(problemas.groupby(["Hoja", "Problema"], sort=False).size().to_string())
+
+
+def _ventana_principal():
+    """Ventana raíz con título y tamaño; se crea antes de la app para mostrar el aviso de carga."""
+    root = tk.Tk()
+    root.title("Delicias de la Wera")
+    root.geometry("1050x720")
+    return root
+
+
+def _cerrar_splash_pyinstaller():
+    """Cierra la imagen de --splash de PyInstaller (si el .exe se compiló con ella)."""
+    try:
+        import pyi_splash  # solo existe dentro del .exe
+        pyi_splash.close()
+    except ImportError:
+        pass
 
 
 def hacer_backup():
@@ -166,16 +908,1561 @@ def hacer_backup():
         return f"Error backup: {e}"
 
 
+# -------------------- Velocidad de venta --------------------
+_EPOCA = date(1970, 1, 1)
+
+
+def _dia_epoca(fecha):
+    """Día como entero (días desde 1970-01-01) para datetime/date/str ISO."""
+    if isinstance(fecha, str):
+        fecha = datetime.fromisoformat(fecha)
+    if isinstance(fecha, datetime):
+        fecha = fecha.date()
+    return (fecha - _EPOCA).days
+
+
+class MotorVelocidad:
+    """
+    Unidades vendidas por producto (unidades/día) en las ventanas VENTANAS_VELOCIDAD.
+    Se arma una vez, vectorizado, desde Ventas; después cada venta registrada
+    solo suma su cantidad a la fila del producto (no se vuelve a leer Ventas).
+    """
+
+    def __init__(self):
+        self.invalidar()
+
+    def invalidar(self):
+        self._diario = None      # DataFrame Código, Dia, Cantidad (últimos días)
+        self._pendientes = []    # ventas registradas desde la última reconstrucción
+        self._vel = None         # DataFrame por Código con columnas V7, V30, ...
+        self._hoy = None
+
+    @property
+    def listo(self):
+        return self._vel is not None
+
+    def reconstruir(self, df_ven, hoy=None):
+        hoy_d = _dia_epoca(hoy or date.today())
+        df = df_ven[df_ven["Tipo"].astype(str) != "Pago"]
+        dt = pd.to_datetime(df["Fecha"], errors="coerce", format="ISO8601")
+        dias = (dt.dt.normalize() - pd.Timestamp("1970-01-01")).dt.days
+        mask = dias.notna() & (dias > hoy_d - max(VENTANAS_VELOCIDAD))
+
+        d = pd.DataFrame({
+            "Código": df["Código"].astype(str)[mask],
+            "Dia": dias[mask].astype(int),
+            "Cantidad": df["Cantidad"][mask],
+        })
+        self._diario = d.groupby(["Código", "Dia"], as_index=False)["Cantidad"].sum()
+        self._pendientes = []
+        self._calcular_velocidades(hoy_d)
+
+    def _calcular_velocidades(self, hoy_d):
+        if self._pendientes:
+            extra = pd.DataFrame(self._pendientes, columns=["Código", "Dia", "Cantidad"])
+            d = pd.concat([self._diario, extra], ignore_index=True)
+            self._diario = d.groupby(["Código", "Dia"], as_index=False)["Cantidad"].sum()
+            self._pendientes = []
+
+        d = self._diario[self._diario["Dia"] > hoy_d - max(VENTANAS_VELOCIDAD)]
+        self._diario = d
+        edad = hoy_d - d["Dia"]
+        vel = pd.DataFrame({
+            f"V{w}": d["Cantidad"].where(edad < w, 0).groupby(d["Código"]).sum() / w
+            for w in VENTANAS_VELOCIDAD
+        })
+        self._vel = vel.astype(float)
+        self._hoy = hoy_d
+
+    def registrar_venta(self, codigo, cantidad, fecha):
+        """Suma una venta recién registrada (O(1) sobre la tabla de velocidades)."""
+        if self._vel is None:
+            return  # todavía no se arma; se reconstruirá desde Ventas
+        codigo = str(codigo)
+        dia = _dia_epoca(fecha)
+        self._pendientes.append((codigo, dia, int(cantidad)))
+        if dia != self._hoy:
+            return  # cambio de día: se recalcula en la próxima consulta
+        if codigo not in self._vel.index:
+            self._vel.loc[codigo] = 0.0
+        for w in VENTANAS_VELOCIDAD:
+            self._vel.at[codigo, f"V{w}"] += int(cantidad) / w
+
+    def tabla(self, df_inv, df_ven, hoy=None):
+        """
+        Catálogo con velocidades, días de cobertura, punto de reorden y compra sugerida.
+        Mismo índice que df_inv.
+        """
+        hoy_d = _dia_epoca(hoy or date.today())
+        if self._diario is None:
+            self.reconstruir(df_ven, hoy)
+        elif hoy_d != self._hoy:
+            self._calcular_velocidades(hoy_d)
+
+        t = df_inv[["Código", "Nombre", "Categoría", "Stock"]].copy()
+        t["Código"] = t["Código"].astype(str)
+        t["Categoría"] = t["Categoría"].fillna("").astype(str).replace("", "Sin categoría")
+        t = t.join(self._vel, on="Código")
+        cols_v = [f"V{w}" for w in VENTANAS_VELOCIDAD]
+        t[cols_v] = t[cols_v].fillna(0.0)
+
+        reorden = self._reorden(t[f"V{VENTANA_REFERENCIA}"].to_numpy(), t["Stock"].to_numpy(dtype=float))
+        for col, valores in reorden.items():
+            t[col] = valores
+        return t
+
+    def actualizar_fila(self, t, df_inv, idx):
+        """
+        Tras vender el producto de la fila idx: corrige en sitio una tabla() ya armada
+        (Stock, velocidades y reorden de las filas con ese Código) sin recorrer el catálogo.
+        """
+        codigo = str(df_inv.at[idx, "Código"])
+        t.at[idx, "Stock"] = df_inv.at[idx, "Stock"]
+        filas = t.index[t["Código"].to_numpy() == codigo]
+        cols_v = [f"V{w}" for w in VENTANAS_VELOCIDAD]
+        if self._vel is not None and codigo in self._vel.index:
+            t.loc[filas, cols_v] = self._vel.loc[codigo, cols_v].to_numpy()
+        sub = t.loc[filas]
+        reorden = self._reorden(sub[f"V{VENTANA_REFERENCIA}"].to_numpy(), sub["Stock"].to_numpy(dtype=float))
+        for col, valores in reorden.items():
+            t.loc[filas, col] = valores
+
+    @staticmethod
+    def _reorden(vel, stock):
+        """Días de cobertura, punto de reorden y compra sugerida para velocidades y stock alineados."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cobertura = np.where(vel > 0, stock / vel, np.inf)
+        punto = np.ceil(vel * (DIAS_ENTREGA + DIAS_SEGURIDAD)).astype(int)
+        bajo = (vel > 0) & (stock <= punto)
+        objetivo = np.ceil(vel * (DIAS_ENTREGA + DIAS_OBJETIVO))
+        sugerido = np.where(bajo, np.maximum(objetivo - stock, 0), 0).astype(int)
+        return {"DiasCobertura": cobertura, "PuntoReorden": punto, "BajoStock": bajo, "Sugerido": sugerido}
+
+
+def leer_ventas_y_velocidad(archivo=None):
+    """
+    Lo que la app lee en otro hilo después de mostrar Inventario: Ventas por bloques
+    y las velocidades de venta armadas sobre ella. No toca Tk.
+    Devuelve (df_ven, agregados, MotorVelocidad).
+    """
+    df_ven, agregados = leer_ventas_streaming(archivo)
+    velocidad = MotorVelocidad()
+    velocidad.reconstruir(df_ven)
+    return df_ven, agregados, velocidad
+
+
+def _nombre_hoja_excel(nombre, usados):
+    """Nombre de hoja válido para Excel (máx. 31 caracteres, sin []:*?/\\) y único."""
+    limpio = "".join(ch for ch in str(nombre) if ch not in '[]:*?/\\').strip()[:31] or "Hoja"
+    base, n = limpio, 2
+    while limpio.lower() in usados:
+        sufijo = f" ({n})"
+        limpio = base[:31 - len(sufijo)] + sufijo
+        n += 1
+    usados.add(limpio.lower())
+    return limpio
+
+
+# -------------------- Lotes de costo (FIFO) --------------------
+class LotesFIFO:
+    """
+    Lotes de costo por producto (cada abasto = un lote con su PrecioCompra).
+    Cada producto tiene una cola con los lotes que aún tienen unidades; una venta
+    consume desde el lote más viejo. Cada lote sale de la cola una sola vez, así
+    que el costo por venta es O(1) amortizado.
+    Las mermas quedan en la misma hoja como filas con Cantidad negativa (Restante 0)
+    para que recostear_fifo las pueda repetir.
+    """
+
+    def __init__(self):
+        self.cargar(_df_vacio_por_hoja(SHEET_LOT))
+
+    def cargar(self, df_lot):
+        """Arma las colas desde la hoja Lotes (en el orden de la hoja = orden de llegada)."""
+        self._fecha = df_lot["Fecha"].fillna("").astype(str).tolist()
+        self._codigo = df_lot["Código"].fillna("").astype(str).tolist()
+        self._cantidad = pd.to_numeric(df_lot["Cantidad"], errors="coerce").fillna(0).astype(int).tolist()
+        self._costo = pd.to_numeric(df_lot["PrecioCompra"], errors="coerce").fillna(0.0).astype(float).tolist()
+        self._restante = pd.to_numeric(df_lot["Restante"], errors="coerce").fillna(0).astype(int).tolist()
+        self._colas = {}
+        self._tabla = None  # última tabla() armada; se descarta con cada cambio
+        for fila, (codigo, resta) in enumerate(zip(self._codigo, self._restante)):
+            if resta > 0:
+                self._colas.setdefault(codigo, deque()).append(fila)
+
+    def agregar(self, codigo, cantidad, costo, fecha=None):
+        """Nuevo lote (abasto o alta de producto)."""
+        cantidad = int(cantidad)
+        if cantidad <= 0:
+            return
+        fila = len(self._codigo)
+        self._tabla = None
+        self._fecha.append(fecha or datetime.now().isoformat())
+        self._codigo.append(str(codigo))
+        self._cantidad.append(cantidad)
+        self._costo.append(float(costo))
+        self._restante.append(cantidad)
+        self._colas.setdefault(str(codigo), deque()).append(fila)
+
+    def consumir(self, codigo, cantidad, costo_respaldo):
+        """
+        Saca `cantidad` unidades FIFO y devuelve su costo total. Las unidades que
+        ningún lote cubre (stock anterior a los lotes, ajustes manuales) se costean
+        con costo_respaldo (el PrecioCompra actual del producto).
+        """
+        cola = self._colas.get(str(codigo))
+        falta = int(cantidad)
+        costo = 0.0
+        if cola:
+            self._tabla = None
+        while falta > 0 and cola:
+            fila = cola[0]
+            toma = min(falta, self._restante[fila])
+            costo += toma * self._costo[fila]
+            self._restante[fila] -= toma
+            falta -= toma
+            if self._restante[fila] <= 0:
+                cola.popleft()
+        return costo + falta * float(costo_respaldo)
+
+    def mermar(self, codigo, cantidad, costo_respaldo, fecha=None):
+        """Como consumir, pero deja la merma anotada en la hoja Lotes."""
+        cantidad = int(cantidad)
+        costo = self.consumir(codigo, cantidad, costo_respaldo)
+        if cantidad > 0:
+            self._tabla = None
+            self._fecha.append(fecha or datetime.now().isoformat())
+            self._codigo.append(str(codigo))
+            self._cantidad.append(-cantidad)
+            self._costo.append(costo / cantidad)
+            self._restante.append(0)
+        return costo
+
+    def descartar(self, codigo):
+        """Da de baja las unidades pendientes del producto (p. ej. al eliminarlo)."""
+        for fila in self._colas.pop(str(codigo), ()):
+            self._restante[fila] = 0
+            self._tabla = None
+
+    def abrir_inventario(self, df_inv, fecha=None):
+        """
+        Lote de apertura (Stock actual a PrecioCompra actual) para los productos con
+        stock que todavía no tienen ningún lote. Devuelve cuántos se crearon.
+        """
+        con_lote = set(self._codigo)
+        codigos = df_inv["Código"].fillna("").astype(str)
+        stock = pd.to_numeric(df_inv["Stock"], errors="coerce").fillna(0).astype(int)
+        mask = (stock > 0) & ~codigos.isin(con_lote) & (codigos.str.strip() != "")
+        fecha = fecha or datetime.now().isoformat()
+        costos = pd.to_numeric(df_inv["PrecioCompra"], errors="coerce").fillna(0.0)
+        for codigo, cant, costo in zip(codigos[mask], stock[mask], costos[mask]):
+            self.agregar(codigo, cant, costo, fecha)
+        return int(mask.sum())
+
+    def lotes_de(self, codigo):
+        """Lotes con unidades del producto, del más viejo al más nuevo: (Fecha, Restante, PrecioCompra)."""
+        return [(self._fecha[f], self._restante[f], self._costo[f]) for f in self._colas.get(str(codigo), ())]
+
+    def tabla(self):
+        """
+        Hoja Lotes para guardar (copia de las listas: se puede escribir en otro hilo).
+        Se arma de nuevo solo si hubo cambios; quien la recibe no debe modificarla.
+        """
+        if self._tabla is None:
+            self._tabla = pd.DataFrame({
+                "Fecha": list(self._fecha),
+                "Código": list(self._codigo),
+                "Cantidad": list(self._cantidad),
+                "PrecioCompra": list(self._costo),
+                "Restante": list(self._restante),
+            }, columns=LOT_COLS)
+        return self._tabla
+
+
+def recostear_fifo(df_ven, df_lot):
+    """
+    Repite FIFO sobre Ventas históricas, vectorizado para todos los productos a la vez.
+
+    Los lotes de cada producto (por fecha) forman una curva de costo acumulado
+    contra unidades acumuladas; todos los productos van uno tras otro en un solo
+    eje, así que el costo de una venta es interp(fin) - interp(inicio) con
+    np.interp. Solo se recostean ventas desde el primer lote del producto; las
+    unidades que ningún lote cubre conservan el PrecioCompra de la venta.
+
+    Las mermas (filas de df_lot con Cantidad negativa) se repiten en su fecha
+    junto con las ventas. Si aun así el Restante que deja la repetición no es el
+    de df_lot (p. ej. mermas de antes de que se anotaran), el producto no se
+    recostea (sus ventas quedan igual) y se devuelve en la lista de descuadrados.
+
+    Devuelve (PrecioCompra, Ganancia, descuadrados): Series con el índice de
+    df_ven y lista ordenada de Códigos.
+    """
+    pc = pd.to_numeric(df_ven["PrecioCompra"], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+    gan = pd.to_numeric(df_ven["Ganancia"], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+
+    lot = pd.DataFrame({
+        "Código": df_lot["Código"].astype(str),
+        "_dt": pd.to_datetime(df_lot["Fecha"], errors="coerce", format="ISO8601"),
+        "Cantidad": pd.to_numeric(df_lot["Cantidad"], errors="coerce").fillna(0),
+        "PrecioCompra": pd.to_numeric(df_lot["PrecioCompra"], errors="coerce").fillna(0.0),
+        "Restante": pd.to_numeric(df_lot["Restante"], errors="coerce").fillna(0),
+    })
+    mermas = lot[lot["_dt"].notna() & (lot["Cantidad"] < 0)]
+    lot = lot[lot["_dt"].notna() & (lot["Cantidad"] > 0)].sort_values(["Código", "_dt"], kind="stable")
+    if lot.empty:
+        return pd.Series(pc, index=df_ven.index), pd.Series(gan, index=df_ven.index), []
+
+    q_lot = lot["Cantidad"].to_numpy(dtype=float)
+    c_lot = q_lot * lot["PrecioCompra"].to_numpy(dtype=float)
+    xp = np.concatenate(([0.0], np.cumsum(q_lot)))   # unidades acumuladas (todos los productos)
+    fp = np.concatenate(([0.0], np.cumsum(c_lot)))   # costo acumulado
+    cod_lot = lot["Código"].to_numpy()
+    primero = np.concatenate(([True], cod_lot[1:] != cod_lot[:-1]))
+    productos = pd.Index(cod_lot[primero])
+    inicio = xp[:-1][primero]                          # dónde empieza cada producto en el eje
+    total_lotes = np.diff(np.concatenate((inicio, [xp[-1]])))
+    primer_lote = lot["_dt"].to_numpy()[primero]
+
+    dt = pd.to_datetime(df_ven["Fecha"], errors="coerce", format="ISO8601").to_numpy()
+    cant = pd.to_numeric(df_ven["Cantidad"], errors="coerce").fillna(0).to_numpy(dtype=float)
+    prod = productos.get_indexer(df_ven["Código"].astype(str))
+    ok = (prod >= 0) & (df_ven["Tipo"].astype(str) != "Pago").to_numpy() & ~pd.isna(dt) & (cant > 0)
+    ok[ok] = dt[ok] >= primer_lote[prod[ok]]
+
+    # las mermas entran a la repetición como salidas sin fila en Ventas (fila -1)
+    p_merma = productos.get_indexer(mermas["Código"])
+    dt_merma = mermas["_dt"].to_numpy()
+    en = p_merma >= 0
+    en[en] = dt_merma[en] >= primer_lote[p_merma[en]]
+    p_sal = np.concatenate((prod[ok], p_merma[en]))
+    q_sal = np.concatenate((cant[ok], -mermas["Cantidad"].to_numpy(dtype=float)[en]))
+
+    # Restante de cada lote tras repetir ventas y mermas, contra el de la hoja
+    salido = np.minimum(np.bincount(p_sal, weights=q_sal, minlength=len(productos)), total_lotes)
+    p_lot = np.cumsum(primero) - 1  # producto de cada lote
+    resta = np.clip(xp[1:] - inicio[p_lot] - salido[p_lot], 0, q_lot)
+    malos = np.unique(p_lot[resta != lot["Restante"].to_numpy(dtype=float)])
+    ok[ok] = ~np.isin(prod[ok], malos)
+    en &= ~np.isin(p_merma, malos)
+    descuadrados = sorted(productos[malos])
+
+    sel = np.flatnonzero(ok)
+    if not len(sel):
+        return pd.Series(pc, index=df_ven.index), pd.Series(gan, index=df_ven.index), descuadrados
+
+    v = pd.DataFrame({
+        "p": np.concatenate((prod[sel], p_merma[en])),
+        "dt": np.concatenate((dt[sel], dt_merma[en])),
+        "q": np.concatenate((cant[sel], -mermas["Cantidad"].to_numpy(dtype=float)[en])),
+        "fila": np.concatenate((sel, np.full(int(en.sum()), -1))),
+    }).sort_values(["p", "dt"], kind="stable")
+    p = v["p"].to_numpy()
+    q = v["q"].to_numpy()
+    fin = v.groupby("p")["q"].cumsum().to_numpy()
+    a = inicio[p] + np.minimum(fin - q, total_lotes[p])
+    b = inicio[p] + np.minimum(fin, total_lotes[p])
+    venta = v["fila"].to_numpy() >= 0
+    filas = v["fila"].to_numpy()[venta]
+    costo = (np.interp(b, xp, fp) - np.interp(a, xp, fp))[venta] + (q - (b - a))[venta] * pc[filas]
+    q = q[venta]
+
+    total = pd.to_numeric(df_ven["Total"], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+    pc = pc.copy()
+    gan = gan.copy()
+    pc[filas] = np.round(costo / q, 6)
+    gan[filas] = np.round(total[filas] - costo, 6)
+    return pd.Series(pc, index=df_ven.index), pd.Series(gan, index=df_ven.index), descuadrados
+
+
+# -------------------- Estado de cuenta por persona --------------------
+class IndicePersonas:
+    """
+    Persona -> posiciones (iloc) de sus filas en Ventas.
+    Se arma una vez con groupby y luego se mantiene al agregar movimientos,
+    así abrir un estado de cuenta cuesta lo que tenga esa persona, no todo Ventas.
+    """
+
+    def __init__(self):
+        self.invalidar()
+
+    def invalidar(self):
+        self._pos = None
+
+    @staticmethod
+    def _clave(persona):
+        return "" if pd.isna(persona) else str(persona).strip()
+
+    def reconstruir(self, df_ven):
+        per = df_ven["Persona"].fillna("").astype(str).str.strip()
+        self._pos = {k: v.tolist() for k, v in per.groupby(per, sort=False).indices.items()}
+
+    def agregar(self, persona, posicion):
+        if self._pos is None:
+            return  # se arma completo en la próxima consulta
+        self._pos.setdefault(self._clave(persona), []).append(posicion)
+
+    def posiciones(self, persona, df_ven):
+        if self._pos is None:
+            self.reconstruir(df_ven)
+        return self._pos.get(self._clave(persona), [])
+
+    def personas(self, df_ven):
+        if self._pos is None:
+            self.reconstruir(df_ven)
+        return sorted(k for k in self._pos if k)
+
+
+def estado_de_cuenta(df_ven, posiciones):
+    """
+    Movimientos Fiado (cargo) y Pago (abono) de una persona con saldo acumulado.
+    posiciones: filas (iloc) de esa persona en Ventas, en orden de registro.
+    """
+    filas = df_ven.iloc[sorted(posiciones)]
+    filas = filas[filas["Tipo"].astype(str).isin(["Fiado", "Pago"])]
+    total = pd.to_numeric(filas["Total"], errors="coerce").fillna(0.0)
+    es_fiado = filas["Tipo"].astype(str) == "Fiado"
+
+    edo = pd.DataFrame({
+        "Fecha": filas["Fecha"],
+        "Tipo": filas["Tipo"],
+        "Nombre": filas["Nombre"],
+        "Cantidad": filas["Cantidad"],
+        "Cargo": total.where(es_fiado, 0.0),
+        "Abono": total.where(~es_fiado, 0.0),
+        "Descripción": filas["Descripción"].fillna(""),
+    })
+    edo["Saldo"] = (edo["Cargo"] - edo["Abono"]).cumsum()
+    return edo
+
+
+# -------------------- Antigüedad de deudas --------------------
+_DIA_DESCONOCIDO = -(10 ** 9)  # Fiado con Fecha ilegible: va al tramo más viejo (ver FechaDesconocida)
+SIN_FECHA = "sin fecha"  # en Deudores, la deuda tiene Fiado con Fecha ilegible
+
+
+def _centavos(monto):
+    return int(round(float(monto) * 100))
+
+
+def _tabla_antiguedad(filas, hoy_d):
+    """
+    filas: iterable de (persona, dia, centavos pendientes) y (persona, None, -crédito).
+    Devuelve DataFrame por Persona: tramos, Pendiente, AFavor (en pesos), DiasMasVieja
+    (solo de las fechas legibles; 0 si no hay) y FechaDesconocida (algún Fiado pendiente
+    con Fecha ilegible: no se sabe qué tan vieja es la deuda).
+    """
+    etiquetas = [t for t, _ in TRAMOS_ANTIGUEDAD]
+    cols = ["Persona", *etiquetas, "Pendiente", "AFavor", "DiasMasVieja", "FechaDesconocida"]
+    df = pd.DataFrame(list(filas), columns=["Persona", "Dia", "Centavos"])
+    if df.empty:
+        return pd.DataFrame(columns=cols)
+
+    credito = df[df["Dia"].isna()]
+    df = df[df["Dia"].notna()]
+    dia = df["Dia"].astype("int64")
+    edad = hoy_d - dia
+    limites = [lim for _, lim in TRAMOS_ANTIGUEDAD[:-1]]
+    tramo = np.searchsorted(np.array(limites), edad.to_numpy(), side="left")
+    piv = df["Centavos"].groupby([df["Persona"], tramo]).sum().unstack(fill_value=0)
+    piv = piv.reindex(columns=range(len(etiquetas)), fill_value=0)
+    piv.columns = etiquetas
+
+    tabla = piv.join(credito.groupby("Persona")["Centavos"].sum().rename("AFavor") * -1, how="outer").fillna(0)
+    tabla["Pendiente"] = tabla[etiquetas].sum(axis=1)
+    conocido = dia != _DIA_DESCONOCIDO
+    vieja = dia[conocido].groupby(df["Persona"][conocido]).min()
+    tabla["DiasMasVieja"] = (hoy_d - vieja).reindex(tabla.index).fillna(0).astype(int)
+    tabla["FechaDesconocida"] = (~conocido).groupby(df["Persona"]).any().reindex(tabla.index, fill_value=False)
+    tabla[etiquetas + ["Pendiente", "AFavor"]] = tabla[etiquetas + ["Pendiente", "AFavor"]] / 100.0
+    return tabla.rename_axis("Persona").reset_index()[cols].sort_values("Persona", ignore_index=True)
+
+
+def _fiados_pendientes(df_ven):
+    """
+    Reconstrucción vectorizada: los Pago de cada persona se aplican a sus Fiado del
+    más viejo al más nuevo. Con P = total pagado y acumulado_i = suma de Fiado hasta
+    la fila i, lo pendiente de cada Fiado es clip(acumulado_i - P, 0, monto_i).
+    Todo en centavos enteros para que coincida exacto con AntiguedadDeudas.
+    Devuelve (filas (persona, dia, centavos) en orden de Ventas, {persona: crédito}).
+    """
+    per = df_ven["Persona"].fillna("").astype(str).str.strip()
+    tipo = df_ven["Tipo"].fillna("").astype(str)
+    cent = (pd.to_numeric(df_ven["Total"], errors="coerce").fillna(0.0) * 100).round().astype("int64")
+    ok = per != ""
+
+    fiado = ok & (tipo == "Fiado")
+    pagado = cent[ok & (tipo == "Pago")].groupby(per[ok & (tipo == "Pago")]).sum()
+    f_per = per[fiado]
+    f_cent = cent[fiado]
+    acumulado = f_cent.groupby(f_per).cumsum()
+    p = f_per.map(pagado).fillna(0).astype("int64")
+    pendiente = (acumulado - p).clip(lower=0).clip(upper=f_cent)
+
+    dt = pd.to_datetime(df_ven.loc[fiado, "Fecha"], errors="coerce", format="ISO8601")
+    dia = ((dt.dt.normalize() - pd.Timestamp("1970-01-01")).dt.days).fillna(_DIA_DESCONOCIDO).astype("int64")
+    abiertos = pendiente > 0
+
+    credito = (pagado - f_cent.groupby(f_per).sum().reindex(pagado.index, fill_value=0)).clip(lower=0)
+    credito = credito[credito > 0]
+    filas = list(zip(f_per[abiertos], dia[abiertos].tolist(), pendiente[abiertos].tolist()))
+    return filas, {persona: int(c) for persona, c in credito.items()}
+
+
+def antiguedad_deudas(df_ven, hoy=None):
+    """Tabla de antigüedad por persona calculada desde cero (vectorizada)."""
+    filas, credito = _fiados_pendientes(df_ven)
+    filas += [(persona, None, -c) for persona, c in credito.items()]
+    return _tabla_antiguedad(filas, _dia_epoca(hoy or date.today()))
+
+
+class AntiguedadDeudas:
+    """
+    Fiado pendientes por persona, del más viejo al más nuevo (en centavos).
+    Un Pago se come los cargos desde el frente de la cola; lo que sobra queda como
+    crédito y se aplica al siguiente Fiado. Se arma una vez desde Ventas y después
+    cada venta/pago solo toca la cola de esa persona.
+    """
+
+    def __init__(self):
+        self.invalidar()
+
+    def invalidar(self):
+        self._colas = None   # persona -> deque de [dia, centavos pendientes]
+        self._credito = None  # persona -> centavos pagados de más
+
+    @property
+    def listo(self):
+        return self._colas is not None
+
+    def reconstruir(self, df_ven):
+        filas, self._credito = _fiados_pendientes(df_ven)
+        self._colas = {}
+        for persona, dia, centavos in filas:
+            self._colas.setdefault(persona, deque()).append([dia, centavos])
+
+    def registrar(self, persona, tipo, total, fecha):
+        """Aplica un Fiado (cargo) o Pago (abono) de una persona."""
+        if self._colas is None or tipo not in ("Fiado", "Pago"):
+            return
+        persona = "" if pd.isna(persona) else str(persona).strip()
+        if not persona:
+            return
+        monto = _centavos(_a_numero(total))
+        cola = self._colas.setdefault(persona, deque())
+        credito = self._credito.get(persona, 0)
+        if tipo == "Fiado":
+            usa = min(credito, monto)
+            credito -= usa
+            monto -= usa
+            if monto > 0:
+                try:
+                    dia = _dia_epoca(fecha)
+                except (TypeError, ValueError):
+                    dia = _DIA_DESCONOCIDO
+                cola.append([dia, monto])
+        else:
+            while monto > 0 and cola:
+                toma = min(monto, cola[0][1])
+                cola[0][1] -= toma
+                monto -= toma
+                if cola[0][1] == 0:
+                    cola.popleft()
+            credito += monto
+        self._credito[persona] = credito
+
+    def tabla(self, df_ven, hoy=None):
+        if self._colas is None:
+            self.reconstruir(df_ven)
+        filas = [(p, dia, c) for p, cola in self._colas.items() for dia, c in cola]
+        filas += [(p, None, -c) for p, c in self._credito.items() if c > 0]
+        return _tabla_antiguedad(filas, _dia_epoca(hoy or date.today()))
+
+
+# -------------------- Auditoría de hojas derivadas --------------------
+TOLERANCIA_AUDITORIA = 0.005  # diferencias menores a medio centavo no cuentan
+
+
+def _estado_deuda(total):
+    """Columna Estado (AL DÍA / A FAVOR / ADEUDA) para una serie de TotalDeuda."""
+    monto = total.abs().map("{:.2f}".format).astype(str)
+    return pd.Series(
+        np.where(total == 0, "AL DÍA", np.where(total < 0, "A FAVOR $" + monto, "ADEUDA $" + monto)),
+        index=total.index,
+    )
+
+
+def reconstruir_derivadas(df_ven, fechas=None):
+    """
+    Re-arma Deudas, ResumenPagos y Ganancias repitiendo todo el log de Ventas
+    con groupbys vectorizados (sin recorrer fila por fila).
+    fechas: Fecha ya pasada por pd.to_datetime (opcional, para no parsearla dos veces).
+    """
+    cod_per, personas = _claves_texto(df_ven["Persona"])
+    cod_tipo, tipos = _claves_texto(df_ven["Tipo"], limpiar=False)
+    total = pd.to_numeric(df_ven["Total"], errors="coerce").fillna(0.0)
+
+    # suma por (persona, tipo) con un solo bincount sobre códigos enteros
+    sumas = np.bincount(cod_per * len(tipos) + cod_tipo, weights=total.to_numpy(dtype=float),
+                        minlength=len(personas) * len(tipos))
+    por_tipo = pd.DataFrame(sumas.reshape(len(personas), len(tipos)), index=personas, columns=tipos).sort_index()
+    for t in ("Efectivo", "Transferencia", "Fiado", "Pago"):
+        if t not in por_tipo.columns:
+            por_tipo[t] = 0.0
+    por_tipo = por_tipo[por_tipo.index != ""]
+    ahora = datetime.now().isoformat()
+
+    deu = por_tipo[(por_tipo["Fiado"] != 0) | (por_tipo["Pago"] != 0)]
+    df_deu = pd.DataFrame({
+        "Persona": deu.index,
+        "Adeuda": deu["Fiado"].to_numpy(),
+        "Pagado": deu["Pago"].to_numpy(),
+    })
+    df_deu["TotalDeuda"] = df_deu["Adeuda"] - df_deu["Pagado"]
+    df_deu["Estado"] = _estado_deuda(df_deu["TotalDeuda"])
+
+    res = por_tipo[(por_tipo[["Efectivo", "Transferencia", "Fiado", "Pago"]] != 0).any(axis=1)]
+    df_res = pd.DataFrame({
+        "Persona": res.index,
+        "TotalEfectivo": res["Efectivo"].to_numpy(),
+        "TotalTransferencia": res["Transferencia"].to_numpy(),
+        "TotalFiado": res["Fiado"].to_numpy(),
+        "TotalPagado": res["Pago"].to_numpy(),
+        "DeudaActual": (res["Fiado"] - res["Pago"]).to_numpy(),
+        "UltimaActualizacion": ahora,
+    })
+
+    ventas = pd.Series(tipos[cod_tipo] != "Pago", index=df_ven.index)
+    dt = pd.to_datetime(df_ven["Fecha"], errors="coerce", format="ISO8601") if fechas is None else fechas
+    ok = ventas & dt.notna()
+    gan = pd.DataFrame({
+        "Mes": dt[ok].dt.to_period("M"),  # agrupar por periodo y formatear solo las claves
+        "Total": total[ok],
+        "Ganancia": pd.to_numeric(df_ven["Ganancia"], errors="coerce").fillna(0.0)[ok],
+    })
+    df_gan = gan.groupby("Mes").agg(
+        TotalVentasMes=("Total", "sum"),
+        TotalGananciaMes=("Ganancia", "sum"),
+    ).reset_index()
+    df_gan["Mes"] = df_gan["Mes"].dt.strftime("%Y-%m").astype(object)
+    df_gan["UltimaActualizacion"] = ahora
+
+    return {SHEET_DEU: df_deu, SHEET_RES: df_res, SHEET_GAN: df_gan}
+
+
+def _diferencias(hoja, guardado, reconstruido, clave, columnas):
+    """Compara dos tablas por clave; devuelve una fila por celda que no coincide."""
+    g = guardado[[clave] + columnas].copy()
+    r = reconstruido[[clave] + columnas].copy()
+    g[clave] = _texto_limpio(g[clave])
+    r[clave] = _texto_limpio(r[clave])
+    g = g[g[clave] != ""].groupby(clave)[columnas].sum()
+    r = r.groupby(clave)[columnas].sum()
+
+    g, r = g.align(r, join="outer", fill_value=0.0)
+    g = g.apply(pd.to_numeric, errors="coerce").fillna(0.0)
+    dif = r - g
+    malas = dif.abs() > TOLERANCIA_AUDITORIA
+    if not malas.any().any():
+        return pd.DataFrame(columns=["Hoja", "Clave", "Columna", "Guardado", "Reconstruido", "Diferencia"])
+
+    largo = pd.DataFrame({
+        "Guardado": g.stack(),
+        "Reconstruido": r.stack(),
+        "Diferencia": dif.stack(),
+        "_mala": malas.stack(),
+    })
+    largo = largo[largo["_mala"]].drop(columns="_mala")
+    largo.index = largo.index.set_names(["Clave", "Columna"])
+    largo = largo.reset_index()
+    largo.insert(0, "Hoja", hoja)
+    return largo
+
+
+def auditar_derivadas(df_ven, df_tra, df_deu, df_res, df_gan, fechas=None):
+    """
+    Reconstruye las hojas derivadas desde Ventas y las compara con las guardadas.
+    Transferencias se coteja contra las ventas Tipo Transferencia (por Persona).
+    fechas: como en reconstruir_derivadas.
+    Devuelve (discrepancias, reconstruidas).
+    """
+    rec = reconstruir_derivadas(df_ven, fechas)
+
+    partes = [
+        _diferencias(SHEET_DEU, df_deu, rec[SHEET_DEU], "Persona", ["Adeuda", "Pagado", "TotalDeuda"]),
+        _diferencias(SHEET_RES, df_res, rec[SHEET_RES], "Persona",
+                     ["TotalEfectivo", "TotalTransferencia", "TotalFiado", "TotalPagado", "DeudaActual"]),
+        _diferencias(SHEET_GAN, df_gan, rec[SHEET_GAN], "Mes", ["TotalVentasMes", "TotalGananciaMes"]),
+    ]
+
+    # se suma por persona antes de comparar (son cientos de personas, no cientos de miles de filas)
+    def por_persona(personas, total):
+        cod, nombres = _claves_texto(personas)
+        sumas = _sumas_por_clave(cod, len(nombres), Total=total, Movimientos=np.ones(len(cod)))
+        sumas.insert(0, "Persona", nombres)
+        return sumas
+
+    es_tra = (df_ven["Tipo"] == "Transferencia").to_numpy()
+    tra_ven = por_persona(df_ven["Persona"][es_tra], pd.to_numeric(df_ven["Total"][es_tra], errors="coerce").fillna(0.0))
+    tra_hoja = por_persona(df_tra["Persona"], pd.to_numeric(df_tra["Total"], errors="coerce").fillna(0.0))
+    partes.append(_diferencias(SHEET_TRA, tra_hoja, tra_ven, "Persona", ["Total", "Movimientos"]))
+
+    return pd.concat(partes, ignore_index=True), rec
+
+
+# -------------------- Revisión de datos --------------------
+def _filas_problema(hoja, posiciones, columna, problema, valores):
+    """Un problema por posición; Fila es el renglón en Excel (posición + 2: encabezado y base 1)."""
+    posiciones = np.asarray(posiciones, dtype=np.int64)
+    valores = np.asarray(valores, dtype=object) if not isinstance(valores, str) else valores
+    return pd.DataFrame({
+        "Hoja": hoja,
+        "Fila": pd.array(posiciones + 2, dtype="Int64"),
+        "Columna": columna,
+        "Problema": problema,
+        "Valor": valores,
+    }, index=range(len(posiciones)))
+
+
+def revisar_datos(df_inv, df_ven, df_tra, df_deu, df_res, df_gan, df_lot=None, invalidos=None):
+    """
+    Revisión vectorizada de las hojas: códigos duplicados o vacíos, stock negativo,
+    números y fechas ilegibles, códigos sin producto (Ventas / Lotes) y hojas
+    derivadas que no coinciden con Ventas (auditar_derivadas).
+    invalidos: hoja -> {columna: posiciones} que anotaron cargar_hoja / leer_ventas_streaming
+    (después de cargar esas celdas ya son 0, no se pueden volver a detectar).
+    Devuelve (problemas, reconstruidas); problemas tiene Hoja, Fila, Columna, Problema, Valor.
+    """
+    partes = []
+
+    codigos = df_inv["Código"].fillna("").astype(str).str.strip()
+    vacio = (codigos == "").to_numpy()
+    dup = codigos.duplicated(keep=False).to_numpy() & ~vacio
+    partes.append(_filas_problema(SHEET_INV, np.flatnonzero(dup), "Código", "Código duplicado", codigos[dup]))
+    partes.append(_filas_problema(SHEET_INV, np.flatnonzero(vacio), "Código", "Código vacío", ""))
+    stock = pd.to_numeric(df_inv["Stock"], errors="coerce").fillna(0).to_numpy()
+    neg = np.flatnonzero(stock < 0)
+    partes.append(_filas_problema(SHEET_INV, neg, "Stock", "Stock negativo", stock[neg]))
+
+    # números: Transferencias se guarda como texto, se revisa aquí; las demás hojas al cargar
+    invalidos = {h: dict(c) for h, c in (invalidos or {}).items()}
+    for c in ("Cantidad", "Precio", "Total"):
+        if c in df_tra.columns:
+            _columna_numerica(df_tra, c, invalidos.setdefault(SHEET_TRA, {}))
+    for hoja, columnas in invalidos.items():
+        for c, pos in columnas.items():
+            partes.append(_filas_problema(hoja, pos, c, "Número ilegible (se usa 0)", ""))
+
+    conocidos = pd.Index(codigos[~vacio].unique())
+    fechas_ven = None
+    for hoja, df in ((SHEET_VEN, df_ven), (SHEET_TRA, df_tra), (SHEET_LOT, df_lot)):
+        if df is None or df.empty:
+            continue
+        dt = pd.to_datetime(df["Fecha"], errors="coerce", format="ISO8601")
+        if hoja == SHEET_VEN:
+            fechas_ven = dt  # la auditoría de Ganancias usa las mismas
+        malas = np.flatnonzero(dt.isna().to_numpy())
+        partes.append(_filas_problema(hoja, malas, "Fecha", "Fecha ilegible",
+                                      df["Fecha"].iloc[malas].fillna("(vacía)").astype(str)))
+        if hoja == SHEET_TRA:
+            continue
+        # códigos sin producto: se busca cada código distinto una vez, no cada fila
+        cod, distintos = _claves_texto(df["Código"])
+        falta = ~pd.Index(distintos).isin(conocidos) & (distintos != "")
+        huerfano = falta[cod]
+        if hoja == SHEET_VEN:
+            huerfano &= (df["Tipo"] != "Pago").to_numpy()
+        pos = np.flatnonzero(huerfano)
+        partes.append(_filas_problema(hoja, pos, "Código", "Código sin producto", distintos[cod[pos]]))
+
+    dif, rec = auditar_derivadas(df_ven, df_tra, df_deu, df_res, df_gan, fechas_ven)
+    if len(dif):
+        guardadas = {SHEET_DEU: (df_deu, "Persona"), SHEET_RES: (df_res, "Persona"), SHEET_GAN: (df_gan, "Mes")}
+        filas = pd.Series(pd.NA, index=dif.index, dtype="Int64")
+        for hoja, (df, clave) in guardadas.items():
+            es = (dif["Hoja"] == hoja).to_numpy()
+            if es.any():
+                primera = pd.Series(np.arange(len(df)), index=_texto_limpio(df[clave]).to_numpy())
+                primera = primera[~primera.index.duplicated()]
+                filas[es] = dif.loc[es, "Clave"].map(primera).add(2).astype("Int64").to_numpy()
+        partes.append(pd.DataFrame({
+            "Hoja": dif["Hoja"],
+            "Fila": filas,
+            "Columna": dif["Columna"],
+            "Problema": "No coincide con Ventas",
+            "Valor": (dif["Clave"].astype(str) + ": guardado " + dif["Guardado"].map("{:.2f}".format)
+                      + " / desde Ventas " + dif["Reconstruido"].map("{:.2f}".format)),
+        }))
+
+    return pd.concat(partes, ignore_index=True), rec
+
+
+# -------------------- Cubo de ventas --------------------
+DIMENSIONES_CUBO = ("Dia", "Hora", "Categoría", "Tipo", "Código")
+MEDIDAS_CUBO = ("Cantidad", "Total", "Ganancia", "Movimientos")
+_BAJAR_A = {"Categoría": "Código", "Tipo": "Categoría", "Dia": "Hora", "Hora": "Código", "Código": "Dia"}
+
+
+def _dimension_para_bajar(dim, usadas):
+    """Dimensión del siguiente nivel al bajar desde dim (la sugerida si está libre); None si ya no queda."""
+    libres = [d for d in DIMENSIONES_CUBO if d not in usadas]
+    if not libres:
+        return None
+    return _BAJAR_A[dim] if _BAJAR_A[dim] in libres else libres[0]
+
+
+def _agregar_cubo(df, dims):
+    """Suma las medidas por dims; las dimensiones de texto quedan como category."""
+    g = df.groupby(list(dims), observed=True, sort=True)[list(MEDIDAS_CUBO)].sum().reset_index()
+    for d in dims:
+        if d in ("Categoría", "Tipo", "Código"):
+            g[d] = g[d].astype("category")
+    return g
+
+
+class CuboVentas:
+    """
+    Ventas (sin Pago) pre-agregadas por día × hora × Categoría × Tipo × Código.
+
+    Dos niveles materializados: la base con día (ordenada por Dia, así un rango
+    de fechas es un corte con searchsorted) y el total histórico sin día (para
+    "por hora" o "por categoría" de todo el historial). Las ventas nuevas se suman
+    a un diccionario de celdas pendientes que se integra cada CUBO_MAX_PENDIENTES
+    celdas. Las consultas nunca leen Ventas: cuestan lo que el corte del cubo.
+    """
+
+    def __init__(self):
+        self.invalidar()
+
+    def invalidar(self):
+        self._base = None
+        self._total = None
+        self._pend = {}
+
+    @property
+    def listo(self):
+        return self._base is not None
+
+    def reconstruir(self, df_ven, df_inv):
+        tipo = df_ven["Tipo"].fillna("").astype(str)
+        dt = pd.to_datetime(df_ven["Fecha"], errors="coerce", format="ISO8601")
+        ok = (tipo != "Pago") & dt.notna()
+        codigo = df_ven.loc[ok, "Código"].astype(str)
+        df = pd.DataFrame({
+            "Dia": (dt[ok].dt.normalize() - pd.Timestamp("1970-01-01")).dt.days.astype("int64"),
+            "Hora": dt[ok].dt.hour.astype("int8"),
+            "Categoría": codigo.map(self._categorias(df_inv)).fillna("Sin categoría"),
+            "Tipo": tipo[ok],
+            "Código": codigo,
+            "Cantidad": pd.to_numeric(df_ven.loc[ok, "Cantidad"], errors="coerce").fillna(0),
+            "Total": pd.to_numeric(df_ven.loc[ok, "Total"], errors="coerce").fillna(0.0),
+            "Ganancia": pd.to_numeric(df_ven.loc[ok, "Ganancia"], errors="coerce").fillna(0.0),
+            "Movimientos": 1,
+        })
+        self._base = _agregar_cubo(df, DIMENSIONES_CUBO)
+        self._total = _agregar_cubo(self._base, DIMENSIONES_CUBO[1:])
+        self._pend = {}
+
+    @staticmethod
+    def _categorias(df_inv):
+        cat = df_inv["Categoría"].fillna("").astype(str).replace("", "Sin categoría")
+        return pd.Series(cat.to_numpy(), index=df_inv["Código"].astype(str)).groupby(level=0).first()
+
+    def registrar(self, fila, categoria):
+        """
+        Suma una venta recién registrada a su celda (O(1)).
+        categoria: la del Inventario tal cual (None / NaN / "" -> "Sin categoría", como al reconstruir).
+        """
+        categoria = "Sin categoría" if categoria is None or pd.isna(categoria) or str(categoria) == "" else str(categoria)
+        if self._base is None or fila.get("Tipo") == "Pago":
+            return
+        try:
+            dt = datetime.fromisoformat(str(fila["Fecha"]))
+        except ValueError:
+            return
+        clave = (_dia_epoca(dt), dt.hour, categoria, str(fila.get("Tipo", "")), str(fila["Código"]))
+        celda = self._pend.setdefault(clave, [0, 0.0, 0.0, 0])
+        celda[0] += int(fila["Cantidad"])
+        celda[1] += float(fila["Total"])
+        celda[2] += float(fila["Ganancia"])
+        celda[3] += 1
+        if len(self._pend) >= CUBO_MAX_PENDIENTES:
+            self._integrar()
+
+    def _pendientes(self):
+        return pd.DataFrame(
+            [(*k, *v) for k, v in self._pend.items()], columns=[*DIMENSIONES_CUBO, *MEDIDAS_CUBO]
+        )
+
+    def _integrar(self):
+        if not self._pend:
+            return
+        nuevos = self._pendientes()
+        self._base = _agregar_cubo(pd.concat([self._base.astype({d: object for d in DIMENSIONES_CUBO[2:]}), nuevos],
+                                             ignore_index=True), DIMENSIONES_CUBO)
+        self._total = _agregar_cubo(self._base, DIMENSIONES_CUBO[1:])
+        self._pend = {}
+
+    def consultar(self, por, desde=None, hasta=None, **filtros):
+        """
+        Roll-up: suma de MEDIDAS_CUBO agrupada por las dimensiones `por`
+        (lista vacía = gran total). desde/hasta: date (inclusive) para cortar por día.
+        filtros: dimensión=valor o lista de valores (p. ej. Tipo="Transferencia").
+        Drill-down = la misma consulta con un filtro más y una dimensión más fina.
+        """
+        por = list(por)
+        con_dia = desde is not None or hasta is not None or "Dia" in por or "Dia" in filtros
+        if con_dia:
+            dias = self._base["Dia"].to_numpy()
+            i = np.searchsorted(dias, _dia_epoca(desde), "left") if desde is not None else 0
+            j = np.searchsorted(dias, _dia_epoca(hasta), "right") if hasta is not None else len(dias)
+            df = self._base.iloc[i:j]
+        else:
+            df = self._total
+        if self._pend:
+            pend = self._pendientes()
+            if desde is not None:
+                pend = pend[pend["Dia"] >= _dia_epoca(desde)]
+            if hasta is not None:
+                pend = pend[pend["Dia"] <= _dia_epoca(hasta)]
+            df = pd.concat([df.astype({d: object for d in DIMENSIONES_CUBO[2:]}), pend[df.columns]], ignore_index=True)
+
+        for dim, valor in filtros.items():
+            valores = valor if isinstance(valor, (list, tuple, set)) else [valor]
+            df = df[df[dim].isin(valores)]
+        if not por:
+            return pd.DataFrame([df[list(MEDIDAS_CUBO)].sum()]).reset_index(drop=True)
+        return df.groupby(por, observed=True, sort=True)[list(MEDIDAS_CUBO)].sum().reset_index()
+
+    def celdas(self):
+        return (0 if self._base is None else len(self._base)) + len(self._pend)
+
+
+# -------------------- Reportes --------------------
+class ReporteCancelado(Exception):
+    """Un cálculo de reportes quedó viejo (cambió el filtro o los datos)."""
+
+
+def calcular_reportes(df_ven, filtro, hoy, cancelado=lambda: False, productos=None):
+    """
+    KPIs (hoy / semana / mes) y tabla por producto según filtro ("Hoy", "Este mes", "Todo").
+    No toca Tk: corre en un hilo. Revisa cancelado() entre etapas y
+    lanza ReporteCancelado si el pedido ya no sirve.
+    productos: agregados["producto"] de Ventas (opcional); con filtro "Todo" la tabla
+    sale de ahí en vez de agrupar todo Ventas.
+    """
+    def revisar():
+        if cancelado():
+            raise ReporteCancelado()
+
+    df = df_ven[df_ven["Tipo"].astype(str) != "Pago"]
+
+    # Fix definitivo: datetime real
+    dt = pd.to_datetime(df["Fecha"], errors="coerce", format="ISO8601")
+    df = df[dt.notna()]
+    dia = dt[dt.notna()].dt.normalize()
+    revisar()
+
+    hoy_ts = pd.Timestamp(hoy)
+    start_week = hoy.fromordinal(hoy.toordinal() - hoy.weekday())  # lunes
+    m_hoy = dia == hoy_ts
+    m_sem = (dia >= pd.Timestamp(start_week)) & (dia <= hoy_ts)
+    m_mes = (dia.dt.year == hoy.year) & (dia.dt.month == hoy.month)
+
+    def totales(m):
+        sub = df[m]
+        if sub.empty:
+            return 0, 0.0, 0.0
+        return int(sub["Cantidad"].sum()), float(sub["Total"].sum()), float(sub["Ganancia"].sum())
+
+    res = {"inicio_semana": start_week}
+    for clave, m in (("hoy", m_hoy), ("semana", m_sem), ("mes", m_mes)):
+        res[clave] = totales(m)
+        revisar()
+
+    # Tabla por producto según filtro seleccionado
+    if filtro == "Todo" and productos is not None:
+        filas = sorted((c, n, int(q), float(v), float(g)) for (c, n), (q, v, g) in productos.items())
+        res["productos"] = sorted(filas, key=lambda f: f[4], reverse=True)
+        return res
+    if filtro == "Hoy":
+        df_f = df[m_hoy]
+    elif filtro == "Este mes":
+        df_f = df[m_mes]
+    else:
+        df_f = df
+
+    res["productos"] = []
+    if df_f.empty:
+        return res
+
+    grp = df_f.groupby(["Código", "Nombre"], dropna=False).agg(
+        Cantidad=("Cantidad", "sum"),
+        Ventas=("Total", "sum"),
+        Ganancia=("Ganancia", "sum"),
+    ).reset_index()
+    revisar()
+
+    grp = grp.sort_values(by="Ganancia", ascending=False)
+    res["productos"] = [
+        (str(c), str(n), int(q), float(v), float(g))
+        for c, n, q, v, g in zip(grp["Código"], grp["Nombre"], grp["Cantidad"], grp["Ventas"], grp["Ganancia"])
+    ]
+    return res
+
+
+# -------------------- Treeview por diferencias --------------------
+def _subsecuencia_creciente_mas_larga(seq):
+    """Posiciones (en seq) de una subsecuencia estrictamente creciente más larga. O(n log n)."""
+    import bisect
+    colas, idx_colas, previo = [], [], [-1] * len(seq)
+    for i, x in enumerate(seq):
+        k = bisect.bisect_left(colas, x)
+        if k == len(colas):
+            colas.append(x)
+            idx_colas.append(i)
+        else:
+            colas[k] = x
+            idx_colas[k] = i
+        previo[i] = idx_colas[k - 1] if k else -1
+    res, i = [], idx_colas[-1] if idx_colas else -1
+    while i != -1:
+        res.append(i)
+        i = previo[i]
+    return res[::-1]
+
+
+class VistaArbol:
+    """
+    Mantiene un ttk.Treeview igual a una lista ordenada de filas con clave
+    (p. ej. Código) aplicando solo altas, cambios, bajas y movimientos de las
+    filas que cambiaron. Los items no se recrean, así que la selección y el
+    scroll del usuario se conservan.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.iid_por_clave = {}
+        self._filas = {}   # clave -> (valores, tags) mostrados
+        self._orden = []   # claves en el orden mostrado
+
+    def aplicar(self, filas):
+        """
+        filas: lista ordenada de (clave, valores, tags); claves únicas.
+        Devuelve dict con cuántas altas/cambios/bajas/movimientos se hicieron.
+        """
+        tree = self.tree
+        y0 = tree.yview()[0]
+        nuevas = {clave: (tuple(valores), tuple(tags)) for clave, valores, tags in filas}
+        orden_nuevo = [clave for clave, _, _ in filas]
+        stats = {"altas": 0, "cambios": 0, "bajas": 0, "movimientos": 0}
+
+        # bajas
+        bajas = [c for c in self._orden if c not in nuevas]
+        if bajas:
+            tree.delete(*[self.iid_por_clave.pop(c) for c in bajas])
+            for c in bajas:
+                del self._filas[c]
+            stats["bajas"] = len(bajas)
+
+        # cambios
+        for clave, fila in nuevas.items():
+            anterior = self._filas.get(clave)
+            if anterior is not None and anterior != fila:
+                tree.item(self.iid_por_clave[clave], values=fila[0], tags=fila[1])
+                self._filas[clave] = fila
+                stats["cambios"] += 1
+
+        # altas (al final; el paso de movimientos las acomoda)
+        actual = [c for c in self._orden if c in nuevas]
+        for clave in orden_nuevo:
+            if clave not in self._filas:
+                valores, tags = nuevas[clave]
+                self.iid_por_clave[clave] = tree.insert("", "end", values=valores, tags=tags)
+                self._filas[clave] = nuevas[clave]
+                actual.append(clave)
+                stats["altas"] += 1
+
+        # movimientos: las filas de la subsecuencia creciente más larga (respecto al
+        # orden nuevo) se quedan quietas; solo se mueven las demás.
+        destino = {clave: i for i, clave in enumerate(orden_nuevo)}
+        seq = [destino[c] for c in actual]
+        quietas = {actual[i] for i in _subsecuencia_creciente_mas_larga(seq)}
+        for i, clave in enumerate(orden_nuevo):
+            if clave in quietas:
+                continue
+            iid = self.iid_por_clave[clave]
+            tree.detach(iid)
+            pos = tree.index(self.iid_por_clave[orden_nuevo[i - 1]]) + 1 if i else 0
+            tree.move(iid, "", pos)
+            stats["movimientos"] += 1
+
+        self._orden = orden_nuevo
+        tree.yview_moveto(y0)
+        return stats
+
+    def valores(self, clave):
+        """(valores, tags) mostrados para la clave, o None si no está en la vista."""
+        return self._filas.get(clave)
+
+    def actualizar_fila(self, clave, valores, tags=()):
+        """Cambia una sola fila ya mostrada, sin reordenar. False si la clave no está."""
+        if clave not in self._filas:
+            return False
+        fila = (tuple(valores), tuple(tags))
+        if self._filas[clave] != fila:
+            self.tree.item(self.iid_por_clave[clave], values=fila[0], tags=fila[1])
+            self._filas[clave] = fila
+        return True
+
+
+# -------------------- Caché de resultados --------------------
+class CacheResultados:
+    """
+    Memoización con expulsión LRU y tamaño acotado. Quien consulta arma la clave
+    con las versiones de las hojas que usa el cálculo: cuando una hoja cambia,
+    su versión sube y la clave vieja simplemente deja de pedirse (y sale por LRU).
+    """
+
+    def __init__(self, max_entradas=CACHE_MAX_ENTRADAS):
+        self.max_entradas = max_entradas
+        self._datos = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+
+    def buscar(self, clave):
+        """(True, valor) si está; (False, None) si no. Cuenta acierto/fallo."""
+        if clave in self._datos:
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return True, self._datos[clave]
+        self.fallos += 1
+        return False, None
+
+    def guardar(self, clave, valor):
+        self._datos[clave] = valor
+        self._datos.move_to_end(clave)
+        while len(self._datos) > self.max_entradas:
+            self._datos.popitem(last=False)
+            self.expulsiones += 1
+
+    def obtener(self, clave, calcular):
+        encontrado, valor = self.buscar(clave)
+        if not encontrado:
+            valor = calcular()
+            self.guardar(clave, valor)
+        return valor
+
+    def estadisticas(self):
+        consultas = self.aciertos + self.fallos
+        return {
+            "entradas": len(self._datos),
+            "max_entradas": self.max_entradas,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "expulsiones": self.expulsiones,
+            "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+        }
+
+
+# -------------------- Consolidación de tiendas --------------------
+def cargar_tienda(archivo):
+    """Todas las hojas de un libro de tienda. Corre en un proceso aparte (debe ser picklable)."""
+    xls = pd.ExcelFile(archivo, engine="openpyxl")
+    try:
+        return {hoja: cargar_hoja(hoja, xls) for hoja in HOJAS}
+    finally:
+        xls.close()
+
+
+def _nombres_tiendas(archivos):
+    """Nombre corto por archivo (sin extensión); si se repite, se antepone la carpeta."""
+    cortos = [os.path.splitext(os.path.basename(a))[0] for a in archivos]
+    return [
+        c if cortos.count(c) == 1 else f"{os.path.basename(os.path.dirname(os.path.abspath(a)))}/{c}"
+        for a, c in zip(archivos, cortos)
+    ]
+
+
+def consolidar_tiendas(archivos, paralelo=True, procesos=None):
+    """
+    Carga varios libros de tienda (uno por proceso si paralelo) y los combina:
+    Inventario por Código, Ventas con columna Tienda, KPIs, Ganancias mensual y deudores.
+    """
+    archivos = list(archivos)
+    if paralelo and len(archivos) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        n = min(len(archivos), procesos or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=n) as ex:
+            datos = list(ex.map(cargar_tienda, archivos))
+    else:
+        datos = [cargar_tienda(a) for a in archivos]
+    return combinar_tiendas(_nombres_tiendas(archivos), datos)
+
+
+def combinar_tiendas(tiendas, datos):
+    """datos: lista (una por tienda) de {hoja: DataFrame} como devuelve cargar_tienda."""
+    def juntar(hoja):
+        partes = [d[hoja].assign(Tienda=t) for t, d in zip(tiendas, datos)]
+        return pd.concat(partes, ignore_index=True) if partes else _df_vacio_por_hoja(hoja).assign(Tienda="")
+
+    # Inventario: una fila por Código con stock total y stock por tienda
+    inv = juntar(SHEET_INV)
+    inv["Código"] = inv["Código"].astype(str)
+    inventario = inv.groupby("Código", sort=True).agg(
+        Nombre=("Nombre", "first"),
+        Categoría=("Categoría", "first"),
+        PrecioCompra=("PrecioCompra", "first"),
+        PrecioVenta=("PrecioVenta", "first"),
+        Stock=("Stock", "sum"),
+    )
+    por_tienda = inv.pivot_table(index="Código", columns="Tienda", values="Stock", aggfunc="sum", fill_value=0)
+    por_tienda.columns = [f"Stock {t}" for t in por_tienda.columns]
+    inventario = inventario.join(por_tienda).reset_index()
+
+    ventas = juntar(SHEET_VEN)
+
+    # KPIs hoy / semana / mes por tienda y total
+    hoy = date.today()
+    filas_kpi = []
+    for nombre, df in [(t, ventas[ventas["Tienda"] == t]) for t in tiendas] + [("TOTAL", ventas)]:
+        r = calcular_reportes(df, "Todo", hoy)
+        for periodo, clave in (("Hoy", "hoy"), ("Semana", "semana"), ("Mes", "mes")):
+            uni, ven, gan = r[clave]
+            filas_kpi.append((nombre, periodo, uni, ven, gan))
+    kpis = pd.DataFrame(filas_kpi, columns=["Tienda", "Periodo", "Unidades", "Ventas", "Ganancia"])
+
+    # Ganancias mensual combinada + ventas de cada tienda
+    ganancias = reconstruir_derivadas(ventas)[SHEET_GAN].drop(columns="UltimaActualizacion")
+    es_venta = ventas["Tipo"].astype(str) != "Pago"
+    dt = pd.to_datetime(ventas["Fecha"], errors="coerce", format="ISO8601")
+    ok = es_venta & dt.notna()
+    if ok.any():
+        mt = pd.DataFrame({"Mes": dt[ok].dt.to_period("M"), "Tienda": ventas["Tienda"][ok], "Total": ventas["Total"][ok]})
+        mt = mt.pivot_table(index="Mes", columns="Tienda", values="Total", aggfunc="sum", fill_value=0.0)
+        mt.index = mt.index.strftime("%Y-%m")
+        mt.columns = [f"Ventas {t}" for t in mt.columns]
+        ganancias = ganancias.join(mt, on="Mes")
+
+    # Deudores: suma de las hojas Deudas de cada tienda por Persona
+    deu = juntar(SHEET_DEU)
+    deu["Persona"] = deu["Persona"].fillna("").astype(str).str.strip()
+    deu = deu[deu["Persona"] != ""]
+    deudores = deu.groupby("Persona").agg(
+        Adeuda=("Adeuda", "sum"),
+        Pagado=("Pagado", "sum"),
+        Tiendas=("Tienda", lambda s: ", ".join(sorted(set(s)))),
+    )
+    deudores["TotalDeuda"] = deudores["Adeuda"] - deudores["Pagado"]
+    deudores["Estado"] = _estado_deuda(deudores["TotalDeuda"])
+    deudores = deudores.reset_index().sort_values("TotalDeuda", ascending=False)
+
+    return {"tiendas": tiendas, "inventario": inventario, "ventas": ventas,
+            "kpis": kpis, "ganancias": ganancias, "deudores": deudores}
+
+
+# -------------------- Precios en bloque --------------------
+MODOS_PRECIO = ("Cambio % sobre PrecioVenta", "Margen % deseado (desde PrecioCompra)")
+REDONDEOS_PRECIO = {"Sin redondeo": 0.0, "A $0.50": 0.5, "A $1.00": 1.0}
+
+
+def calcular_precios(df_inv, modo, porcentaje, redondeo=0.0):
+    """
+    Precio nuevo para todas las filas de df_inv (vectorizado) y márgenes antes/después.
+    modo: uno de MODOS_PRECIO. Con el de margen, el precio es PrecioCompra / (1 - margen),
+    así el margen sobre el precio de venta (la columna MargenDespues) queda en porcentaje.
+    redondeo: múltiplo al que se redondea (0 = sin redondeo).
+    Las filas donde la regla no da un precio (margen sin PrecioCompra, o un precio que el
+    redondeo deja en 0) conservan el precio actual y lo dicen en la columna Aviso.
+    Devuelve DataFrame con el índice de df_inv. ValueError si el margen no es menor a 100%.
+    """
+    pc = pd.to_numeric(df_inv["PrecioCompra"], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+    pv = pd.to_numeric(df_inv["PrecioVenta"], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+    if modo == MODOS_PRECIO[1]:
+        if porcentaje >= 100:
+            raise ValueError("El margen debe ser menor a 100%")
+        calculado = pc / (1 - porcentaje / 100.0)
+        sin_costo = pc <= 0
+    else:
+        calculado = pv * (1 + porcentaje / 100.0)
+        sin_costo = np.zeros(len(pv), dtype=bool)
+    nuevo = np.round(calculado / redondeo) * redondeo if redondeo else calculado
+    nuevo = np.round(np.maximum(nuevo, 0.0), 2)
+    a_cero = ~sin_costo & (calculado > 0) & (nuevo == 0)
+    nuevo = np.where(sin_costo | a_cero, pv, nuevo)
+    aviso = np.select([sin_costo, a_cero], ["Sin PrecioCompra", "El redondeo lo dejaba en 0"], "")
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        margen_antes = np.where(pv > 0, (pv - pc) / pv * 100, np.nan)
+        margen_despues = np.where(nuevo > 0, (nuevo - pc) / nuevo * 100, np.nan)
+    return pd.DataFrame({
+        "Código": df_inv["Código"].astype(str).to_numpy(),
+        "Nombre": df_inv["Nombre"].fillna("").astype(str).to_numpy(),
+        "Categoría": df_inv["Categoría"].fillna("").astype(str).to_numpy(),
+        "PrecioCompra": pc,
+        "PrecioAntes": pv,
+        "PrecioNuevo": nuevo,
+        "MargenAntes": margen_antes,
+        "MargenDespues": margen_despues,
+        "Aviso": aviso,
+    }, index=df_inv.index)
+
+
+# -------------------- Conciliación bancaria --------------------
+_COLUMNAS_BANCO = {
+    "Fecha": ("fecha", "date", "dia"),
+    "Abono": ("abono", "deposito", "depósito", "credito", "crédito", "ingreso", "credit"),
+    "Cargo": ("cargo", "retiro", "debito", "débito", "egreso", "debit"),
+    "Monto": ("importe", "monto", "amount", "cantidad", "valor"),
+    "Cuenta": ("cuenta", "account", "clabe", "tarjeta", "ordenante", "origen"),
+    "Concepto": ("concepto", "descripcion", "descripción", "description", "detalle", "referencia"),
+}
+
+
+def _columna_banco(columnas, rol):
+    """Primera columna cuyo nombre contiene alguna de las palabras del rol."""
+    for c in columnas:
+        nombre = str(c).strip().lower()
+        if any(p in nombre for p in _COLUMNAS_BANCO[rol]):
+            return c
+    return None
+
+
+def _a_monto(serie):
+    """Montos de texto ("$1,234.50", "1.234,50", "-200") a float, vectorizado."""
+    t = serie.astype(str).str.replace(r"[^\d,.\-]", "", regex=True)
+    coma_decimal = t.str.contains(r",\d{1,2}$", regex=True) & ~t.str.contains(r"\.\d{1,2}$", regex=True)
+    t = t.where(~coma_decimal, t.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    t = t.where(coma_decimal, t.str.replace(",", "", regex=False))
+    return pd.to_numeric(t, errors="coerce")
+
+
+def _a_fecha(serie):
+    """Fechas ISO o dd/mm/aaaa (formato de los bancos en México)."""
+    dt = pd.to_datetime(serie, errors="coerce", format="ISO8601")
+    if dt.isna().mean() > 0.5:
+        dt = pd.to_datetime(serie, errors="coerce", dayfirst=True)
+    return dt
+
+
+def _clave_cuenta(serie):
+    """
+    Últimos 4 dígitos de la cuenta como entero (los estados suelen mostrarla
+    enmascarada); -1 si no hay. Se calcula una vez por cuenta distinta.
+    """
+    codigos, distintas = pd.factorize(serie.fillna("").astype(str))
+    digitos = pd.Series(distintas, dtype=object).str.replace(r"\D", "", regex=True).str[-4:]
+    claves = pd.to_numeric(digitos, errors="coerce").fillna(-1).astype("int64").to_numpy()
+    return np.where(codigos >= 0, claves[codigos] if len(claves) else -1, -1)
+
+
+def leer_estado_cuenta(ruta):
+    """
+    Lee un estado de cuenta CSV (separador y codificación detectados) y devuelve solo
+    los depósitos: Fecha, Monto, Cuenta, Concepto y Fila (renglón del CSV).
+    """
+    import csv
+
+    for codificacion in ("utf-8-sig", "latin-1"):
+        try:
+            with open(ruta, encoding=codificacion, newline="") as f:
+                muestra = f.read(8192)
+            break
+        except UnicodeDecodeError:
+            continue
+    try:
+        sep = csv.Sniffer().sniff(muestra, delimiters=",;\t|").delimiter
+    except csv.Error:
+        sep = ","
+    df = pd.read_csv(ruta, sep=sep, dtype=str, encoding=codificacion, skip_blank_lines=True)
+
+    col_fecha = _columna_banco(df.columns, "Fecha")
+    col_abono = _columna_banco(df.columns, "Abono")
+    col_monto = _columna_banco(df.columns, "Monto")
+    if col_fecha is None or (col_abono is None and col_monto is None):
+        raise ValueError(f"No se encontraron columnas de fecha y monto en: {', '.join(map(str, df.columns))}")
+    col_cuenta = _columna_banco(df.columns, "Cuenta")
+    col_concepto = _columna_banco(df.columns, "Concepto")
+
+    monto = _a_monto(df[col_abono] if col_abono is not None else df[col_monto])
+    banco = pd.DataFrame({
+        "Fecha": _a_fecha(df[col_fecha]),
+        "Monto": monto,
+        "Cuenta": df[col_cuenta].fillna("").astype(str) if col_cuenta is not None else "",
+        "Concepto": df[col_concepto].fillna("").astype(str) if col_concepto is not None else "",
+        "Fila": np.arange(len(df)) + 2,  # renglón 1 = encabezados
+    })
+    return banco[banco["Fecha"].notna() & (banco["Monto"] > 0)].reset_index(drop=True)
+
+
+def _emparejar(izq, der, por, tolerancia):
+    """
+    Parejas 1 a 1 entre filas de izq y der con la misma clave `por` y fechas a menos
+    de `tolerancia`. Sort-merge: ambos lados ordenados por (clave, fecha) y un solo
+    recorrido con dos punteros; cada fila de der toma la fila libre más vieja de izq
+    dentro de su ventana, lo que da el máximo de parejas.
+    Devuelve DataFrame _i (índice izq), _j (índice der).
+    """
+    grupo = pd.concat([izq[por], der[por]], ignore_index=True).groupby(por, sort=False).ngroup().to_numpy()
+    lados = []
+    for df, g in ((izq, grupo[:len(izq)]), (der, grupo[len(izq):])):
+        t = df["_dt"].to_numpy(dtype="datetime64[ns]").astype("int64")
+        orden = np.lexsort((t, g))
+        lados.append((g[orden].tolist(), t[orden].tolist(), df.index.to_numpy()[orden].tolist()))
+    (gi, ti, ii), (gd, td, jd) = lados
+
+    tol = int(tolerancia.value)
+    pares_i, pares_j = [], []
+    i, n = 0, len(gi)
+    for g, b, j in zip(gd, td, jd):
+        while i < n and (gi[i] < g or (gi[i] == g and ti[i] < b - tol)):
+            i += 1  # ya no le alcanza a ningún movimiento posterior
+        if i < n and gi[i] == g and ti[i] <= b + tol:
+            pares_i.append(ii[i])
+            pares_j.append(j)
+            i += 1
+    return pd.DataFrame({"_i": pd.Series(pares_i, dtype="int64"), "_j": pd.Series(pares_j, dtype="int64")})
+
+
+def conciliar_transferencias(df_tra, banco, tolerancia_dias=CONCILIACION_TOLERANCIA_DIAS):
+    """
+    Cruza Transferencias contra los depósitos del banco (sort-merge por monto en
+    centavos + cuenta, y fecha dentro de la tolerancia) sin recorridos anidados.
+
+    Estados:
+      Conciliado               venta con su depósito (mismo monto, cuenta compatible)
+      Duplicado                venta repetida (misma persona, monto, cuenta y día que una conciliada)
+                               o depósito repetido (estados de cuenta que se traslapan)
+      Parcial                  venta y depósito de la misma cuenta y fechas, con otro monto
+      Sin movimiento bancario  venta sin depósito
+      Movimiento sin venta     depósito sin venta
+      Fecha inválida           venta con Fecha que no se pudo leer
+
+    Devuelve un DataFrame con una fila por transferencia y por depósito sin pareja.
+    """
+    tol = pd.Timedelta(days=tolerancia_dias)
+    df_tra = df_tra.reset_index(drop=True)
+    banco = banco.reset_index(drop=True)
+    tra = pd.DataFrame({
+        "_dt": _a_fecha(df_tra["Fecha"]),
+        "_cent": (pd.to_numeric(df_tra["Total"], errors="coerce").fillna(0.0) * 100).round().astype("int64"),
+        "_cta": _clave_cuenta(df_tra["Cuenta"]),
+    })
+    tra = tra[tra["_dt"].notna()]
+    ban = pd.DataFrame({
+        "_dt": banco["Fecha"],
+        "_cent": (banco["Monto"] * 100).round().astype("int64"),
+        "_cta": _clave_cuenta(banco["Cuenta"]),
+    })
+
+    # 1) monto + cuenta; 2) monto cuando una de las dos partes no trae cuenta
+    parejas = [_emparejar(tra[tra["_cta"] >= 0], ban[ban["_cta"] >= 0], ["_cent", "_cta"], tol)]
+    libres_t = tra.drop(parejas[0]["_i"])
+    libres_b = ban.drop(parejas[0]["_j"])
+    parejas.append(_emparejar(libres_t[libres_t["_cta"] < 0], libres_b, ["_cent"], tol))
+    libres_b = libres_b.drop(parejas[-1]["_j"])
+    libres_t = libres_t.drop(parejas[-1]["_i"])
+    parejas.append(_emparejar(libres_t[libres_t["_cta"] >= 0], libres_b[libres_b["_cta"] < 0], ["_cent"], tol))
+    exactas = pd.concat(parejas, ignore_index=True)
+    libres_t = tra.drop(exactas["_i"])
+    libres_b = ban.drop(exactas["_j"])
+
+    # duplicados: sin pareja pero idénticos (día, monto, cuenta[, persona]) a uno conciliado
+    t_dia = pd.MultiIndex.from_arrays([
+        df_tra.loc[tra.index, "Persona"].fillna("").astype(str), tra["_dt"].dt.floor("D"), tra["_cent"], tra["_cta"],
+    ])
+    pos = tra.index.get_indexer
+    dup_t = libres_t.index[t_dia[pos(libres_t.index)].isin(t_dia[pos(exactas["_i"])])]
+    b_dia = pd.MultiIndex.from_arrays([ban["_dt"].dt.floor("D"), ban["_cent"], ban["_cta"], banco["Concepto"].astype(str)])
+    dup_b = libres_b.index[b_dia[libres_b.index].isin(b_dia[exactas["_j"]])]
+    libres_t = libres_t.drop(dup_t)
+    libres_b = libres_b.drop(dup_b)
+
+    # parciales: misma cuenta y fechas cercanas, distinto monto
+    parciales = _emparejar(libres_t[libres_t["_cta"] >= 0], libres_b[libres_b["_cta"] >= 0], ["_cta"], tol)
+
+    estado_t = pd.Series("Sin movimiento bancario", index=df_tra.index, dtype=object)
+    pareja_t = pd.Series(-1, index=df_tra.index)
+    estado_t[exactas["_i"]] = "Conciliado"
+    estado_t[parciales["_i"]] = "Parcial"
+    estado_t[dup_t] = "Duplicado"
+    estado_t[df_tra.index.difference(tra.index)] = "Fecha inválida"
+    pareja_t[exactas["_i"]] = exactas["_j"].to_numpy()
+    pareja_t[parciales["_i"]] = parciales["_j"].to_numpy()
+
+    j = pareja_t.to_numpy()
+    tiene = j >= 0
+    monto_t = pd.to_numeric(df_tra["Total"], errors="coerce").fillna(0.0).to_numpy()
+    fecha_b = np.full(len(j), "", dtype=object)
+    monto_b = np.full(len(j), np.nan)
+    fecha_banco = banco["Fecha"].dt.strftime("%Y-%m-%d").to_numpy()
+    fecha_b[tiene] = fecha_banco[j[tiene]]
+    monto_b[tiene] = banco["Monto"].to_numpy()[j[tiene]]
+    res_t = pd.DataFrame({
+        "Origen": SHEET_TRA,
+        "Fila": df_tra.index.to_numpy() + 2,
+        "Fecha": df_tra["Fecha"].astype(str).str[:10].to_numpy(),
+        "Persona": df_tra["Persona"].fillna("").astype(str).to_numpy(),
+        "Cuenta": df_tra["Cuenta"].fillna("").astype(str).to_numpy(),
+        "Monto": monto_t,
+        "FechaBanco": fecha_b,
+        "MontoBanco": monto_b,
+        "Diferencia": np.round(monto_b - monto_t, 2),
+        "Estado": estado_t.to_numpy(),
+    })
+
+    sobran = ban.index.difference(exactas["_j"]).difference(parciales["_j"])
+    estado_b = pd.Series("Movimiento sin venta", index=sobran, dtype=object)
+    estado_b[dup_b] = "Duplicado"
+    res_b = pd.DataFrame({
+        "Origen": "Banco",
+        "Fila": banco.loc[sobran, "Fila"].to_numpy(),
+        "Fecha": "",
+        "Persona": banco.loc[sobran, "Concepto"].to_numpy(),
+        "Cuenta": banco.loc[sobran, "Cuenta"].to_numpy(),
+        "Monto": np.nan,
+        "FechaBanco": fecha_banco[sobran],
+        "MontoBanco": banco.loc[sobran, "Monto"].to_numpy(),
+        "Diferencia": np.nan,
+        "Estado": estado_b.to_numpy(),
+    })
+    return pd.concat([res_t, res_b], ignore_index=True)
+
+
 # -------------------- App --------------------
 class DeliciasApp:
-    def __init__(self, root):
+    def __init__(self, root, leidas=None):
+        """leidas: lo que ya devolvió leer_hojas_chicas (main la corre en otro hilo); si no, se lee aquí."""
         self.root = root
-        root.title("Delicias de la Wera")
-        root.geometry("1050x720")
         root.configure(bg="#faf7ff")
 
         asegurarmisarchivos()
-        self.load_dataframes()
+        self._ven_pendientes = []
+        self._idx_codigo = None
+        self._lock_guardado = threading.Lock()  # una sola escritura del Excel a la vez
+        self._seq_guardado = 0
+        self._seq_escrito = 0
+        self._guardado_pendiente = None
+        self._refresco_pendiente = None
+        self._error_ventas = None  # texto del error si Ventas no se pudo leer (no se guarda)
+        self._guardado_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="guardado")
+        # Ventas se lee en otro hilo (ver _leer_ventas_en_segundo_plano)
+        self._carga_ventas = None  # future de la lectura en curso
+        self._ventas_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ventas")
+        self._revision_pendiente = True  # la revisión de datos del arranque corre cuando Ventas ya está
+        root.protocol("WM_DELETE_WINDOW", self._al_cerrar)
+        self.velocidad = MotorVelocidad()
+        self.lotes = LotesFIFO()
+        self.antiguedad = AntiguedadDeudas()
+        self.cubo = CuboVentas()
+        self.personas = IndicePersonas()
+        self.cache = CacheResultados()
+        # versión por hoja: sube con cada cambio (nunca baja), es parte de las claves de caché
+        self.versiones = dict.fromkeys(HOJAS, 0)
+        # como las versiones, pero no sube con cada venta: la tabla de velocidades
+        # en caché se corrige en sitio al vender (ver _clave_velocidad)
+        self.version_catalogo = 0
+        self.load_dataframes(leidas)
 
         # Top bar
         top = ttk.Frame(root, padding=8)
@@ -189,6 +2476,12 @@ class DeliciasApp:
         ttk.Button(top, text="Refrescar", command=self.reload).pack(side="left", padx=6)
         ttk.Button(top, text="Exportar / Guardar", command=self.exportar).pack(side="right", padx=6)
         ttk.Button(top, text="Respaldar", command=self.ui_backup).pack(side="right", padx=6)
+        ttk.Button(top, text="Auditar", command=self.ui_auditoria).pack(side="right", padx=6)
+        ttk.Button(top, text="Revisar datos", command=self.ui_revision_datos).pack(side="right", padx=6)
+        ttk.Button(top, text="Costos FIFO", command=self.ui_recosteo_fifo).pack(side="right", padx=6)
+        ttk.Button(top, text="Diagnóstico", command=self.ui_diagnostico).pack(side="right", padx=6)
+        ttk.Button(top, text="Consolidar tiendas", command=self.ui_consolidar).pack(side="right", padx=6)
+        ttk.Button(top, text="Conciliar banco", command=self.ui_conciliar_banco).pack(side="right", padx=6)
 
         style = ttk.Style()
         style.theme_use("default")
@@ -203,15 +2496,41 @@ class DeliciasApp:
         self.nb.add(self.tab_inv, text="Inventario")
         self.nb.add(self.tab_rep, text="Reportes / Ganancias")
 
+        # La pestaña de reportes se construye y calcula hasta que se abre por primera vez
+        self._rep_construido = False
+        self._rep_sucio = True
+        self._rep_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reportes")
+        self._rep_tarea = None  # (future, evento de cancelación) del cálculo en curso
+        self.nb.bind("<<NotebookTabChanged>>", self._al_cambiar_pestana)
+
         # ------- TAB Inventario -------
-        cols = ("Código","Nombre","PrecioVenta","Stock","Categoría")
+        # Escáner (venta rápida): el lector teclea el código y Enter; "3*código" = 3 piezas
+        scan_frame = ttk.Frame(self.tab_inv, padding=(10, 8, 10, 0))
+        scan_frame.pack(fill="x")
+        ttk.Label(scan_frame, text="Escáner:").pack(side="left")
+        self.scan_var = tk.StringVar()
+        self.scan_entry = ttk.Entry(scan_frame, textvariable=self.scan_var, width=24)
+        self.scan_entry.pack(side="left", padx=6)
+        self.scan_entry.bind("<Return>", self._escanear)
+        self.scan_entry.bind("<KP_Enter>", self._escanear)
+        self.scan_entry.bind("<Escape>", lambda e: self.cancelar_ticket())
+        root.bind("<F12>", lambda e: self.cobrar_ticket())
+        ttk.Button(scan_frame, text="Cobrar (F12)", command=self.cobrar_ticket).pack(side="left", padx=4)
+        ttk.Button(scan_frame, text="Cancelar (Esc)", command=self.cancelar_ticket).pack(side="left", padx=4)
+        self.ticket = OrderedDict()  # Código -> cantidad
+        self.ticket_var = tk.StringVar(value="Ticket vacío")
+        ttk.Label(scan_frame, textvariable=self.ticket_var, font=("Arial", 10, "bold")).pack(side="left", padx=10)
+
+        cols = ("Código","Nombre","PrecioVenta","Stock","Categoría","Cobertura")
         self.tree = ttk.Treeview(self.tab_inv, columns=cols, show="headings", height=18)
         for c in cols:
             self.tree.heading(c, text=c)
-            self.tree.column(c, anchor="center", width=170)
+            self.tree.column(c, anchor="center", width=150)
+        self.tree.heading("Cobertura", text="Cobertura (días)")
+        self.tree.tag_configure("bajo", background="#ffd6d6")
         self.tree.pack(fill="both", expand=True, padx=10, pady=8)
 
-        self.tree_data = {}
+        self.vista_inv = VistaArbol(self.tree)
         self.tree.bind("<Double-1>", lambda e: self.open_edit_selected())
 
         btn_frame = ttk.Frame(self.tab_inv, padding=8)
@@ -224,26 +2543,73 @@ class DeliciasApp:
         ttk.Button(btn_frame, text="Venta - Transferencia", command=lambda: self.ui_sale("Transferencia")).pack(side="left", padx=4)
         ttk.Button(btn_frame, text="Registrar pago", command=self.ui_register_payment).pack(side="left", padx=4)
         ttk.Button(btn_frame, text="Ver deudores", command=self.ui_view_debtors).pack(side="right", padx=4)
+        ttk.Button(btn_frame, text="Estado de cuenta", command=self.ui_estado_cuenta).pack(side="right", padx=4)
         ttk.Button(btn_frame, text="Ver resumen pagos", command=self.ui_view_resumen_pagos).pack(side="right", padx=4)
-
-        # ------- TAB Reportes / Ganancias -------
-        self.build_report_tab()
+        ttk.Button(btn_frame, text="Sugerido de compra", command=self.ui_sugerido_compra).pack(side="right", padx=4)
+        ttk.Button(btn_frame, text="Precios en bloque", command=self.ui_precios_bloque).pack(side="right", padx=4)
 
         # status
         self.status_var = tk.StringVar()
         ttk.Label(root, textvariable=self.status_var).pack(side="bottom", fill="x")
 
         self.refresh_table()
-        self.refresh_reports()
+        self.scan_entry.focus_set()
+
+        # medir tiempo hasta que la ventana responde (primer ciclo ocioso del mainloop)
+        self.root.after(0, lambda: self.root.after_idle(self._marcar_listo))
+
+    def _marcar_listo(self):
+        ms = (time.perf_counter() - _T_ARRANQUE) * 1000
+        self.tiempo_arranque_ms = ms
+        self.update_status(f"{self.status_var.get()} | Listo en {ms:.0f} ms")
+
+    def _revisar_al_arrancar(self):
+        """Revisión de datos en otro hilo; el resultado va a la barra de estado."""
+        t0 = time.perf_counter()
+        args = self._args_revision(copiar=True)  # la app sigue editando mientras el hilo revisa
+        pool = ThreadPoolExecutor(max_workers=1)
+        fut = pool.submit(revisar_datos, *args)
+        pool.shutdown(wait=False)
+
+        def sondear():
+            if not fut.done():
+                self.root.after(100, sondear)
+                return
+            try:
+                problemas, _ = fut.result()
+            except Exception as e:
+                self.update_status(f"{self.status_var.get()} | Revisión de datos falló: {e}")
+                return
+            ms = (time.perf_counter() - t0) * 1000
+            if problemas.empty:
+                texto = f"Datos revisados: sin problemas ({ms:.0f} ms)"
+            else:
+                texto = f"Revisión de datos: {len(problemas)} problema(s) ({ms:.0f} ms) - ver 'Revisar datos'"
+            self.update_status(f"{self.status_var.get()} | {texto}")
+
+        self.root.after(100, sondear)
 
     # ---------------- Data load/save ----------------
-    def load_dataframes(self):
-        self.df_inv = cargar_hoja(SHEET_INV)
-        self.df_ven = cargar_hoja(SHEET_VEN)
-        self.df_deu = cargar_hoja(SHEET_DEU)
-        self.df_tra = cargar_hoja(SHEET_TRA)
-        self.df_res = cargar_hoja(SHEET_RES)
-        self.df_gan = cargar_hoja(SHEET_GAN)
+    def load_dataframes(self, leidas=None):
+        self._idx_codigo = None
+        self.velocidad.invalidar()
+        self.personas.invalidar()
+        self.antiguedad.invalidar()
+        self.cubo.invalidar()
+        self.marcar_cambio(*self.versiones)
+
+        # invalidos_carga: celdas con números ilegibles (quedan en 0); la revisión de datos las reporta
+        hojas, self.invalidos_carga = leidas or leer_hojas_chicas()
+        self._invalidos_seq = self._seq_guardado
+        self.df_inv = hojas[SHEET_INV]
+        self.df_deu = hojas[SHEET_DEU]
+        self.df_tra = hojas[SHEET_TRA]
+        self.df_res = hojas[SHEET_RES]
+        self.df_gan = hojas[SHEET_GAN]
+
+        # Lotes de costo; el inventario anterior a los lotes entra como lote de apertura
+        self.lotes.cargar(hojas[SHEET_LOT])
+        self.lotes.abrir_inventario(self.df_inv)
 
         # Deudas: recalcular total/estado si aplica
         if "TotalDeuda" not in self.df_deu.columns:
@@ -259,44 +2625,255 @@ class DeliciasApp:
             lambda x: "AL DÍA" if x == 0 else f"A FAVOR ${-x:.2f}" if x < 0 else f"ADEUDA ${x:.2f}"
         )
 
-        # recalcula mensual
-        self.recalcular_ganancias_mensuales()
+        # Ganancias mensual no se recalcula aquí: solo se usa al guardar y
+        # cada guardado ya llama a recalcular_ganancias_mensuales() antes
+        # (que usa los agregados mensuales de la lectura por bloques).
+
+        # Ventas (la hoja grande) va aparte: la vista de Inventario no la espera
+        self._leer_ventas_en_segundo_plano()
+
+    def _leer_ventas_en_segundo_plano(self):
+        """
+        Lanza la lectura de Ventas (y las velocidades de venta) en otro hilo. Mientras
+        tanto Inventario ya se puede usar; cobertura y reportes se llenan al terminar.
+        Lo que necesita Ventas antes (una venta, un guardado, una consulta) la espera
+        con _esperar_ventas.
+        """
+        self.df_ven, self.agregados_ven = _df_vacio_por_hoja(SHEET_VEN), None
+        self._t_ventas = time.perf_counter()
+        fut = self._ventas_pool.submit(leer_ventas_y_velocidad, DATA_FILE)
+        self._carga_ventas = fut
+        self.root.after(100, self._sondear_ventas, fut)
+
+    def _sondear_ventas(self, fut):
+        if fut is not self._carga_ventas:
+            return  # ya se instaló (alguien la esperó) o la reemplazó otra lectura
+        if not fut.done():
+            self.root.after(100, self._sondear_ventas, fut)
+            return
+        self._esperar_ventas()
+
+    def _esperar_ventas(self):
+        """Deja Ventas en memoria; si la lectura en otro hilo no ha terminado, la espera."""
+        fut = self._carga_ventas
+        if fut is None:
+            return
+        if not fut.done():
+            self.update_status("Leyendo Ventas... espere")
+            self.root.update_idletasks()
+        self._carga_ventas = None
+        try:
+            df_ven, self.agregados_ven, self.velocidad = fut.result()
+            self.df_ven = df_ven
+            self.invalidos_carga[SHEET_VEN] = self.agregados_ven["invalidos"]
+            self._error_ventas = None
+        except Exception as e:
+            # Ventas vacía solo para que la pantalla funcione; persistir() no guarda
+            # mientras tanto (se perderían todas las ventas del archivo)
+            self.df_ven, self.agregados_ven = _df_vacio_por_hoja(SHEET_VEN), None
+            self._error_ventas = str(e)
+        # los índices sobre Ventas se vuelven a armar (a la primera consulta) con la leída
+        self.personas.invalidar()
+        self.antiguedad.invalidar()
+        self.cubo.invalidar()
+        self.marcar_cambio(SHEET_VEN)
+        # avisos y refrescos fuera de quien pidió Ventas (puede estar a media consulta)
+        self.root.after_idle(self._ventas_listas)
+
+    def _ventas_listas(self):
+        """Tras leer Ventas: cobertura en la tabla, reportes y (al arrancar) la revisión de datos."""
+        if self._error_ventas is not None:
+            messagebox.showerror(
+                "Error al leer Ventas",
+                f"No se pudo leer la hoja Ventas:\n{self._error_ventas}\n\n"
+                "No se guardará ningún cambio hasta que se corrija el archivo y se recargue.",
+            )
+        ms = (time.perf_counter() - self._t_ventas) * 1000
+        self.refresh_table()
+        self.invalidar_reportes()
+        self.update_status(f"{self.status_var.get()} | Ventas leída en {ms:.0f} ms")
+        if self._revision_pendiente:
+            self._revision_pendiente = False
+            self._revisar_al_arrancar()
+
+    def reload(self):
+        self._vaciar_guardado()
+        self.load_dataframes()
+        self.refresh_table()
+        self.invalidar_reportes()
+        self.update_status("Datos recargados")
+
+    def _instantanea(self):
+        """
+        Copia de lo que se va a guardar. Todas las hojas se copian salvo Ventas,
+        que nunca se escribe en sitio (ver refresh_reports) y es la grande: va como
+        (hoja, filas nuevas) y se junta al escribir, fuera del hilo de la pantalla.
+        La tabla de lotes se arma nueva en cada cambio.
+        """
+        self.recalcular_ganancias_mensuales()
+        self._seq_guardado += 1
+        return self._seq_guardado, (self.df_inv.copy(), self._partes_ventas(), self.df_deu.copy(),
+                                    self.df_tra.copy(), self.df_res.copy(), self.df_gan.copy(), self.lotes.tabla())
+
+    def _escribir(self, instantanea):
+        """Escribe una instantánea; si ya se escribió una más nueva, no hace nada."""
+        seq, (df_inv, partes_ven, *resto) = instantanea
+        with self._lock_guardado:
+            if seq <= self._seq_escrito:
+                return
+            guardar_todo(df_inv, juntar_ventas(*partes_ven), *resto)
+            self._seq_escrito = seq
+
+    def persistir(self, diferido=False):
+        """
+        Recalcula Ganancias y guarda todas las hojas.
+        diferido=True: agrupa los cambios de los próximos RETARDO_GUARDADO_MS y
+        escribe en segundo plano (la pantalla no espera al Excel).
+        Si Ventas no se pudo leer, no guarda nada.
+        """
+        self._esperar_ventas()  # sin Ventas completa no se puede escribir el libro
+        if self._error_ventas is not None:
+            self.update_status(f"NO GUARDADO: la hoja Ventas no se pudo leer ({self._error_ventas})")
+            return
+        if diferido:
+            if self._guardado_pendiente is None:
+                self._guardado_pendiente = self.root.after(RETARDO_GUARDADO_MS, self._guardar_en_segundo_plano)
+            return
+        if self._guardado_pendiente is not None:
+            self.root.after_cancel(self._guardado_pendiente)
+            self._guardado_pendiente = None
+        self._escribir(self._instantanea())
+
+    def _vaciar_guardado(self):
+        """
+        Escribe ya el guardado diferido pendiente y espera las escrituras en
+        segundo plano, para leer o copiar el Excel sin perder los últimos cambios.
+        """
+        if self._guardado_pendiente is not None:
+            self.persistir()
+        # el pool tiene un solo hilo: cuando corre esta tarea, las anteriores ya terminaron
+        self._guardado_pool.submit(lambda: None).result()
+
+    def _guardar_en_segundo_plano(self):
+        self._guardado_pendiente = None
+        fut = self._guardado_pool.submit(self._escribir, self._instantanea())
+
+        def sondear():
+            if not fut.done():
+                self.root.after(100, sondear)
+            elif fut.exception() is not None:
+                self.update_status(f"Error al guardar: {fut.exception()}")
+
+        self.root.after(100, sondear)
+
+    def _al_cerrar(self):
+        if self._guardado_pendiente is not None:
+            self.persistir()
+        self._guardado_pool.shutdown(wait=True)
+        # reportes: el cálculo en curso se cancela, no hace falta esperarlo
+        if self._rep_tarea is not None:
+            self._rep_tarea[1].set()
+        self._rep_pool.shutdown(wait=False, cancel_futures=True)
+        self._ventas_pool.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
+
+    def _programar_refresco(self):
+        """Refresco completo (orden, cobertura, reportes) agrupado y fuera del camino rápido."""
+        if self._refresco_pendiente is None:
+            self._refresco_pendiente = self.root.after(RETARDO_REFRESCO_MS, self._refresco_diferido)
+
+    def _refresco_diferido(self):
+        self._refresco_pendiente = None
+        self.refrescar_vistas()
+
+    def marcar_cambio(self, *hojas, venta=False):
+        """
+        Sube la versión de las hojas modificadas (invalida sus resultados en caché).
+        venta=True: el cambio es una venta o pago registrado; no cambia el catálogo.
+        """
+        for h in hojas:
+            self.versiones[h] += 1
+        if not venta and (SHEET_INV in hojas or SHEET_VEN in hojas):
+            self.version_catalogo += 1
 
-    def reload(self):
-        self.load_dataframes()
+    def _clave_velocidad(self):
+        return ("velocidad", self.version_catalogo, date.today())
+
+    def refrescar_vistas(self):
+        """Tras guardar cambios hechos en memoria: no hace falta releer el Excel."""
         self.refresh_table()
-        self.refresh_reports()
-        self.update_status("Datos recargados")
+        self.invalidar_reportes()
 
     def update_status(self, text):
         self.status_var.set(text)
 
     # ---------------- Inventario table ----------------
+    def _mascara_busqueda(self, df, q=None):
+        """Filas que coinciden con la búsqueda q (por omisión la actual) por código o nombre."""
+        q = (self.search_var.get() if q is None else q).strip().lower()
+        if not q:
+            return pd.Series(True, index=df.index)
+        return (df["Código"].astype(str).str.lower().str.contains(q, regex=False) |
+                df["Nombre"].astype(str).str.lower().str.contains(q, regex=False))
+
     def refresh_table(self):
-        q = self.search_var.get().strip().lower()
-        df = self.df_inv.copy()
-        if q:
-            df = df[
-                df["Código"].astype(str).str.lower().str.contains(q) |
-                df["Nombre"].astype(str).str.lower().str.contains(q)
-            ]
-        df = df.sort_values(by="Stock")
-
-        for r in self.tree.get_children():
-            self.tree.delete(r)
-        self.tree_data.clear()
-
-        for _, row in df.iterrows():
-            pv = float(row.get("PrecioVenta", 0.0))
-            st = int(row.get("Stock", 0))
-            cat = row.get("Categoría", "")
-            code = str(row["Código"])
-            item_id = self.tree.insert("", "end", values=(code, row["Nombre"], f"{pv:.2f}", st, cat))
-            self.tree_data[item_id] = str(row["Código"])
-
-        self.update_status(f"{len(df)} producto(s) mostrados")
+        df = self.df_inv[self._mascara_busqueda(self.df_inv)]
+        df = df.sort_values(by="Stock", kind="stable")  # estable: menos movimientos entre refrescos
+
+        # cobertura/reorden: solo cuando Ventas ya se leyó (el motor se arma en ese hilo);
+        # la tabla se guarda por versión del catálogo (una venta la corrige en sitio, no la rearma)
+        vt = None
+        if self._carga_ventas is None:
+            # con el motor armado no hace falta Ventas (y no se junta en el hilo de la pantalla)
+            vt = self.cache.obtener(self._clave_velocidad(), lambda: self.velocidad.tabla(
+                self.df_inv, None if self.velocidad.listo else self.df_ven)).loc[df.index]
+
+        codes = df["Código"].astype(str).tolist()
+        nombres = df["Nombre"].fillna("").astype(str).tolist()
+        pvs = pd.to_numeric(df["PrecioVenta"], errors="coerce").fillna(0.0).tolist()
+        stocks = pd.to_numeric(df["Stock"], errors="coerce").fillna(0).astype(int).tolist()
+        cats = df["Categoría"].fillna("").astype(str).tolist()
+        if vt is not None:
+            cobs = ["-" if dc == float("inf") else f"{dc:.1f}" for dc in vt["DiasCobertura"].tolist()]
+            bajos = vt["BajoStock"].tolist()
+        else:
+            cobs = [""] * len(codes)
+            bajos = [False] * len(codes)
+
+        filas, vistos = [], {}
+        for code, nombre, pv, st, cat, cob, bajo in zip(codes, nombres, pvs, stocks, cats, cobs, bajos):
+            n = vistos[code] = vistos.get(code, 0) + 1
+            clave = code if n == 1 else (code, n)  # Código repetido: clave aparte
+            filas.append((clave, (code, nombre, f"{pv:.2f}", st, cat, cob), ("bajo",) if bajo else ()))
+        self.vista_inv.aplicar(filas)
+
+        msg = f"{len(df)} producto(s) mostrados"
+        if vt is not None:
+            n_bajo = int(vt["BajoStock"].sum())
+            if n_bajo:
+                msg += f" | {n_bajo} en punto de reorden"
+        self.update_status(msg)
 
     # ---------------- Reportes tab ----------------
+    def _pestana_reportes_visible(self):
+        return self.nb.select() == str(self.tab_rep)
+
+    def _al_cambiar_pestana(self, event=None):
+        """Construye/calcula reportes solo al abrir la pestaña (y si hubo cambios)."""
+        if not self._pestana_reportes_visible():
+            return
+        if not self._rep_construido:
+            self.build_report_tab()
+            self._rep_construido = True
+        if self._rep_sucio:
+            self.refresh_reports()
+
+    def invalidar_reportes(self):
+        """Marca los reportes como desactualizados; recalcula ya solo si se están viendo."""
+        self._rep_sucio = True
+        if self._rep_construido and self._pestana_reportes_visible():
+            self.refresh_reports()
+
     def build_report_tab(self):
         top = ttk.Frame(self.tab_rep, padding=8)
         top.pack(fill="x")
@@ -309,6 +2886,12 @@ class DeliciasApp:
         ttk.Button(top, text="Todo", command=lambda: self.set_report_filter("Todo")).pack(side="left", padx=4)
 
         ttk.Button(top, text="Refrescar reportes", command=self.refresh_reports).pack(side="right", padx=4)
+        ttk.Button(top, text="Análisis (cubo)", command=self.ui_analisis_ventas).pack(side="right", padx=4)
+
+        self.rep_estado_var = tk.StringVar()
+        ttk.Label(top, textvariable=self.rep_estado_var).pack(side="right", padx=4)
+        self.rep_progress = ttk.Progressbar(top, mode="indeterminate", length=120)
+        self.rep_progress.pack(side="right", padx=4)
 
         # KPIs (3 líneas: hoy / semana / mes)
         kpi = ttk.Frame(self.tab_rep, padding=8)
@@ -336,6 +2919,7 @@ class DeliciasApp:
             self.rep_tree.heading(c, text=c)
             self.rep_tree.column(c, anchor="center", width=160)
         self.rep_tree.pack(fill="both", expand=True)
+        self.vista_rep = VistaArbol(self.rep_tree)
 
         footer = ttk.Frame(self.tab_rep, padding=8)
         footer.pack(fill="x")
@@ -344,102 +2928,216 @@ class DeliciasApp:
             text="Tip: Ganancia = (PrecioVenta - PrecioCompra) * Cantidad. Pagos no cuentan como ventas."
         ).pack(side="left")
 
-    def set_report_filter(self, value):
-        self.rep_filter_var.set(value)
-        self.refresh_reports()
-
-    def _ventas_filtradas_para_reportes(self):
-        df = self.df_ven.copy()
-        df = df[df["Tipo"].astype(str) != "Pago"].copy()
+    # ---------------- Análisis (cubo de ventas) ----------------
+    def ui_analisis_ventas(self):
+        if not self.cubo.listo:
+            t0 = time.perf_counter()
+            self.cubo.reconstruir(self.df_ven, self.df_inv)
+            self.update_status(f"Cubo de ventas: {self.cubo.celdas()} celdas en {time.perf_counter() - t0:.1f} s")
 
-        # Fix definitivo: datetime real
-        df["_dt"] = pd.to_datetime(df["Fecha"], errors="coerce")
-        df = df[df["_dt"].notna()].copy()
+        win = tk.Toplevel(self.root)
+        win.title("Análisis de ventas - Delicias de la Wera")
+        win.geometry("860x500")
 
-        filtro = self.rep_filter_var.get()
-        hoy = date.today()
+        nombres = {"Dia": "Día", "Hora": "Hora", "Categoría": "Categoría", "Tipo": "Tipo", "Código": "Producto"}
+        por_nombre = {v: k for k, v in nombres.items()}
+        periodos = ("Hoy", "Esta semana", "Este mes", "Este año", "Todo")
 
-        if filtro == "Hoy":
-            df = df[df["_dt"].dt.date == hoy]
-        elif filtro == "Este mes":
-            df = df[(df["_dt"].dt.year == hoy.year) & (df["_dt"].dt.month == hoy.month)]
-        elif filtro == "Todo":
-            pass
+        top = ttk.Frame(win, padding=8)
+        top.pack(fill="x")
+        ttk.Label(top, text="Período:").pack(side="left")
+        periodo_var = tk.StringVar(value="Este mes")
+        cb_per = ttk.Combobox(top, textvariable=periodo_var, values=periodos, state="readonly", width=12)
+        cb_per.pack(side="left", padx=6)
+        ttk.Label(top, text="Agrupar por:").pack(side="left")
+        por_var = tk.StringVar(value="Categoría")
+        cb_por = ttk.Combobox(top, textvariable=por_var, values=list(nombres.values()), state="readonly", width=12)
+        cb_por.pack(side="left", padx=6)
+        ruta_var = tk.StringVar()
+        ttk.Label(win, textvariable=ruta_var, font=("Arial", 10, "bold")).pack(anchor="w", padx=8)
+
+        cols = ("Grupo", "Cantidad", "Total", "Ganancia", "Movimientos")
+        tree = ttk.Treeview(win, columns=cols, show="headings", height=16)
+        for c in cols:
+            tree.heading(c, text=c)
+            tree.column(c, anchor="center", width=150)
+        tree.column("Grupo", width=240)
+        tree.pack(fill="both", expand=True, padx=8, pady=6)
+        info_var = tk.StringVar()
+        ttk.Label(win, textvariable=info_var).pack(anchor="w", padx=8, pady=4)
+
+        filtros = []  # [(dimensión, valor)] en el orden en que se bajó
+        valores_fila = {}
+
+        def rango():
+            hoy = date.today()
+            p = periodo_var.get()
+            if p == "Hoy":
+                return hoy, hoy
+            if p == "Esta semana":
+                return date.fromordinal(hoy.toordinal() - hoy.weekday()), hoy
+            if p == "Este mes":
+                return hoy.replace(day=1), hoy
+            if p == "Este año":
+                return hoy.replace(month=1, day=1), hoy
+            return None, None
+
+        def etiqueta(dim, v):
+            if dim == "Dia":
+                return date.fromordinal(_EPOCA.toordinal() + int(v)).isoformat()
+            if dim == "Hora":
+                return f"{int(v):02d}:00"
+            return str(v)
+
+        def consultar(event=None):
+            dim = por_nombre[por_var.get()]
+            desde, hasta = rango()
+            t0 = time.perf_counter()
+            res = self.cubo.consultar([dim], desde, hasta, **dict(filtros))
+            ms = (time.perf_counter() - t0) * 1000
+            if dim not in ("Dia", "Hora"):
+                res = res.sort_values("Total", ascending=False)
+
+            tree.delete(*tree.get_children())
+            valores_fila.clear()
+            for r in res.itertuples(index=False):
+                v = r[0]
+                iid = tree.insert("", "end", values=(
+                    etiqueta(dim, v), int(r.Cantidad), f"{r.Total:.2f}", f"{r.Ganancia:.2f}", int(r.Movimientos),
+                ))
+                valores_fila[iid] = v
+            ruta = " > ".join(f"{nombres[d]}: {etiqueta(d, v)}" for d, v in filtros) or "Todo"
+            ruta_var.set(f"{periodo_var.get()} | {ruta}")
+            info_var.set(f"{len(res)} grupo(s) | total ${res['Total'].sum():,.2f} | "
+                         f"consulta {ms:.1f} ms sobre {self.cubo.celdas()} celdas (doble clic = detalle)")
+
+        def bajar(event=None):
+            sel = tree.selection()
+            if not sel:
+                return
+            dim = por_nombre[por_var.get()]
+            nueva = _dimension_para_bajar(dim, {d for d, _ in filtros} | {dim})
+            if nueva is None:
+                info_var.set("Ya se filtró por todas las dimensiones: no hay más detalle")
+                return
+            filtros.append((dim, valores_fila[sel[0]]))
+            por_var.set(nombres[nueva])
+            consultar()
+
+        def subir():
+            if filtros:
+                dim, _ = filtros.pop()
+                por_var.set(nombres[dim])
+                consultar()
+
+        ttk.Button(top, text="Subir nivel", command=subir).pack(side="left", padx=6)
+        ttk.Button(top, text="Quitar filtros", command=lambda: (filtros.clear(), consultar())).pack(side="left")
+        cb_per.bind("<<ComboboxSelected>>", consultar)
+        cb_por.bind("<<ComboboxSelected>>", consultar)
+        tree.bind("<Double-1>", bajar)
+        consultar()
 
-        return df
+    def set_report_filter(self, value):
+        self.rep_filter_var.set(value)
+        self.refresh_reports()
 
     def refresh_reports(self):
-        hoy = date.today()
-
-        df = self.df_ven.copy()
-        df = df[df["Tipo"].astype(str) != "Pago"].copy()
-
-        # Fix definitivo: datetime real
-        df["_dt"] = pd.to_datetime(df["Fecha"], errors="coerce")
-        df = df[df["_dt"].notna()].copy()
-
-        # HOY
-        df_hoy = df[df["_dt"].dt.date == hoy].copy()
-
-        # SEMANA (lunes a hoy)
-        start_week = hoy.fromordinal(hoy.toordinal() - hoy.weekday())  # lunes
-        df_sem = df[(df["_dt"].dt.date >= start_week) & (df["_dt"].dt.date <= hoy)].copy()
+        """
+        Lanza el cálculo de reportes en segundo plano. Si había uno en curso
+        (p. ej. clic rápido en Hoy / Este mes / Todo) se cancela; solo el último
+        resultado llega a la pantalla.
+        """
+        if self._rep_tarea is not None:
+            fut, cancelar = self._rep_tarea
+            cancelar.set()
+            fut.cancel()
+            self._rep_tarea = None
+            self.rep_progress.stop()
+            self.rep_estado_var.set("")
+
+        if self._carga_ventas is not None:
+            # se calcula al terminar de leer Ventas (_ventas_listas)
+            self._rep_sucio = True
+            self.rep_estado_var.set("Leyendo Ventas...")
+            return
 
-        # MES
-        df_mes = df[(df["_dt"].dt.year == hoy.year) & (df["_dt"].dt.month == hoy.month)].copy()
+        hoy = date.today()
+        filtro = self.rep_filter_var.get()
+        clave = ("reportes", filtro, hoy, self.versiones[SHEET_VEN])
+        self._rep_sucio = False
+        encontrado, res = self.cache.buscar(clave)
+        if encontrado:
+            self._mostrar_reportes(res)
+            return
 
-        # Totales
-        ven_hoy = float(df_hoy["Total"].sum()) if not df_hoy.empty else 0.0
-        gan_hoy = float(df_hoy["Ganancia"].sum()) if not df_hoy.empty else 0.0
-        uni_hoy = int(df_hoy["Cantidad"].sum()) if not df_hoy.empty else 0
+        cancelar = threading.Event()
+        # df_ven nunca se escribe en sitio: las ventas nuevas entran con concat (propiedad
+        # df_ven), el recosteo FIFO arma una copia y el guardado diferido solo lee.
+        # Las correcciones en sitio (revisión de datos) tocan Inventario/Transferencias,
+        # no Ventas. Por eso el hilo puede leer esta referencia sin copiarla; las filas
+        # nuevas se juntan allá (tras cada venta no se copia todo Ventas en la pantalla).
+        base, pendientes = self._partes_ventas()
+        productos = None
+        if filtro == "Todo" and self.agregados_ven is not None:
+            # copia: las ventas nuevas siguen sumando a los agregados mientras el hilo calcula
+            productos = {k: tuple(v) for k, v in self.agregados_ven["producto"].items()}
+        fut = self._rep_pool.submit(
+            lambda: calcular_reportes(juntar_ventas(base, pendientes), filtro, hoy, cancelar.is_set, productos))
+        self._rep_tarea = (fut, cancelar)
+
+        self.rep_estado_var.set("Calculando...")
+        self.rep_progress.start(12)
+        self.root.after(30, self._sondear_reportes, fut, clave)
+
+    def _sondear_reportes(self, fut, clave):
+        if self._rep_tarea is None or self._rep_tarea[0] is not fut:
+            return  # la reemplazó un pedido más nuevo
+        if not fut.done():
+            self.root.after(30, self._sondear_reportes, fut, clave)
+            return
 
-        ven_sem = float(df_sem["Total"].sum()) if not df_sem.empty else 0.0
-        gan_sem = float(df_sem["Ganancia"].sum()) if not df_sem.empty else 0.0
-        uni_sem = int(df_sem["Cantidad"].sum()) if not df_sem.empty else 0
+        self._rep_tarea = None
+        self.rep_progress.stop()
+        self.rep_estado_var.set("")
+        try:
+            res = fut.result()
+        except ReporteCancelado:
+            return
+        except Exception as e:
+            self.rep_estado_var.set(f"Error: {e}")
+            return
+        self.cache.guardar(clave, res)
+        self._mostrar_reportes(res)
 
-        ven_mes = float(df_mes["Total"].sum()) if not df_mes.empty else 0.0
-        gan_mes = float(df_mes["Ganancia"].sum()) if not df_mes.empty else 0.0
-        uni_mes = int(df_mes["Cantidad"].sum()) if not df_mes.empty else 0
+    def _mostrar_reportes(self, res):
+        uni_hoy, ven_hoy, gan_hoy = res["hoy"]
+        uni_sem, ven_sem, gan_sem = res["semana"]
+        uni_mes, ven_mes, gan_mes = res["mes"]
+        start_week = res["inicio_semana"]
 
         self.lbl_hoy.config(text=f"HOY | Unidades: {uni_hoy} | Ventas: ${ven_hoy:.2f} | Ganancia: ${gan_hoy:.2f}")
         self.lbl_sem.config(text=f"SEMANA (desde {start_week.strftime('%d/%m')}) | Unidades: {uni_sem} | Ventas: ${ven_sem:.2f} | Ganancia: ${gan_sem:.2f}")
         self.lbl_mes.config(text=f"MES | Unidades: {uni_mes} | Ventas: ${ven_mes:.2f} | Ganancia: ${gan_mes:.2f}")
 
-        # Tabla por producto según filtro seleccionado
-        df_f = self._ventas_filtradas_para_reportes()
-
-        for r in self.rep_tree.get_children():
-            self.rep_tree.delete(r)
-
-        if df_f.empty:
-            return
-
-        grp = df_f.groupby(["Código", "Nombre"], dropna=False).agg(
-            Cantidad=("Cantidad", "sum"),
-            Ventas=("Total", "sum"),
-            Ganancia=("Ganancia", "sum"),
-        ).reset_index()
-
-        grp = grp.sort_values(by="Ganancia", ascending=False)
-
-        for _, r in grp.iterrows():
-            self.rep_tree.insert("", "end", values=(
-                str(r["Código"]),
-                str(r["Nombre"]),
-                int(r["Cantidad"]),
-                f"{float(r['Ventas']):.2f}",
-                f"{float(r['Ganancia']):.2f}",
-            ))
+        self.vista_rep.aplicar([
+            ((codigo, nombre), (codigo, nombre, cantidad, f"{ventas:.2f}", f"{ganancia:.2f}"), ())
+            for codigo, nombre, cantidad, ventas, ganancia in res["productos"]
+        ])
 
     def recalcular_ganancias_mensuales(self):
         """
         Recalcula hoja Ganancias (mensual) a partir de Ventas.
         Ignora Tipo == Pago.
+        Si hay agregados mensuales (lectura por bloques + ventas nuevas) no recorre Ventas.
         """
+        if self.agregados_ven is not None:
+            self.df_gan = ganancias_desde_agregados(self.agregados_ven)
+            return
+
         df = self.df_ven.copy()
         df = df[df["Tipo"].astype(str) != "Pago"].copy()
 
-        df["_dt"] = pd.to_datetime(df["Fecha"], errors="coerce")
+        df["_dt"] = pd.to_datetime(df["Fecha"], errors="coerce", format="ISO8601")
         df = df[df["_dt"].notna()].copy()
 
         if df.empty:
@@ -495,9 +3193,9 @@ class DeliciasApp:
                 return
 
             self.df_inv = pd.concat([self.df_inv, pd.DataFrame([vals])], ignore_index=True)
+            self.lotes.agregar(vals["Código"], vals["Stock"], vals["PrecioCompra"])
 
-            self.recalcular_ganancias_mensuales()
-            guardar_todo(self.df_inv, self.df_ven, self.df_deu, self.df_tra, self.df_res, self.df_gan)
+            self.persistir()
             self.reload()
             messagebox.showinfo("OK", "Producto agregado")
             win.destroy()
@@ -511,7 +3209,7 @@ class DeliciasApp:
             messagebox.showinfo("Seleccione", "Seleccione un producto de la lista")
             return None
         item_id = sel[0]
-        return self.tree_data.get(item_id)
+        return self.tree.set(item_id, "Código")
 
     def open_edit_selected(self):
         code = self.get_selected_code()
@@ -565,11 +3263,16 @@ class DeliciasApp:
                 return
 
             idx = idxs[0]
+            # cambio de stock a mano: si sube es un lote nuevo al costo capturado, si baja es merma FIFO
+            delta = vals["Stock"] - int(self.df_inv.at[idx, "Stock"])
+            if delta > 0:
+                self.lotes.agregar(code, delta, vals["PrecioCompra"])
+            elif delta < 0:
+                self.lotes.mermar(code, -delta, vals["PrecioCompra"])
             for k in ["Nombre", "PrecioCompra", "PrecioVenta", "Stock", "Categoría"]:
                 self.df_inv.at[idx, k] = vals[k]
 
-            self.recalcular_ganancias_mensuales()
-            guardar_todo(self.df_inv, self.df_ven, self.df_deu, self.df_tra, self.df_res, self.df_gan)
+            self.persistir()
             self.reload()
             messagebox.showinfo("OK", "Producto actualizado")
             win.destroy()
@@ -584,11 +3287,18 @@ class DeliciasApp:
                     messagebox.showerror("Error", "No se pudo encontrar el producto")
                     return
                 idx = idxs[0]
+                costo = simpledialog.askfloat(
+                    "Abastecer", "Precio de compra de este lote:", parent=win, minvalue=0.0,
+                    initialvalue=float(self.df_inv.at[idx, "PrecioCompra"]),
+                )
+                if costo is None:
+                    return
                 current_stock = int(self.df_inv.at[idx, "Stock"])
                 self.df_inv.at[idx, "Stock"] = current_stock + int(add)
+                self.df_inv.at[idx, "PrecioCompra"] = costo  # el costo vigente es el del último lote
+                self.lotes.agregar(code, add, costo)
 
-                self.recalcular_ganancias_mensuales()
-                guardar_todo(self.df_inv, self.df_ven, self.df_deu, self.df_tra, self.df_res, self.df_gan)
+                self.persistir()
                 self.reload()
                 messagebox.showinfo("OK", f"Stock actualizado: {current_stock} + {add} = {current_stock + add}")
             except Exception as e:
@@ -624,8 +3334,8 @@ class DeliciasApp:
         if confirmacion:
             try:
                 self.df_inv = self.df_inv[self.df_inv["Código"].astype(str) != code]
-                self.recalcular_ganancias_mensuales()
-                guardar_todo(self.df_inv, self.df_ven, self.df_deu, self.df_tra, self.df_res, self.df_gan)
+                self.lotes.descartar(code)
+                self.persistir()
                 self.reload()
                 messagebox.showinfo("Producto eliminado", f"El producto '{nombre}' ha sido eliminado correctamente.")
             except Exception as e:
@@ -633,9 +3343,10 @@ class DeliciasApp:
 
     # ---------------- Resumen pagos ----------------
     def actualizar_resumen_pagos(self, persona, monto, tipo_pago):
+        """Suma el movimiento a ResumenPagos; devuelve False si no hay persona (no cambia nada)."""
         persona = persona.strip()
         if not persona:
-            return
+            return False
 
         existe = self.df_res[self.df_res["Persona"] == persona]
         deuda_actual = 0.0
@@ -673,8 +3384,212 @@ class DeliciasApp:
 
             self.df_res.at[idx, "DeudaActual"] = deuda_actual
             self.df_res.at[idx, "UltimaActualizacion"] = datetime.now().isoformat()
+        return True
+
+    # ---------------- Escáner (venta rápida) ----------------
+    def _indice_codigo(self):
+        """Código -> índice de df_inv (primera aparición). Se arma de nuevo al recargar."""
+        if self._idx_codigo is None:
+            idx = {}
+            for i, code in zip(self.df_inv.index, self.df_inv["Código"].astype(str)):
+                idx.setdefault(code, i)
+            self._idx_codigo = idx
+        return self._idx_codigo
+
+    def _escanear(self, event=None):
+        texto = self.scan_var.get().strip()
+        self.scan_var.set("")
+        if not texto:
+            return "break"
+        qty = 1
+        if "*" in texto:
+            pre, _, texto = texto.partition("*")
+            qty = int(pre) if pre.strip().isdigit() and int(pre) > 0 else 1
+            texto = texto.strip()
+
+        idx = self._indice_codigo().get(texto)
+        if idx is None:
+            self.root.bell()
+            self.ticket_var.set(f"No existe: {texto} | {self._resumen_ticket()}")
+            return "break"
+
+        stock = int(self.df_inv.at[idx, "Stock"])
+        en_ticket = self.ticket.get(texto, 0) + qty
+        nombre = self.df_inv.at[idx, "Nombre"]
+        if en_ticket > stock:
+            self.root.bell()
+            self.ticket_var.set(f"Sin stock: {nombre} (hay {stock}) | {self._resumen_ticket()}")
+            return "break"
+
+        self.ticket[texto] = en_ticket
+        self.ticket_var.set(f"{nombre} x{en_ticket} (quedan {stock - en_ticket}) | {self._resumen_ticket()}")
+        return "break"
+
+    def _resumen_ticket(self):
+        if not self.ticket:
+            return "Ticket vacío"
+        idx_cod = self._indice_codigo()
+        piezas = sum(self.ticket.values())
+        total = sum(float(self.df_inv.at[idx_cod[c], "PrecioVenta"]) * q for c, q in self.ticket.items())
+        return f"Ticket: {piezas} pza(s) ${total:.2f}"
+
+    def cancelar_ticket(self):
+        self.ticket.clear()
+        self.ticket_var.set("Ticket vacío")
+        self.scan_entry.focus_set()
+
+    def cobrar_ticket(self):
+        """Cobra el ticket en efectivo: memoria y tabla al instante, Excel en segundo plano."""
+        if not self.ticket:
+            return
+        idx_cod = self._indice_codigo()
+        cobrado, omitidos = 0.0, []
+        for code, qty in self.ticket.items():
+            idx = idx_cod.get(code)
+            if idx is None or int(self.df_inv.at[idx, "Stock"]) < qty:
+                omitidos.append(code)  # se editó/eliminó mientras el ticket estaba abierto
+                continue
+            total, _ = self._vender(idx, code, qty, "Efectivo", "Cliente", "Escáner")
+            cobrado += total
+            self._actualizar_fila_inventario(idx, code)
+        self.ticket.clear()
+
+        msg = f"Cobrado ${cobrado:.2f} | Ticket vacío"
+        if omitidos:
+            self.root.bell()
+            msg += f" | Sin stock, no cobrados: {', '.join(omitidos)}"
+        self.ticket_var.set(msg)
+        self.scan_entry.focus_set()
+        self.persistir(diferido=True)
+        self._programar_refresco()
+
+    def _actualizar_fila_inventario(self, idx, code):
+        """Pone el stock nuevo en la fila visible sin esperar al refresco completo."""
+        mostrada = self.vista_inv.valores(code)
+        if mostrada is None:
+            return
+        valores, tags = mostrada
+        stock = int(self.df_inv.at[idx, "Stock"])
+        self.vista_inv.actualizar_fila(code, valores[:3] + (stock,) + valores[4:], tags)
 
     # ---------------- Sale UI ----------------
+    # Ventas: las filas nuevas esperan en una lista y se juntan con un solo
+    # concat la próxima vez que alguien lee df_ven (agregar no copia todo Ventas).
+    @property
+    def df_ven(self):
+        self._esperar_ventas()
+        if self._ven_pendientes:
+            self._df_ven = juntar_ventas(self._df_ven, self._ven_pendientes)
+            self._ven_pendientes = []
+        return self._df_ven
+
+    def _partes_ventas(self):
+        """(hoja, copia de las filas nuevas) sin juntarlas: para quien las junta en otro hilo."""
+        self._esperar_ventas()
+        return self._df_ven, list(self._ven_pendientes)
+
+    @df_ven.setter
+    def df_ven(self, df):
+        self._df_ven = df
+        self._ven_pendientes = []
+
+    def _agregar_a_ventas(self, fila):
+        """Agrega un movimiento a Ventas y actualiza los índices que dependen de él."""
+        self._esperar_ventas()
+        posicion = len(self._df_ven) + len(self._ven_pendientes)
+        self._ven_pendientes.append(fila)
+        self.marcar_cambio(SHEET_VEN, venta=True)
+        self.personas.agregar(fila.get("Persona", ""), posicion)
+        self.antiguedad.registrar(fila.get("Persona", ""), fila.get("Tipo"), fila["Total"], fila["Fecha"])
+        if fila.get("Tipo") != "Pago" and self.agregados_ven is not None:
+            acumular_venta(self.agregados_ven, fila["Fecha"], fila["Código"], fila["Nombre"],
+                           fila["Cantidad"], fila["Total"], fila["Ganancia"])
+        if fila.get("Tipo") != "Pago":
+            self.velocidad.registrar_venta(fila["Código"], fila["Cantidad"], fila["Fecha"])
+            if self.cubo.listo:
+                idx = self._indice_codigo().get(str(fila["Código"]))
+                self.cubo.registrar(fila, None if idx is None else self.df_inv.at[idx, "Categoría"])
+
+    def _vender(self, idx, code, qty, tipo, person, desc, cuenta=""):
+        """
+        Registra la venta en memoria (stock, Ventas, Transferencias, Deudas, ResumenPagos).
+        El costo sale de los lotes FIFO; PrecioCompra en Ventas es el costo unitario promedio.
+        No valida ni guarda: quien llama ya revisó el stock y decide cuándo persistir.
+        Devuelve (total, ganancia).
+        """
+        stock = int(self.df_inv.at[idx, "Stock"])
+        precio_venta = float(self.df_inv.at[idx, "PrecioVenta"])
+        costo = self.lotes.consumir(code, qty, float(self.df_inv.at[idx, "PrecioCompra"]))
+        precio_compra = costo / qty
+        total = precio_venta * qty
+        ganancia = total - costo
+
+        # restar stock
+        self.df_inv.at[idx, "Stock"] = stock - qty
+
+        # registrar venta
+        venta_row = {
+            "Fecha": datetime.now().isoformat(),
+            "Código": code,
+            "Nombre": self.df_inv.at[idx, "Nombre"],
+            "Cantidad": qty,
+            "PrecioVenta": precio_venta,
+            "PrecioCompra": precio_compra,
+            "Total": total,
+            "Ganancia": ganancia,
+            "Persona": person,
+            "Tipo": tipo,
+            "Descripción": desc
+        }
+        self._agregar_a_ventas(venta_row)
+
+        # transferencias
+        if tipo == "Transferencia":
+            tra = {
+                "Fecha": datetime.now().isoformat(),
+                "Código": code,
+                "Nombre": self.df_inv.at[idx, "Nombre"],
+                "Cantidad": qty,
+                "Precio": precio_venta,
+                "Total": total,
+                "Persona": person,
+                "Cuenta": cuenta,
+                "Descripción": desc
+            }
+            self.df_tra = pd.concat([self.df_tra, pd.DataFrame([tra])], ignore_index=True)
+
+        # deudas si fiado
+        if tipo == "Fiado":
+            existe = self.df_deu[self.df_deu["Persona"] == person]
+            if existe.empty:
+                new_deu = {"Persona": person, "Adeuda": total, "Pagado": 0.0, "TotalDeuda": total, "Estado": f"ADEUDA ${total:.2f}"}
+                self.df_deu = pd.concat([self.df_deu, pd.DataFrame([new_deu])], ignore_index=True)
+            else:
+                ix = existe.index[0]
+                current_adeuda = float(self.df_deu.at[ix, "Adeuda"])
+                current_pagado = float(self.df_deu.at[ix, "Pagado"])
+                new_adeuda = current_adeuda + total
+                new_total = new_adeuda - current_pagado
+                self.df_deu.at[ix, "Adeuda"] = new_adeuda
+                self.df_deu.at[ix, "TotalDeuda"] = new_total
+                self.df_deu.at[ix, "Estado"] = f"ADEUDA ${new_total:.2f}" if new_total > 0 else "AL DÍA"
+
+        cambiadas = [SHEET_INV, SHEET_LOT]
+        if tipo == "Transferencia":
+            cambiadas.append(SHEET_TRA)
+        if tipo == "Fiado":
+            cambiadas.append(SHEET_DEU)
+        # resumen pagos (por tipo)
+        if self.actualizar_resumen_pagos(person, total, tipo):
+            cambiadas.append(SHEET_RES)
+
+        # solo las hojas que cambiaron: una venta en efectivo no invalida deudores ni resumen
+        self.marcar_cambio(*cambiadas, venta=True)
+        encontrado, vt = self.cache.buscar(self._clave_velocidad())
+        if encontrado:
+            self.velocidad.actualizar_fila(vt, self.df_inv, idx)
+        return total, ganancia
+
     def ui_sale(self, tipo):
         win = tk.Toplevel(self.root)
         win.title(f"Registrar venta - {tipo}")
@@ -720,80 +3635,21 @@ class DeliciasApp:
             person = person_var.get().strip() or "Cliente"
             desc = desc_var.get().strip()
 
-            row = self.df_inv[self.df_inv["Código"].astype(str) == code]
-            if row.empty:
+            idx = self._indice_codigo().get(code)
+            if idx is None:
                 messagebox.showerror("No existe", "Producto no encontrado")
                 return
 
-            idx = row.index[0]
             stock = int(self.df_inv.at[idx, "Stock"])
             if stock < qty:
                 messagebox.showerror("Stock insuficiente", f"Stock actual: {stock}")
                 return
 
-            precio_venta = float(self.df_inv.at[idx, "PrecioVenta"])
-            precio_compra = float(self.df_inv.at[idx, "PrecioCompra"])
-            total = precio_venta * qty
-            ganancia = (precio_venta - precio_compra) * qty
-
-            # restar stock
-            self.df_inv.at[idx, "Stock"] = stock - qty
-
-            # registrar venta
-            venta_row = {
-                "Fecha": datetime.now().isoformat(),
-                "Código": code,
-                "Nombre": self.df_inv.at[idx, "Nombre"],
-                "Cantidad": qty,
-                "PrecioVenta": precio_venta,
-                "PrecioCompra": precio_compra,
-                "Total": total,
-                "Ganancia": ganancia,
-                "Persona": person,
-                "Tipo": tipo,
-                "Descripción": desc
-            }
-            self.df_ven = pd.concat([self.df_ven, pd.DataFrame([venta_row])], ignore_index=True)
-
-            # transferencias
-            if tipo == "Transferencia":
-                tra = {
-                    "Fecha": datetime.now().isoformat(),
-                    "Código": code,
-                    "Nombre": self.df_inv.at[idx, "Nombre"],
-                    "Cantidad": qty,
-                    "Precio": precio_venta,
-                    "Total": total,
-                    "Persona": person,
-                    "Cuenta": account_var.get().strip(),
-                    "Descripción": desc
-                }
-                self.df_tra = pd.concat([self.df_tra, pd.DataFrame([tra])], ignore_index=True)
-
-            # deudas si fiado
-            if tipo == "Fiado":
-                existe = self.df_deu[self.df_deu["Persona"] == person]
-                if existe.empty:
-                    new_deu = {"Persona": person, "Adeuda": total, "Pagado": 0.0, "TotalDeuda": total, "Estado": f"ADEUDA ${total:.2f}"}
-                    self.df_deu = pd.concat([self.df_deu, pd.DataFrame([new_deu])], ignore_index=True)
-                else:
-                    ix = existe.index[0]
-                    current_adeuda = float(self.df_deu.at[ix, "Adeuda"])
-                    current_pagado = float(self.df_deu.at[ix, "Pagado"])
-                    new_adeuda = current_adeuda + total
-                    new_total = new_adeuda - current_pagado
-                    self.df_deu.at[ix, "Adeuda"] = new_adeuda
-                    self.df_deu.at[ix, "TotalDeuda"] = new_total
-                    self.df_deu.at[ix, "Estado"] = f"ADEUDA ${new_total:.2f}" if new_total > 0 else "AL DÍA"
-
-            # resumen pagos (por tipo)
-            self.actualizar_resumen_pagos(person, total, tipo)
+            total, ganancia = self._vender(idx, code, qty, tipo, person, desc, account_var.get().strip())
 
             # recalcular ganancias mensuales y guardar todo
-            self.recalcular_ganancias_mensuales()
-            guardar_todo(self.df_inv, self.df_ven, self.df_deu, self.df_tra, self.df_res, self.df_gan)
-
-            self.reload()
+            self.persistir()
+            self.refrescar_vistas()
 
             msg = f"Venta registrada:\nTotal: ${total:.2f}\nGanancia: ${ganancia:.2f}\nTipo: {tipo}\nPersona: {person}"
             if tipo == "Fiado":
@@ -885,11 +3741,11 @@ class DeliciasApp:
                 "Tipo": "Pago",
                 "Descripción": desc
             }
-            self.df_ven = pd.concat([self.df_ven, pd.DataFrame([pago_record])], ignore_index=True)
+            self._agregar_a_ventas(pago_record)
 
-            self.recalcular_ganancias_mensuales()
-            guardar_todo(self.df_inv, self.df_ven, self.df_deu, self.df_tra, self.df_res, self.df_gan)
-            self.reload()
+            self.marcar_cambio(SHEET_DEU, SHEET_RES)
+            self.persistir()
+            self.refrescar_vistas()
 
             if new_total > 0:
                 msg = f"Pago de ${amt:.2f} registrado\nDeuda restante: ${new_total:.2f}"
@@ -906,35 +3762,49 @@ class DeliciasApp:
     def ui_view_debtors(self):
         win = tk.Toplevel(self.root)
         win.title("Deudores - Delicias de la Wera")
-        win.geometry("720x420")
+        win.geometry("1100x440")
 
-        cols = ("Persona","Adeuda","Pagado","TotalDeuda", "Estado")
+        tramos = [t for t, _ in TRAMOS_ANTIGUEDAD]
+        cols = ("Persona", "Adeuda", "Pagado", "TotalDeuda", "Estado", *tramos, "MasVieja")
         tree = ttk.Treeview(win, columns=cols, show="headings", height=18)
         for c in cols:
             tree.heading(c, text=c)
-            tree.column(c, anchor="center", width=130)
+            tree.column(c, anchor="center", width=95)
+        tree.heading("MasVieja", text="Días (más vieja)")
+        tree.column("Persona", width=150)
+        tree.column("Estado", width=130)
         tree.pack(fill="both", expand=True, padx=8, pady=8)
+        tree.bind("<Double-1>", lambda e: tree.selection() and self.ui_estado_cuenta(
+            tree.item(tree.selection()[0], "values")[0]))
 
-        df = self.df_deu.copy()
-        if df.empty:
+        if self.df_deu.empty:
             return
 
-        df["Adeuda"] = pd.to_numeric(df["Adeuda"], errors="coerce").fillna(0.0)
-        df["Pagado"] = pd.to_numeric(df["Pagado"], errors="coerce").fillna(0.0)
-        df["TotalDeuda"] = df["Adeuda"] - df["Pagado"]
-        df["Estado"] = df["TotalDeuda"].apply(lambda x: "AL DÍA" if x == 0 else f"A FAVOR ${-x:.2f}" if x < 0 else f"ADEUDA ${x:.2f}")
-
-        total_general_deuda = float(df[df["TotalDeuda"] > 0]["TotalDeuda"].sum()) if not df.empty else 0.0
-        total_a_favor = float((-df[df["TotalDeuda"] < 0]["TotalDeuda"]).sum()) if not df.empty else 0.0
+        filas, total_general_deuda, total_a_favor = self.cache.obtener(
+            ("deudores", self.versiones[SHEET_DEU], self.versiones[SHEET_VEN], date.today()), self._calcular_deudores
+        )
+        orden = {"col": None, "desc": True}
+
+        def ordenar(col, desc=None):
+            """Reordena por la columna (clic otra vez = invierte); números como números."""
+            i = cols.index(col)
+            if desc is None:
+                desc = not orden["desc"] if orden["col"] == col else True
+            orden.update(col=col, desc=desc)
+            if col in ("Persona", "Estado"):
+                clave = lambda f: f[i].lower()
+            elif col == "MasVieja":
+                # con fecha ilegible primero (puede ser la más vieja), luego por días
+                clave = lambda f: (SIN_FECHA in f[i], int(f[i].split()[0]) if f[i][0].isdigit() else 0)
+            else:
+                clave = lambda f: float(f[i])
+            tree.delete(*tree.get_children())
+            for valores in sorted(filas, key=clave, reverse=desc):
+                tree.insert("", "end", values=valores)
 
-        for _, r in df.iterrows():
-            tree.insert("", "end", values=(
-                str(r["Persona"]),
-                f"{float(r['Adeuda']):.2f}",
-                f"{float(r['Pagado']):.2f}",
-                f"{float(r['TotalDeuda']):.2f}",
-                str(r["Estado"])
-            ))
+        for c in cols:
+            tree.heading(c, command=lambda c=c: ordenar(c))
+        ordenar("TotalDeuda", desc=True)
 
         footer = ttk.Frame(win)
         footer.pack(fill="x", padx=8, pady=4)
@@ -945,6 +3815,93 @@ class DeliciasApp:
         if total_a_favor > 0:
             ttk.Label(footer, text=f"TOTAL A FAVOR: ${total_a_favor:.2f}",
                       font=("Arial", 10, "bold"), foreground="green").pack(side="left", padx=10)
+        ttk.Button(footer, text="Mayor deuda primero", command=lambda: ordenar("TotalDeuda", True)).pack(side="right", padx=4)
+        ttk.Button(footer, text="Más vieja primero", command=lambda: ordenar("MasVieja", True)).pack(side="right", padx=4)
+
+    def _calcular_deudores(self):
+        df = self.df_deu
+        adeuda = pd.to_numeric(df["Adeuda"], errors="coerce").fillna(0.0)
+        pagado = pd.to_numeric(df["Pagado"], errors="coerce").fillna(0.0)
+        total = adeuda - pagado
+        estado = _estado_deuda(total)
+
+        # antigüedad por persona (Fiado pendientes después de aplicar los Pago)
+        tramos = [t for t, _ in TRAMOS_ANTIGUEDAD]
+        ant = self.antiguedad.tabla(self.df_ven).set_index("Persona")
+        ant = ant.reindex(df["Persona"].fillna("").astype(str).str.strip())
+        ant[tramos] = ant[tramos].fillna(0.0)
+        dias = [
+            (f"{d} + {SIN_FECHA}" if d else SIN_FECHA) if sin_fecha else str(d)
+            for d, sin_fecha in zip(ant["DiasMasVieja"].fillna(0).astype(int), ant["FechaDesconocida"].eq(True))
+        ]
+
+        total_general_deuda = float(total[total > 0].sum())
+        total_a_favor = float((-total[total < 0]).sum())
+        filas = [
+            (str(p), f"{a:.2f}", f"{g:.2f}", f"{t:.2f}", e, *(f"{x:.2f}" for x in xs), d)
+            for p, a, g, t, e, xs, d in zip(
+                df["Persona"], adeuda, pagado, total, estado, ant[tramos].itertuples(index=False), dias,
+            )
+        ]
+        return filas, total_general_deuda, total_a_favor
+
+    # ---------------- Estado de cuenta ----------------
+    def ui_estado_cuenta(self, persona=None):
+        win = tk.Toplevel(self.root)
+        win.title("Estado de cuenta - Delicias de la Wera")
+        win.geometry("900x460")
+
+        top = ttk.Frame(win, padding=8)
+        top.pack(fill="x")
+        ttk.Label(top, text="Persona:").pack(side="left")
+        person_var = tk.StringVar(value=persona or "")
+        cb = ttk.Combobox(top, textvariable=person_var, values=self.personas.personas(self.df_ven), width=30)
+        cb.pack(side="left", padx=6)
+
+        cols = ("Fecha", "Tipo", "Nombre", "Cantidad", "Cargo", "Abono", "Saldo", "Descripción")
+        tree = ttk.Treeview(win, columns=cols, show="headings", height=16)
+        for c in cols:
+            tree.heading(c, text=c)
+            tree.column(c, anchor="center", width=105)
+        tree.pack(fill="both", expand=True, padx=8, pady=8)
+
+        footer_var = tk.StringVar()
+        ttk.Label(win, textvariable=footer_var, font=("Arial", 10, "bold")).pack(anchor="w", padx=8, pady=4)
+
+        def mostrar(event=None):
+            for r in tree.get_children():
+                tree.delete(r)
+            nombre = person_var.get().strip()
+            if not nombre:
+                footer_var.set("")
+                return
+            edo = estado_de_cuenta(self.df_ven, self.personas.posiciones(nombre, self.df_ven))
+            for r in edo.itertuples(index=False):
+                try:
+                    fecha_str = datetime.fromisoformat(str(r.Fecha)).strftime("%d/%m/%Y %H:%M")
+                except Exception:
+                    fecha_str = str(r.Fecha)
+                tree.insert("", "end", values=(
+                    fecha_str, r.Tipo, r.Nombre, r.Cantidad,
+                    f"{r.Cargo:.2f}" if r.Cargo else "",
+                    f"{r.Abono:.2f}" if r.Abono else "",
+                    f"{r.Saldo:.2f}", r.Descripción,
+                ))
+
+            saldo = float(edo["Saldo"].iat[-1]) if not edo.empty else 0.0
+            texto = f"{len(edo)} movimiento(s) | Saldo: ${saldo:.2f}"
+            deu = self.df_deu[self.df_deu["Persona"] == nombre]
+            if not deu.empty:
+                total_deu = float(deu.iloc[0]["TotalDeuda"])
+                texto += f" | Deudas: ${total_deu:.2f}"
+                if abs(total_deu - saldo) > 0.005:
+                    texto += "  (no coincide con los movimientos registrados)"
+            footer_var.set(texto)
+
+        cb.bind("<<ComboboxSelected>>", mostrar)
+        cb.bind("<Return>", mostrar)
+        ttk.Button(top, text="Ver", command=mostrar).pack(side="left")
+        mostrar()
 
     # ---------------- View resumen pagos ----------------
     def ui_view_resumen_pagos(self):
@@ -969,48 +3926,13 @@ class DeliciasApp:
             tree.column(c, anchor="center", width=120)
         tree.pack(fill="both", expand=True, padx=8, pady=8)
 
-        df = self.df_res.copy().fillna(0)
-        if df.empty:
+        if self.df_res.empty:
             return
 
-        total_efectivo = 0.0
-        total_transferencia = 0.0
-        total_fiado = 0.0
-        total_pagado = 0.0
-        total_deuda_actual = 0.0
-
-        for _, r in df.iterrows():
-            efectivo = float(r["TotalEfectivo"])
-            transferencia = float(r["TotalTransferencia"])
-            fiado = float(r["TotalFiado"])
-            pagado = float(r["TotalPagado"])
-            deuda_actual = float(r["DeudaActual"])
-
-            total_efectivo += efectivo
-            total_transferencia += transferencia
-            total_fiado += fiado
-            total_pagado += pagado
-            total_deuda_actual += deuda_actual
-
-            fecha = r["UltimaActualizacion"]
-            if pd.isna(fecha) or str(fecha).strip() == "" or fecha == 0:
-                fecha_str = "Nunca"
-            else:
-                try:
-                    fecha_dt = datetime.fromisoformat(str(fecha))
-                    fecha_str = fecha_dt.strftime("%d/%m/%Y %H:%M")
-                except Exception:
-                    fecha_str = str(fecha)
-
-            tree.insert("", "end", values=(
-                str(r["Persona"]),
-                f"{efectivo:.2f}",
-                f"{transferencia:.2f}",
-                f"{fiado:.2f}",
-                f"{pagado:.2f}",
-                f"{deuda_actual:.2f}",
-                fecha_str
-            ))
+        filas, totales = self.cache.obtener(("resumen_pagos", self.versiones[SHEET_RES]), self._calcular_resumen_pagos)
+        total_efectivo, total_transferencia, total_fiado, total_pagado, total_deuda_actual = totales
+        for valores in filas:
+            tree.insert("", "end", values=valores)
 
         footer = ttk.Frame(win)
         footer.pack(fill="x", padx=8, pady=4)
@@ -1021,20 +3943,675 @@ class DeliciasApp:
         ttk.Label(footer, text=f"PAGADO: ${total_pagado:.2f}", font=("Arial", 8, "bold"), foreground="purple").pack(side="left", padx=4)
         ttk.Label(footer, text=f"DEUDA ACTUAL: ${total_deuda_actual:.2f}", font=("Arial", 8, "bold"), foreground="red").pack(side="left", padx=4)
 
+    # ---------------- Sugerido de compra ----------------
+    def ui_sugerido_compra(self):
+        df_ven = self.df_ven  # primero: si Ventas se está leyendo, trae también el motor de velocidades
+        vt = self.velocidad.tabla(self.df_inv, df_ven)
+        sug = vt[vt["Sugerido"] > 0].sort_values(by=["Categoría", "DiasCobertura"])
+
+        win = tk.Toplevel(self.root)
+        win.title("Sugerido de compra - Delicias de la Wera")
+        win.geometry("900x460")
+
+        top = ttk.Frame(win, padding=8)
+        top.pack(fill="x")
+        ttk.Label(top, text="Categoría:").pack(side="left")
+        cat_var = tk.StringVar(value="Todas")
+        cats = ["Todas"] + sorted(sug["Categoría"].unique().tolist())
+        cb = ttk.Combobox(top, textvariable=cat_var, values=cats, state="readonly", width=28)
+        cb.pack(side="left", padx=6)
+
+        cols = ("Código", "Nombre", "Categoría", "Stock", "Vel/día", "Cobertura", "PuntoReorden", "Sugerido")
+        tree = ttk.Treeview(win, columns=cols, show="headings", height=16)
+        for c in cols:
+            tree.heading(c, text=c)
+            tree.column(c, anchor="center", width=105)
+        tree.pack(fill="both", expand=True, padx=8, pady=8)
+
+        def filtrado():
+            cat = cat_var.get()
+            return sug if cat == "Todas" else sug[sug["Categoría"] == cat]
+
+        def llenar(event=None):
+            for r in tree.get_children():
+                tree.delete(r)
+            for r in filtrado().itertuples(index=False):
+                tree.insert("", "end", values=(
+                    r.Código, r.Nombre, r.Categoría, int(r.Stock),
+                    f"{getattr(r, f'V{VENTANA_REFERENCIA}'):.2f}",
+                    f"{r.DiasCobertura:.1f}", int(r.PuntoReorden), int(r.Sugerido),
+                ))
+
+        def exportar():
+            ruta = filedialog.asksaveasfilename(
+                parent=win, title="Guardar sugerido de compra", defaultextension=".xlsx",
+                initialfile=f"sugerido_compra_{date.today().isoformat()}.xlsx",
+                filetypes=[("Excel", "*.xlsx")],
+            )
+            if not ruta:
+                return
+            cols_out = ["Código", "Nombre", "Stock", f"V{VENTANA_REFERENCIA}", "DiasCobertura", "PuntoReorden", "Sugerido"]
+            try:
+                usados = set()
+                with pd.ExcelWriter(ruta, engine="openpyxl") as w:
+                    for cat, grp in filtrado().groupby("Categoría", sort=True):
+                        grp[cols_out].to_excel(w, sheet_name=_nombre_hoja_excel(cat, usados), index=False)
+                    if not usados:
+                        pd.DataFrame(columns=cols_out).to_excel(w, sheet_name="Sugerido", index=False)
+                messagebox.showinfo("Exportado", f"Sugerido guardado en:\n{ruta}", parent=win)
+            except Exception as e:
+                messagebox.showerror("Error", str(e), parent=win)
+
+        cb.bind("<<ComboboxSelected>>", llenar)
+        ttk.Button(top, text="Exportar (una hoja por categoría)", command=exportar).pack(side="right", padx=4)
+        ttk.Label(
+            win,
+            text=f"Velocidad = unidades/día de los últimos {VENTANA_REFERENCIA} días. "
+                 f"Reorden = {DIAS_ENTREGA + DIAS_SEGURIDAD} días de venta; compra cubre {DIAS_ENTREGA + DIAS_OBJETIVO} días."
+        ).pack(side="bottom", anchor="w", padx=8, pady=4)
+        llenar()
+
+    # ---------------- Precios en bloque ----------------
+    def ui_precios_bloque(self):
+        win = tk.Toplevel(self.root)
+        win.title("Precios en bloque - Delicias de la Wera")
+        win.geometry("980x520")
+
+        top = ttk.Frame(win, padding=8)
+        top.pack(fill="x")
+        busqueda = self.search_var.get().strip()
+        cats = sorted(self.df_inv["Categoría"].fillna("").astype(str).replace("", "Sin categoría").unique().tolist())
+        alcances = [f"Búsqueda actual: '{busqueda}'"] if busqueda else []
+        alcances += [f"Categoría: {c}" for c in cats]
+        alcance_var = tk.StringVar(value=alcances[0] if alcances else "")
+        ttk.Label(top, text="Aplicar a:").grid(row=0, column=0, sticky="w")
+        ttk.Combobox(top, textvariable=alcance_var, values=alcances, state="readonly", width=34).grid(row=0, column=1, padx=6)
+
+        modo_var = tk.StringVar(value=MODOS_PRECIO[0])
+        ttk.Label(top, text="Regla:").grid(row=0, column=2, sticky="w")
+        ttk.Combobox(top, textvariable=modo_var, values=MODOS_PRECIO, state="readonly", width=36).grid(row=0, column=3, padx=6)
+
+        pct_var = tk.StringVar(value="10")
+        ttk.Label(top, text="%:").grid(row=1, column=0, sticky="w", pady=6)
+        ttk.Entry(top, textvariable=pct_var, width=10).grid(row=1, column=1, sticky="w", padx=6)
+        red_var = tk.StringVar(value="Sin redondeo")
+        ttk.Label(top, text="Redondeo:").grid(row=1, column=2, sticky="w")
+        ttk.Combobox(top, textvariable=red_var, values=list(REDONDEOS_PRECIO), state="readonly", width=14).grid(
+            row=1, column=3, sticky="w", padx=6)
+
+        cols = ("Código", "Nombre", "Categoría", "Compra", "Antes", "Nuevo", "Margen antes", "Margen nuevo", "Aviso")
+        tree = ttk.Treeview(win, columns=cols, show="headings", height=15)
+        for c in cols:
+            tree.heading(c, text=c)
+            tree.column(c, anchor="center", width=105)
+        tree.tag_configure("bajo", background="#ffd6d6")
+        tree.tag_configure("conserva", background="#eeeeee")
+        tree.pack(fill="both", expand=True, padx=8, pady=4)
+
+        resumen_var = tk.StringVar()
+        ttk.Label(win, textvariable=resumen_var, font=("Arial", 10, "bold")).pack(anchor="w", padx=8)
+        # la vista previa guarda la versión del Inventario: si cambió, sus índices ya no valen
+        vista = {"prev": None, "version": None}
+
+        def seleccion():
+            alcance = alcance_var.get()
+            if alcance.startswith("Búsqueda"):
+                # la búsqueda de cuando se abrió la ventana (la que dice el alcance), no la de ahora
+                return self._mascara_busqueda(self.df_inv, busqueda)
+            if ": " not in alcance:
+                messagebox.showwarning("Precios en bloque", "No hay productos a los cuales aplicar", parent=win)
+                return None
+            cat = alcance.split(": ", 1)[1]
+            return self.df_inv["Categoría"].fillna("").astype(str).replace("", "Sin categoría") == cat
+
+        def previsualizar():
+            try:
+                pct = float(pct_var.get().replace("%", "").strip())
+            except ValueError:
+                messagebox.showwarning("Dato inválido", "Porcentaje inválido", parent=win)
+                return
+            mascara = seleccion()
+            if mascara is None:
+                return
+            try:
+                prev = calcular_precios(self.df_inv[mascara], modo_var.get(), pct, REDONDEOS_PRECIO[red_var.get()])
+            except ValueError as e:
+                messagebox.showwarning("Dato inválido", str(e), parent=win)
+                return
+            vista["prev"] = prev
+            vista["version"] = self.versiones[SHEET_INV]
+            tree.delete(*tree.get_children())
+            for r in prev.itertuples(index=False):
+                tree.insert("", "end", values=(
+                    r.Código, r.Nombre, r.Categoría, f"{r.PrecioCompra:.2f}", f"{r.PrecioAntes:.2f}", f"{r.PrecioNuevo:.2f}",
+                    "-" if r.MargenAntes != r.MargenAntes else f"{r.MargenAntes:.1f}%",
+                    "-" if r.MargenDespues != r.MargenDespues else f"{r.MargenDespues:.1f}%",
+                    r.Aviso,
+                ), tags=("conserva",) if r.Aviso else ("bajo",) if r.PrecioNuevo < r.PrecioCompra else ())
+            bajo_costo = int((prev["PrecioNuevo"] < prev["PrecioCompra"]).sum())
+            conservan = int((prev["Aviso"] != "").sum())
+            resumen_var.set(
+                f"{len(prev)} producto(s) | margen promedio {prev['MargenAntes'].mean():.1f}% -> "
+                f"{prev['MargenDespues'].mean():.1f}%"
+                + (f" | {bajo_costo} quedarían bajo costo" if bajo_costo else "")
+                + (f" | {conservan} conservan su precio (ver Aviso)" if conservan else "")
+            )
+
+        def aplicar():
+            prev = vista["prev"]
+            if prev is None or prev.empty:
+                messagebox.showinfo("Precios en bloque", "Primero genere la vista previa", parent=win)
+                return
+            prev = prev[prev["Aviso"] == ""]  # las que conservan su precio no se tocan
+            if prev.empty:
+                messagebox.showinfo("Precios en bloque", "Ningún producto cambia de precio", parent=win)
+                return
+            if vista["version"] != self.versiones[SHEET_INV]:
+                vista["prev"] = None
+                messagebox.showwarning(
+                    "Precios en bloque",
+                    "El inventario cambió desde la vista previa (venta, edición o recarga).\n"
+                    "Genere la vista previa otra vez.",
+                    parent=win,
+                )
+                return
+            if not messagebox.askyesno(
+                "Confirmar", f"Se cambiará el precio de venta de {len(prev)} producto(s). ¿Continuar?", parent=win
+            ):
+                return
+            self.df_inv.loc[prev.index, "PrecioVenta"] = prev["PrecioNuevo"]
+            self.marcar_cambio(SHEET_INV)
+            self.persistir()  # una sola escritura para todo el bloque
+            self.refrescar_vistas()
+            messagebox.showinfo("OK", f"{len(prev)} precio(s) actualizados", parent=win)
+            win.destroy()
+
+        ttk.Button(top, text="Vista previa", command=previsualizar).grid(row=0, column=4, rowspan=2, padx=10)
+        ttk.Button(win, text="Aplicar precios", command=aplicar).pack(anchor="e", padx=8, pady=6)
+        for var in (alcance_var, modo_var, pct_var, red_var):
+            var.trace_add("write", lambda *a: vista.update(prev=None))  # cambiar la regla obliga a previsualizar
+
+    # ---------------- Auditoría ----------------
+    def ui_auditoria(self):
+        t0 = time.perf_counter()
+        dif, rec = auditar_derivadas(self.df_ven, self.df_tra, self.df_deu, self.df_res, self.df_gan)
+        ms = (time.perf_counter() - t0) * 1000
+
+        win = tk.Toplevel(self.root)
+        win.title("Auditoría de hojas derivadas - Delicias de la Wera")
+        win.geometry("860x460")
+
+        cols = ("Hoja", "Clave", "Columna", "Guardado", "Reconstruido", "Diferencia")
+        tree = ttk.Treeview(win, columns=cols, show="headings", height=16)
+        for c in cols:
+            tree.heading(c, text=c)
+            tree.column(c, anchor="center", width=135)
+        tree.pack(fill="both", expand=True, padx=8, pady=8)
+
+        for r in dif.itertuples(index=False):
+            tree.insert("", "end", values=(
+                r.Hoja, r.Clave, r.Columna,
+                f"{r.Guardado:.2f}", f"{r.Reconstruido:.2f}", f"{r.Diferencia:+.2f}",
+            ))
+
+        footer = ttk.Frame(win)
+        footer.pack(fill="x", padx=8, pady=4)
+        resumen = (f"{len(self.df_ven)} movimientos repetidos en {ms:.0f} ms | "
+                   + (f"{len(dif)} diferencia(s)" if len(dif) else "Todo coincide con Ventas"))
+        ttk.Label(footer, text=resumen, font=("Arial", 10, "bold")).pack(side="left")
+
+        def aplicar():
+            if not messagebox.askyesno(
+                "Reconstruir",
+                "Se reemplazarán Deudas, ResumenPagos y Ganancias con lo calculado desde Ventas.\n"
+                "Se recomienda respaldar antes. ¿Continuar?",
+                parent=win,
+            ):
+                return
+            self._aplicar_derivadas(rec)
+            messagebox.showinfo("OK", "Hojas derivadas reconstruidas", parent=win)
+            win.destroy()
+
+        btn = ttk.Button(footer, text="Reconstruir desde Ventas", command=aplicar)
+        btn.pack(side="right")
+        if dif[dif["Hoja"] != SHEET_TRA].empty:
+            btn.state(["disabled"])
+
+    def _aplicar_derivadas(self, rec):
+        """Reemplaza Deudas, ResumenPagos y Ganancias por las reconstruidas desde Ventas."""
+        self.df_deu = rec[SHEET_DEU]
+        self.df_res = rec[SHEET_RES]
+        self.df_gan = rec[SHEET_GAN]
+        # el guardado rearma Ganancias desde los agregados: que salgan de las mismas Ventas
+        self.agregados_ven = agregados_desde_ventas(self.df_ven)
+        self.marcar_cambio(SHEET_DEU, SHEET_RES, SHEET_GAN)
+        self.persistir()
+        self.refrescar_vistas()
+
+    # ---------------- Revisión de datos ----------------
+    def _args_revision(self, copiar=False):
+        """
+        Argumentos de revisar_datos. copiar=True para otro hilo: se copian las hojas
+        que se editan en sitio (Ventas no, igual que en _instantanea).
+        """
+        # las posiciones de números ilegibles solo valen hasta el primer guardado (que escribe los 0)
+        invalidos = self.invalidos_carga if self._seq_guardado == self._invalidos_seq else None
+        inv, tra, deu, res, gan = self.df_inv, self.df_tra, self.df_deu, self.df_res, self.df_gan
+        if copiar:
+            inv, tra, deu, res, gan = (df.copy() for df in (inv, tra, deu, res, gan))
+            invalidos = None if invalidos is None else {h: dict(c) for h, c in invalidos.items()}
+        return inv, self.df_ven, tra, deu, res, gan, self.lotes.tabla(), invalidos
+
+    def ui_revision_datos(self):
+        win = tk.Toplevel(self.root)
+        win.title("Revisión de datos - Delicias de la Wera")
+        win.geometry("980x520")
+
+        resumen_var = tk.StringVar()
+        ttk.Label(win, textvariable=resumen_var, font=("Arial", 10, "bold"), wraplength=940,
+                  justify="left").pack(anchor="w", padx=8, pady=6)
+
+        cols = ("Hoja", "Fila", "Columna", "Problema", "Valor")
+        tree = ttk.Treeview(win, columns=cols, show="headings", height=16)
+        for c in cols:
+            tree.heading(c, text=c)
+            tree.column(c, anchor="center", width=120)
+        tree.column("Problema", width=200)
+        tree.column("Valor", width=360, anchor="w")
+        tree.pack(fill="both", expand=True, padx=8, pady=4)
+
+        botones = ttk.Frame(win)
+        botones.pack(fill="x", padx=8, pady=6)
+        estado = {"problemas": None, "rec": None}
+
+        def revisar():
+            t0 = time.perf_counter()
+            problemas, rec = revisar_datos(*self._args_revision())
+            ms = (time.perf_counter() - t0) * 1000
+            estado.update(problemas=problemas, rec=rec)
+
+            tree.delete(*tree.get_children())
+            for r in problemas.head(REVISION_FILAS_VISTA).itertuples(index=False):
+                tree.insert("", "end", values=(r.Hoja, "" if pd.isna(r.Fila) else int(r.Fila),
+                                               r.Columna, r.Problema, r.Valor))
+            if problemas.empty:
+                resumen_var.set(f"Sin problemas ({len(self.df_ven)} movimientos revisados en {ms:.0f} ms)")
+            else:
+                conteo = problemas.groupby(["Hoja", "Problema"], sort=False).size()
+                resumen_var.set(
+                    " | ".join(f"{h} - {p}: {n}" for (h, p), n in conteo.items())
+                    + f"  ({ms:.0f} ms" + (f", se muestran {REVISION_FILAS_VISTA}" if len(problemas) > REVISION_FILAS_VISTA else "")
+                    + ")"
+                )
+            # Transferencias no se reconstruye (como en Auditar): solo se reporta
+            sin_arreglo = (problemas["Hoja"] == SHEET_TRA) & (problemas["Problema"] == "No coincide con Ventas")
+            hay = set(problemas.loc[~sin_arreglo, "Problema"])
+            for texto, btn in acciones.items():
+                btn.state(["!disabled"] if correcciones[texto][0] & hay else ["disabled"])
+
+        def corregir(texto):
+            _, fn, aviso = correcciones[texto]
+            if not messagebox.askyesno("Corregir", aviso + "\nSe recomienda respaldar antes. ¿Continuar?", parent=win):
+                return
+            fn(estado)
+            revisar()
+
+        correcciones = {
+            "Unir códigos duplicados": (
+                {"Código duplicado"}, self._unir_codigos_duplicados,
+                "Se deja la primera fila de cada código repetido, con la suma del stock de todas.",
+            ),
+            "Stock negativo a 0": (
+                {"Stock negativo"}, self._stock_negativo_a_cero,
+                "Los productos con stock negativo quedarán en 0.",
+            ),
+            "Crear productos faltantes": (
+                {"Código sin producto"}, self._crear_productos_faltantes,
+                "Se agregan al Inventario los códigos de Ventas/Lotes que no existen (stock 0, "
+                "nombre y precios de su última venta).",
+            ),
+            "Guardar números ilegibles como 0": (
+                {"Número ilegible (se usa 0)"}, self._guardar_numeros_ilegibles,
+                "Las celdas con texto donde va un número se guardarán como 0.",
+            ),
+            "Reconstruir desde Ventas": (
+                {"No coincide con Ventas"}, lambda e: self._aplicar_derivadas(e["rec"]),
+                "Se reemplazarán Deudas, ResumenPagos y Ganancias con lo calculado desde Ventas.",
+            ),
+        }
+        acciones = {}
+        for texto in correcciones:
+            acciones[texto] = ttk.Button(botones, text=texto, command=lambda t=texto: corregir(t))
+            acciones[texto].pack(side="left", padx=4)
+        ttk.Button(botones, text="Volver a revisar", command=revisar).pack(side="right", padx=4)
+        revisar()
+
+    def _unir_codigos_duplicados(self, estado):
+        df = self.df_inv
+        codigos = df["Código"].fillna("").astype(str).str.strip()
+        con_codigo = codigos != ""
+        stock = pd.to_numeric(df["Stock"], errors="coerce").fillna(0).astype(int)
+        queda = ~codigos.duplicated(keep="first") | ~con_codigo
+        suma = stock.groupby(codigos).transform("sum")
+        df.loc[queda & con_codigo, "Stock"] = suma[queda & con_codigo]
+        self.df_inv = df[queda].reset_index(drop=True)
+        self._idx_codigo = None
+        self.marcar_cambio(SHEET_INV)
+        self.persistir()
+        self.refrescar_vistas()
+
+    def _stock_negativo_a_cero(self, estado):
+        stock = pd.to_numeric(self.df_inv["Stock"], errors="coerce").fillna(0)
+        self.df_inv.loc[stock < 0, "Stock"] = 0
+        self.marcar_cambio(SHEET_INV)
+        self.persistir()
+        self.refrescar_vistas()
+
+    def _crear_productos_faltantes(self, estado):
+        p = estado["problemas"]
+        faltan = pd.unique(p.loc[p["Problema"] == "Código sin producto", "Valor"])
+        ven = self.df_ven
+        cod = _texto_limpio(ven["Código"])
+        ultima = ven[cod.isin(faltan)].assign(_c=cod).drop_duplicates("_c", keep="last").set_index("_c")
+        lotes = self.lotes.tabla()
+        lotes = lotes[lotes["Cantidad"] > 0]  # sin las mermas
+        costo_lote = lotes.drop_duplicates("Código", keep="last").set_index("Código")["PrecioCompra"]
+        nuevos = pd.DataFrame({
+            "Código": faltan,
+            "Nombre": ultima["Nombre"].reindex(faltan).fillna(pd.Series(faltan, index=faltan)).to_numpy(),
+            "PrecioCompra": ultima["PrecioCompra"].reindex(faltan).fillna(costo_lote.reindex(faltan)).fillna(0.0).to_numpy(),
+            "PrecioVenta": ultima["PrecioVenta"].reindex(faltan).fillna(0.0).to_numpy(),
+            "Stock": 0,
+            "Categoría": "",
+        }, columns=INV_COLS)
+        self.df_inv = pd.concat([self.df_inv, nuevos], ignore_index=True)
+        self._idx_codigo = None
+        self.marcar_cambio(SHEET_INV)
+        self.persistir()
+        self.refrescar_vistas()
+
+    def _guardar_numeros_ilegibles(self, estado):
+        # las demás hojas ya tienen 0 en memoria; Transferencias se guarda como texto
+        self.df_tra = self.df_tra.assign(**{
+            c: _columna_numerica(self.df_tra, c) for c in ("Cantidad", "Precio", "Total") if c in self.df_tra.columns
+        })
+        self.marcar_cambio(SHEET_TRA)
+        self.persistir()
+        self.refrescar_vistas()
+
+    def ui_recosteo_fifo(self):
+        """Vuelve a costear Ventas históricas con los lotes FIFO (vista previa + confirmación)."""
+        t0 = time.perf_counter()
+        df_ven = self.df_ven
+        pc_nuevo, gan_nueva, descuadrados = recostear_fifo(df_ven, self.lotes.tabla())
+        ms = (time.perf_counter() - t0) * 1000
+
+        aviso = ""
+        if descuadrados:
+            muestra = ", ".join(descuadrados[:10]) + (" ..." if len(descuadrados) > 10 else "")
+            aviso = (f"{len(descuadrados)} producto(s) no se recostean: sus lotes no cuadran solo con "
+                     f"Ventas (mermas o ajustes de Stock): {muestra}")
+
+        gan_actual = pd.to_numeric(df_ven["Ganancia"], errors="coerce").fillna(0.0)
+        cambia = (gan_nueva - gan_actual).abs() > 0.005
+        if not cambia.any():
+            messagebox.showinfo("Costos FIFO", f"Ventas ya costeadas con los lotes ({ms:.0f} ms).\n\n{aviso}".strip())
+            return
+        antes, despues = float(gan_actual[cambia].sum()), float(gan_nueva[cambia].sum())
+        if not messagebox.askyesno(
+            "Costos FIFO",
+            f"{int(cambia.sum())} venta(s) cambian de costo ({ms:.0f} ms).\n"
+            f"Ganancia de esas ventas: ${antes:,.2f} -> ${despues:,.2f} ({despues - antes:+,.2f})\n\n"
+            + (f"{aviso}\n\n" if aviso else "")
+            + "Se recomienda respaldar antes. ¿Aplicar?",
+        ):
+            return
+
+        df_ven = df_ven.copy()
+        df_ven["PrecioCompra"] = pc_nuevo
+        df_ven["Ganancia"] = gan_nueva
+        self.df_ven = df_ven
+        # Ganancias mensual sale de los agregados: se rearman con las ventas nuevas
+        self.agregados_ven = agregados_desde_ventas(df_ven)
+        self.cubo.invalidar()
+        self.marcar_cambio(SHEET_VEN, SHEET_GAN)
+        self.persistir()
+        self.refrescar_vistas()
+        messagebox.showinfo("OK", "Ventas recosteadas con FIFO")
+
+    def _calcular_resumen_pagos(self):
+        df = self.df_res.copy().fillna(0)
+        cols = ["TotalEfectivo", "TotalTransferencia", "TotalFiado", "TotalPagado", "DeudaActual"]
+        num = df[cols].apply(pd.to_numeric, errors="coerce").fillna(0.0)
+
+        def fecha_legible(fecha):
+            if pd.isna(fecha) or str(fecha).strip() == "" or fecha == 0:
+                return "Nunca"
+            try:
+                return datetime.fromisoformat(str(fecha)).strftime("%d/%m/%Y %H:%M")
+            except Exception:
+                return str(fecha)
+
+        filas = [
+            (str(p), f"{e:.2f}", f"{t:.2f}", f"{f:.2f}", f"{g:.2f}", f"{d:.2f}", fecha_legible(u))
+            for p, e, t, f, g, d, u in zip(
+                df["Persona"], num["TotalEfectivo"], num["TotalTransferencia"], num["TotalFiado"],
+                num["TotalPagado"], num["DeudaActual"], df["UltimaActualizacion"],
+            )
+        ]
+        totales = tuple(float(num[c].sum()) for c in cols)
+        return filas, totales
+
+    # ---------------- Consolidación de tiendas ----------------
+    def ui_consolidar(self):
+        archivos = filedialog.askopenfilenames(
+            title="Selecciona los libros de cada tienda", filetypes=[("Excel", "*.xlsx")]
+        )
+        if not archivos:
+            return
+        self.update_status(f"Consolidando {len(archivos)} tienda(s)...")
+        t0 = time.perf_counter()
+        pool = ThreadPoolExecutor(max_workers=1)  # el hilo solo espera a los procesos
+        fut = pool.submit(consolidar_tiendas, archivos)
+        pool.shutdown(wait=False)
+
+        def sondear():
+            if not fut.done():
+                self.root.after(100, sondear)
+                return
+            try:
+                res = fut.result()
+            except Exception as e:
+                self.update_status("")
+                messagebox.showerror("Error al consolidar", str(e))
+                return
+            seg = time.perf_counter() - t0
+            self.update_status(f"{len(archivos)} tienda(s) consolidadas en {seg:.1f} s")
+            self._mostrar_consolidado(res, seg)
+
+        self.root.after(100, sondear)
+
+    def _mostrar_consolidado(self, res, seg):
+        win = tk.Toplevel(self.root)
+        win.title("Consolidado de tiendas - Delicias de la Wera")
+        win.geometry("980x520")
+
+        ttk.Label(
+            win, text=f"Tiendas: {', '.join(res['tiendas'])} | {len(res['ventas'])} movimientos | {seg:.1f} s",
+            font=("Arial", 10, "bold"),
+        ).pack(anchor="w", padx=8, pady=6)
+
+        nb = ttk.Notebook(win)
+        nb.pack(fill="both", expand=True, padx=8, pady=4)
+
+        def pestana(titulo, df):
+            frame = ttk.Frame(nb)
+            nb.add(frame, text=titulo)
+            cols = list(df.columns)
+            tree = ttk.Treeview(frame, columns=cols, show="headings", height=16)
+            for c in cols:
+                tree.heading(c, text=c)
+                tree.column(c, anchor="center", width=max(90, 880 // max(len(cols), 1)))
+            tree.pack(fill="both", expand=True)
+            for fila in df.itertuples(index=False):
+                tree.insert("", "end", values=[f"{v:.2f}" if isinstance(v, float) else v for v in fila])
+
+        pestana("KPIs", res["kpis"])
+        pestana("Ganancias mensual", res["ganancias"])
+        pestana("Deudores", res["deudores"])
+        pestana("Inventario", res["inventario"])
+
+        def exportar():
+            ruta = filedialog.asksaveasfilename(
+                parent=win, title="Guardar consolidado", defaultextension=".xlsx",
+                initialfile=f"consolidado_{date.today().isoformat()}.xlsx", filetypes=[("Excel", "*.xlsx")],
+            )
+            if not ruta:
+                return
+            try:
+                with pd.ExcelWriter(ruta, engine="openpyxl") as w:
+                    res["kpis"].to_excel(w, sheet_name="KPIs", index=False)
+                    res["ganancias"].to_excel(w, sheet_name=SHEET_GAN, index=False)
+                    res["deudores"].to_excel(w, sheet_name="Deudores", index=False)
+                    res["inventario"].to_excel(w, sheet_name=SHEET_INV, index=False)
+                    res["ventas"].to_excel(w, sheet_name=SHEET_VEN, index=False)
+                messagebox.showinfo("Exportado", f"Consolidado guardado en:\n{ruta}", parent=win)
+            except Exception as e:
+                messagebox.showerror("Error", str(e), parent=win)
+
+        ttk.Button(win, text="Exportar consolidado", command=exportar).pack(anchor="e", padx=8, pady=6)
+
+    # ---------------- Conciliación bancaria ----------------
+    def ui_conciliar_banco(self):
+        ruta = filedialog.askopenfilename(
+            title="Estado de cuenta del banco", filetypes=[("CSV", "*.csv"), ("Todos", "*.*")]
+        )
+        if not ruta:
+            return
+        self.update_status("Conciliando transferencias...")
+        t0 = time.perf_counter()
+        df_tra = self.df_tra
+        pool = ThreadPoolExecutor(max_workers=1)
+        fut = pool.submit(lambda: conciliar_transferencias(df_tra, leer_estado_cuenta(ruta)))
+        pool.shutdown(wait=False)
+
+        def sondear():
+            if not fut.done():
+                self.root.after(100, sondear)
+                return
+            try:
+                res = fut.result()
+            except Exception as e:
+                self.update_status("")
+                messagebox.showerror("Error al conciliar", str(e))
+                return
+            seg = time.perf_counter() - t0
+            self.update_status(f"Conciliación lista en {seg:.1f} s")
+            self._mostrar_conciliacion(res, seg, os.path.basename(ruta))
+
+        self.root.after(100, sondear)
+
+    def _mostrar_conciliacion(self, res, seg, nombre):
+        win = tk.Toplevel(self.root)
+        win.title(f"Conciliación bancaria ({nombre}) - Delicias de la Wera")
+        win.geometry("1050x520")
+
+        conteo = res["Estado"].value_counts()
+        ttk.Label(
+            win, text=" | ".join(f"{e}: {n}" for e, n in conteo.items()) + f" | {seg:.1f} s",
+            font=("Arial", 10, "bold"),
+        ).pack(anchor="w", padx=8, pady=6)
+
+        top = ttk.Frame(win)
+        top.pack(fill="x", padx=8)
+        ttk.Label(top, text="Mostrar:").pack(side="left")
+        opciones = ["Pendientes (todo menos Conciliado)", "Todos", *conteo.index]
+        filtro_var = tk.StringVar(value=opciones[0])
+        cb = ttk.Combobox(top, textvariable=filtro_var, values=opciones, state="readonly", width=34)
+        cb.pack(side="left", padx=6)
+        info_var = tk.StringVar()
+        ttk.Label(top, textvariable=info_var).pack(side="left", padx=10)
+
+        cols = list(res.columns)
+        tree = ttk.Treeview(win, columns=cols, show="headings", height=16)
+        for c in cols:
+            tree.heading(c, text=c)
+            tree.column(c, anchor="center", width=100)
+        tree.column("Persona", width=150)
+        tree.column("Estado", width=160)
+        tree.pack(fill="both", expand=True, padx=8, pady=6)
+
+        def mostrar(event=None):
+            f = filtro_var.get()
+            if f == opciones[0]:
+                df = res[res["Estado"] != "Conciliado"]
+            elif f == "Todos":
+                df = res
+            else:
+                df = res[res["Estado"] == f]
+            tree.delete(*tree.get_children())
+            for fila in df.head(CONCILIACION_FILAS_VISTA).itertuples(index=False):
+                tree.insert("", "end", values=[
+                    "" if isinstance(v, float) and v != v else f"{v:.2f}" if isinstance(v, float) else v
+                    for v in fila
+                ])
+            info_var.set(f"{min(len(df), CONCILIACION_FILAS_VISTA)} de {len(df)} fila(s)")
+
+        cb.bind("<<ComboboxSelected>>", mostrar)
+        mostrar()
+
+        def exportar():
+            destino = filedialog.asksaveasfilename(
+                parent=win, title="Guardar conciliación", defaultextension=".xlsx",
+                initialfile=f"conciliacion_{date.today().isoformat()}.xlsx", filetypes=[("Excel", "*.xlsx")],
+            )
+            if not destino:
+                return
+            try:
+                res.to_excel(destino, sheet_name="Conciliacion", index=False)
+                messagebox.showinfo("Exportado", f"Conciliación guardada en:\n{destino}", parent=win)
+            except Exception as e:
+                messagebox.showerror("Error", str(e), parent=win)
+
+        ttk.Button(win, text="Exportar conciliación", command=exportar).pack(anchor="e", padx=8, pady=6)
+
+    # ---------------- Diagnóstico ----------------
+    def ui_diagnostico(self):
+        st = self.cache.estadisticas()
+        lineas = [
+            f"Arranque: {getattr(self, 'tiempo_arranque_ms', 0.0):.0f} ms",
+            "",
+            f"Caché: {st['entradas']}/{st['max_entradas']} entradas",
+            f"Aciertos: {st['aciertos']} | Fallos: {st['fallos']} | Expulsiones: {st['expulsiones']}",
+            f"Tasa de aciertos: {st['tasa_aciertos'] * 100:.0f}%",
+            "",
+            "Versiones por hoja: " + ", ".join(f"{h}={v}" for h, v in self.versiones.items()),
+        ]
+        t0 = time.perf_counter()
+        completa = antiguedad_deudas(self.df_ven)
+        ms = (time.perf_counter() - t0) * 1000
+        igual = self.antiguedad.tabla(self.df_ven).equals(completa)
+        lineas.append(
+            f"Antigüedad de deudas: incremental {'= ' if igual else 'DISTINTA de '}"
+            f"reconstrucción completa ({len(completa)} persona(s), {ms:.0f} ms)"
+        )
+        messagebox.showinfo("Diagnóstico", "\n".join(lineas))
+
     # ---------------- Export / Backup ----------------
     def exportar(self):
         folder = filedialog.askdirectory(title="Selecciona carpeta para exportar el archivo .xlsx")
         if not folder:
             return
         try:
-            self.recalcular_ganancias_mensuales()
-            guardar_todo(self.df_inv, self.df_ven, self.df_deu, self.df_tra, self.df_res, self.df_gan)
+            self.persistir()
+            self._vaciar_guardado()
             shutil.copy(DATA_FILE, os.path.join(folder, DATA_FILE))
             messagebox.showinfo("Exportado", f"Archivo exportado a:\n{os.path.join(folder, DATA_FILE)}")
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
     def ui_backup(self):
+        self._vaciar_guardado()
         dest = hacer_backup()
         if str(dest).startswith("Error"):
             messagebox.showerror("Error backup", dest)
@@ -1043,10 +4620,84 @@ class DeliciasApp:
 
 
 def main():
-    root = tk.Tk()
-    app = DeliciasApp(root)
+    args = sys.argv[1:]
+    if "--perfil-arranque" in args:
+        perfil_arranque()
+        return
+    if "--bench-consolidacion" in args:
+        i = args.index("--bench-consolidacion")
+        nums = [int(a) for a in args[i + 1:i + 3] if a.isdigit()]
+        bench_consolidacion(*nums)
+        return
+    if "--bench-cubo" in args:
+        i = args.index("--bench-cubo")
+        nums = [int(a) for a in args[i + 1:] if a.isdigit()]
+        bench_cubo(*([nums] if nums else []))
+        return
+    if "--bench-revision" in args:
+        i = args.index("--bench-revision")
+        n = int(args[i + 1]) if i + 1 < len(args) and args[i + 1].isdigit() else 1_000_000
+        bench_revision(n)
+        return
+    if "--bench-conciliacion" in args:
+        i = args.index("--bench-conciliacion")
+        nums = [int(a) for a in args[i + 1:i + 3] if a.isdigit()]
+        bench_conciliacion(*nums)
+        return
+    if "--bench-escaner" in args:
+        i = args.index("--bench-escaner")
+        nums = [int(a) for a in args[i + 1:i + 3] if a.isdigit()]
+        bench_escaner(*nums)
+        return
+    if "--bench-lectura-ventas" in args:
+        i = args.index("--bench-lectura-ventas")
+        n = int(args[i + 1]) if i + 1 < len(args) and args[i + 1].isdigit() else 1_000_000
+        bench_lectura_ventas(n)
+        return
+
+    root = _ventana_principal()
+
+    # ventana provisional mientras se importa pandas y se leen las hojas (en otro hilo);
+    # se quita cuando la app ya está armada
+    splash = ttk.Label(root, text="Cargando Delicias de la Wera...", font=("Arial", 14), padding=40)
+    splash.pack(expand=True)
+    root.update()
+    _cerrar_splash_pyinstaller()
+
+    def leer():
+        asegurarmisarchivos()
+        return leer_hojas_chicas()
+
+    pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="arranque")
+    fut = pool.submit(leer)
+    pool.shutdown(wait=False)
+    app = None
+
+    def armar():
+        nonlocal app
+        if not fut.done():
+            root.after(50, armar)
+            return
+        try:
+            leidas = fut.result()
+            splash.destroy()
+            app = DeliciasApp(root, leidas)
+        except Exception:
+            root.destroy()  # sin app no hay nada que mostrar; el error sale en consola
+            raise
+        if "--salir-al-iniciar" in args:
+            # para medir arranque en frío desde fuera (Measure-Command / time)
+            root.after(0, lambda: root.after_idle(root.destroy))
+
+    root.after(50, armar)
     root.mainloop()
 
+    if "--salir-al-iniciar" in args:
+        print(f"Listo en {getattr(app, 'tiempo_arranque_ms', 0.0):.0f} ms", flush=True)
+        os._exit(0)  # no esperar la lectura de Ventas en otro hilo: no hay nada que guardar
+
 
 if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()  # necesario para ProcessPoolExecutor dentro del .exe
     main()
@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Delicias_de_la_wera_inventario as app  # noqa: E402
+
+
+def _ventas(filas):
+    """Ventas con las columnas de la hoja; cada fila es un dict con lo que importa a la prueba."""
+    base = {"Fecha": "", "Código": "", "Nombre": "", "Cantidad": 1, "PrecioVenta": 0.0, "PrecioCompra": 0.0,
+            "Total": 0.0, "Ganancia": 0.0, "Persona": "", "Tipo": "Efectivo", "Descripción": ""}
+    df = pd.DataFrame([{**base, **f} for f in filas], columns=app.VEN_COLS)
+    df["Cantidad"] = df["Cantidad"].astype("int64")
+    for c in ("PrecioVenta", "PrecioCompra", "Total", "Ganancia"):
+        df[c] = df[c].astype(float)
+    return df
+
+
+@pytest.fixture
+def hacer_ventas():
+    return _ventas
+
+
+@pytest.fixture
+def en_carpeta(tmp_path, monkeypatch):
+    """Corre la prueba dentro de tmp_path (el libro y los respaldos van a la carpeta actual)."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,87 @@
+import random
+from datetime import date, timedelta
+
+import pandas as pd
+
+import Delicias_de_la_wera_inventario as app
+
+HOY = date(2026, 6, 30)
+
+
+def _fecha(dias_atras):
+    return (HOY - timedelta(days=dias_atras)).isoformat() + "T12:00:00"
+
+
+def test_tramos_y_pagos_del_mas_viejo(hacer_ventas):
+    ven = hacer_ventas([
+        {"Fecha": _fecha(91), "Persona": "Ana", "Tipo": "Fiado", "Total": 50.0},
+        {"Fecha": _fecha(90), "Persona": "Ana", "Tipo": "Fiado", "Total": 40.0},
+        {"Fecha": _fecha(31), "Persona": "Ana", "Tipo": "Fiado", "Total": 30.0},
+        {"Fecha": _fecha(30), "Persona": "Ana", "Tipo": "Fiado", "Total": 20.0},
+        {"Fecha": _fecha(0), "Persona": "Ana", "Tipo": "Pago", "Total": 60.0},  # liquida 50 y deja 30 del de 40
+        {"Fecha": "no es fecha", "Persona": " Luis ", "Tipo": "Fiado", "Total": 12.5},
+        {"Fecha": _fecha(5), "Persona": "Eva", "Tipo": "Fiado", "Total": 10.0},
+        {"Fecha": _fecha(1), "Persona": "Eva", "Tipo": "Pago", "Total": 25.0},
+        {"Fecha": _fecha(2), "Persona": "Ana", "Tipo": "Efectivo", "Total": 99.0},  # no es deuda
+    ])
+    t = app.antiguedad_deudas(ven, HOY).set_index("Persona")
+
+    assert list(t.index) == ["Ana", "Eva", "Luis"]
+    assert t.loc["Ana", ["0-30", "31-60", "61-90", "90+", "Pendiente", "AFavor"]].tolist() == [20.0, 30.0, 30.0, 0.0, 80.0, 0.0]
+    assert t.loc["Ana", "DiasMasVieja"] == 90
+    assert t.loc["Eva", ["Pendiente", "AFavor", "DiasMasVieja"]].tolist() == [0.0, 15.0, 0]
+    assert not t.loc["Ana", "FechaDesconocida"]
+    # fecha ilegible: va al tramo más viejo y se marca; no hay días que mostrar
+    assert t.loc["Luis", ["90+", "DiasMasVieja", "FechaDesconocida"]].tolist() == [12.5, 0, True]
+
+
+def test_fecha_ilegible_no_borra_los_dias_de_la_deuda_fechada(hacer_ventas):
+    ven = hacer_ventas([
+        {"Fecha": _fecha(10), "Persona": "Rosa", "Tipo": "Fiado", "Total": 20.0},
+        {"Fecha": "31/02/2026", "Persona": "Rosa", "Tipo": "Fiado", "Total": 5.0},
+        {"Fecha": "", "Persona": "Beto", "Tipo": "Fiado", "Total": 5.0},
+        {"Fecha": _fecha(40), "Persona": "Beto", "Tipo": "Fiado", "Total": 20.0},
+        {"Fecha": _fecha(1), "Persona": "Beto", "Tipo": "Pago", "Total": 5.0},  # paga el de fecha ilegible
+    ])
+    t = app.antiguedad_deudas(ven, HOY).set_index("Persona")
+    assert t.loc["Rosa", ["0-30", "90+", "DiasMasVieja", "FechaDesconocida"]].tolist() == [20.0, 5.0, 10, True]
+    assert t.loc["Beto", ["31-60", "90+", "DiasMasVieja", "FechaDesconocida"]].tolist() == [20.0, 0.0, 40, False]
+
+
+def _movimientos(rnd, n):
+    personas = ["Ana", "Luis", "Eva", "Beto"]
+    filas = []
+    for _ in range(n):
+        tipo = rnd.choice(["Fiado", "Fiado", "Pago", "Efectivo"])
+        filas.append({
+            "Fecha": _fecha(rnd.randint(0, 200)) if rnd.random() > 0.03 else "31/02/2026",
+            "Persona": rnd.choice(personas) + (" " if rnd.random() < 0.1 else ""),
+            "Tipo": tipo,
+            "Total": round(rnd.uniform(1, 120), 2),
+        })
+    return filas
+
+
+def test_incremental_igual_a_reconstruccion(hacer_ventas):
+    rnd = random.Random(40)
+    for _ in range(30):
+        filas = _movimientos(rnd, rnd.randint(1, 60))
+        corte = rnd.randint(0, len(filas))
+
+        motor = app.AntiguedadDeudas()
+        motor.reconstruir(hacer_ventas(filas[:corte]))
+        for f in filas[corte:]:
+            motor.registrar(f["Persona"], f["Tipo"], f["Total"], f["Fecha"])
+
+        completa = app.antiguedad_deudas(hacer_ventas(filas), HOY)
+        pd.testing.assert_frame_equal(motor.tabla(None, HOY), completa, check_dtype=False)
+
+
+def test_tabla_reconstruye_si_no_esta_lista(hacer_ventas):
+    ven = hacer_ventas(_movimientos(random.Random(1), 25))
+    motor = app.AntiguedadDeudas()
+    assert not motor.listo
+    pd.testing.assert_frame_equal(motor.tabla(ven, HOY), app.antiguedad_deudas(ven, HOY))
+    assert motor.listo
+    motor.invalidar()
+    assert not motor.listo
@@ -0,0 +1,54 @@
+import pandas as pd
+
+import Delicias_de_la_wera_inventario as app
+
+
+def _ventas(hacer_ventas):
+    return hacer_ventas([
+        {"Fecha": "2026-01-05T10:00:00", "Persona": "Ana", "Tipo": "Fiado", "Total": 100.0, "Ganancia": 40.0},
+        {"Fecha": "2026-01-20T10:00:00", "Persona": " Ana", "Tipo": "Pago", "Total": 30.0},
+        {"Fecha": "2026-02-01T10:00:00", "Persona": "Luis", "Tipo": "Efectivo", "Total": 20.0, "Ganancia": 5.0},
+        {"Fecha": "2026-02-02T10:00:00", "Persona": "Luis", "Tipo": "Transferencia", "Total": 15.0, "Ganancia": 4.0},
+        {"Fecha": "no es fecha", "Persona": "", "Tipo": "Efectivo", "Total": 9.0, "Ganancia": 1.0},
+    ])
+
+
+def test_reconstruir_derivadas(hacer_ventas):
+    rec = app.reconstruir_derivadas(_ventas(hacer_ventas))
+
+    deu = rec[app.SHEET_DEU].set_index("Persona")
+    assert list(deu.index) == ["Ana"]  # Luis no tiene Fiado ni Pago
+    assert deu.loc["Ana", ["Adeuda", "Pagado", "TotalDeuda"]].tolist() == [100.0, 30.0, 70.0]
+    assert deu.loc["Ana", "Estado"] == "ADEUDA $70.00"
+
+    res = rec[app.SHEET_RES].set_index("Persona")
+    assert sorted(res.index) == ["Ana", "Luis"]  # la fila sin persona no entra
+    assert res.loc["Luis", ["TotalEfectivo", "TotalTransferencia", "DeudaActual"]].tolist() == [20.0, 15.0, 0.0]
+
+    gan = rec[app.SHEET_GAN].set_index("Mes")
+    assert gan.loc["2026-01", ["TotalVentasMes", "TotalGananciaMes"]].tolist() == [100.0, 40.0]  # sin el Pago
+    assert gan.loc["2026-02", ["TotalVentasMes", "TotalGananciaMes"]].tolist() == [35.0, 9.0]
+    assert len(gan) == 2  # la fecha ilegible no forma mes
+
+
+def test_auditar_sin_diferencias(hacer_ventas):
+    ven = _ventas(hacer_ventas)
+    rec = app.reconstruir_derivadas(ven)
+    tra = ven[ven["Tipo"] == "Transferencia"]
+    dif, _ = app.auditar_derivadas(ven, tra, rec[app.SHEET_DEU], rec[app.SHEET_RES], rec[app.SHEET_GAN])
+    assert dif.empty
+
+
+def test_auditar_reporta_cada_celda_distinta(hacer_ventas):
+    ven = _ventas(hacer_ventas)
+    rec = app.reconstruir_derivadas(ven)
+    deu = rec[app.SHEET_DEU].copy()
+    deu.loc[0, "Pagado"] = 10.0
+    tra = pd.DataFrame(columns=app._df_vacio_por_hoja(app.SHEET_TRA).columns)  # falta la transferencia de Luis
+
+    dif, _ = app.auditar_derivadas(ven, tra, deu, rec[app.SHEET_RES], rec[app.SHEET_GAN])
+    por_celda = dif.set_index(["Hoja", "Clave", "Columna"])
+    assert por_celda.loc[(app.SHEET_DEU, "Ana", "Pagado"), "Diferencia"] == 20.0
+    assert por_celda.loc[(app.SHEET_TRA, "Luis", "Total"), "Reconstruido"] == 15.0
+    assert por_celda.loc[(app.SHEET_TRA, "Luis", "Movimientos"), "Reconstruido"] == 1.0
+    assert len(dif) == 3  # TotalDeuda guardado sigue coincidiendo
@@ -0,0 +1,39 @@
+import Delicias_de_la_wera_inventario as app
+
+
+def test_lru_expulsa_la_menos_usada():
+    cache = app.CacheResultados(max_entradas=2)
+    calculos = []
+
+    def calcular(valor):
+        calculos.append(valor)
+        return valor
+
+    assert cache.obtener("a", lambda: calcular(1)) == 1
+    assert cache.obtener("b", lambda: calcular(2)) == 2
+    assert cache.obtener("a", lambda: calcular(99)) == 1  # acierto: "a" pasa a ser la más reciente
+    assert cache.obtener("c", lambda: calcular(3)) == 3   # expulsa "b", no "a"
+    assert cache.buscar("b") == (False, None)
+    assert cache.buscar("a") == (True, 1)
+    assert calculos == [1, 2, 3]
+
+    est = cache.estadisticas()
+    assert (est["entradas"], est["expulsiones"]) == (2, 1)
+    assert (est["aciertos"], est["fallos"]) == (2, 4)
+
+
+def test_clave_con_version_recalcula_al_cambiar_la_hoja():
+    cache = app.CacheResultados()
+    versiones = dict.fromkeys(app.HOJAS, 0)
+    calculos = []
+
+    def reporte():
+        return cache.obtener(("reporte", versiones[app.SHEET_VEN]),
+                             lambda: calculos.append(versiones[app.SHEET_VEN]) or len(calculos))
+
+    assert reporte() == reporte() == 1
+    versiones[app.SHEET_INV] += 1  # otra hoja: la clave no cambia
+    assert reporte() == 1
+    versiones[app.SHEET_VEN] += 1
+    assert reporte() == 2
+    assert calculos == [0, 1]
@@ -0,0 +1,110 @@
+import random
+
+import pandas as pd
+
+import Delicias_de_la_wera_inventario as app
+
+TOL = app.CONCILIACION_TOLERANCIA_DIAS
+
+
+def _maximo_de_parejas(izq, der, tol):
+    """Emparejamiento bipartito máximo por caminos aumentantes (fuerza bruta para comparar)."""
+    pareja = {}
+
+    def aumentar(j, vistos):
+        for i in izq.index:
+            if i in vistos or izq.at[i, "_k"] != der.at[j, "_k"] or abs(izq.at[i, "_dt"] - der.at[j, "_dt"]) > tol:
+                continue
+            vistos.add(i)
+            if i not in pareja or aumentar(pareja[i], vistos):
+                pareja[i] = j
+                return True
+        return False
+
+    return sum(aumentar(j, set()) for j in der.index)
+
+
+def test_emparejar_da_el_maximo_y_respeta_la_ventana():
+    rnd = random.Random(38)
+    tol = pd.Timedelta(days=TOL)
+    for _ in range(200):
+        def lado(n, desde):
+            return pd.DataFrame({
+                "_k": [rnd.randint(0, 2) for _ in range(n)],
+                "_dt": [pd.Timestamp("2026-01-01") + pd.Timedelta(hours=rnd.randint(0, 24 * 15)) for _ in range(n)],
+            }, index=range(desde, desde + n))
+
+        izq, der = lado(rnd.randint(0, 8), 100), lado(rnd.randint(0, 8), 500)
+        pares = app._emparejar(izq, der, ["_k"], tol)
+
+        assert pares["_i"].is_unique and pares["_j"].is_unique
+        for i, j in zip(pares["_i"], pares["_j"]):
+            assert izq.at[i, "_k"] == der.at[j, "_k"]
+            assert abs(izq.at[i, "_dt"] - der.at[j, "_dt"]) <= tol
+        assert len(pares) == _maximo_de_parejas(izq, der, tol)
+
+
+def _transferencias(filas):
+    return pd.DataFrame(filas, columns=["Fecha", "Total", "Persona", "Cuenta"])
+
+
+def _banco(filas):
+    df = pd.DataFrame(filas, columns=["Fecha", "Monto", "Cuenta", "Concepto"])
+    df["Fecha"] = pd.to_datetime(df["Fecha"])
+    df["Fila"] = range(2, len(df) + 2)
+    return df
+
+
+def test_conciliar_dentro_de_la_tolerancia():
+    tra = _transferencias([
+        ["2026-03-01T10:00:00", 150.0, "Ana", "1234"],      # depósito 3 días después: entra
+        ["2026-03-01T10:00:00", 200.0, "Luis", "5678"],     # depósito 3 días y 14 h después: fuera
+        ["2026-03-02T10:00:00", 80.0, "Eva", ""],           # sin cuenta: solo por monto
+        ["2026-03-03T09:00:00", 99.0, "Beto", "4321"],      # misma cuenta, otro monto
+        ["no es fecha", 10.0, "Ana", "1234"],
+        ["2026-03-01T12:00:00", 150.0, "Ana", "1234"],      # la misma venta capturada dos veces
+    ])
+    banco = _banco([
+        ["2026-03-04", 150.0, "****1234", "SPEI"],
+        ["2026-03-05", 200.0, "****5678", "SPEI"],
+        ["2026-03-02", 80.0, "****9999", "SPEI"],
+        ["2026-03-03", 90.0, "**4321", "SPEI"],
+    ])
+    res = app.conciliar_transferencias(tra, banco)
+
+    ventas = res[res["Origen"] == app.SHEET_TRA]
+    assert ventas["Estado"].tolist() == ["Conciliado", "Sin movimiento bancario", "Conciliado", "Parcial",
+                                         "Fecha inválida", "Duplicado"]
+    assert ventas["FechaBanco"].tolist()[:4] == ["2026-03-04", "", "2026-03-02", "2026-03-03"]
+    assert ventas["Diferencia"].iloc[3] == -9.0
+
+    sobran = res[res["Origen"] == "Banco"]
+    assert sobran[["Fila", "Estado"]].values.tolist() == [[3, "Movimiento sin venta"]]
+
+
+def test_conciliar_cada_deposito_una_sola_vez():
+    # el mismo depósito en dos estados que se traslapan: una venta concilia, la otra
+    # queda fuera de la ventana y el depósito repetido no se le asigna a nadie
+    tra = _transferencias([
+        ["2026-03-01T10:00:00", 50.0, "Ana", "1234"],
+        ["2026-03-06T10:00:00", 50.0, "Ana", "1234"],
+    ])
+    banco = _banco([["2026-03-03", 50.0, "1234", "SPEI"], ["2026-03-03", 50.0, "1234", "SPEI"]])
+    res = app.conciliar_transferencias(tra, banco)
+    assert res["Estado"].tolist() == ["Conciliado", "Sin movimiento bancario", "Duplicado"]
+
+
+def test_leer_estado_cuenta(tmp_path):
+    ruta = tmp_path / "estado.csv"
+    ruta.write_text(
+        "Fecha;Concepto;Cargo;Abono;Cuenta\n"
+        "03/02/2026;SPEI RECIBIDO;;$1,234.50;****1234\n"
+        "04/02/2026;COMISION;15.00;;\n"
+        "05/02/2026;SPEI RECIBIDO;;80,5;\n",
+        encoding="latin-1",
+    )
+    mov = app.leer_estado_cuenta(ruta)
+    assert mov["Monto"].tolist() == [1234.5, 80.5]
+    assert mov["Fecha"].dt.strftime("%Y-%m-%d").tolist() == ["2026-02-03", "2026-02-05"]
+    assert mov["Fila"].tolist() == [2, 4]
+    assert mov["Cuenta"].tolist() == ["****1234", ""]
@@ -0,0 +1,61 @@
+import pandas as pd
+
+import Delicias_de_la_wera_inventario as app
+
+
+def _tienda(ruta, inventario, ventas, deudas):
+    with pd.ExcelWriter(ruta, engine="openpyxl") as w:
+        pd.DataFrame(inventario, columns=app.INV_COLS).to_excel(w, sheet_name=app.SHEET_INV, index=False)
+        pd.DataFrame(ventas, columns=app.VEN_COLS).to_excel(w, sheet_name=app.SHEET_VEN, index=False)
+        pd.DataFrame(deudas, columns=["Persona", "Adeuda", "Pagado", "TotalDeuda", "Estado"]).to_excel(
+            w, sheet_name=app.SHEET_DEU, index=False)
+
+
+def _venta(fecha, codigo, cantidad, total, ganancia, tipo="Efectivo", persona=""):
+    return [fecha, codigo, codigo, cantidad, total / cantidad, 0.0, total, ganancia, persona, tipo, ""]
+
+
+def _libros(carpeta):
+    (carpeta / "norte").mkdir()
+    (carpeta / "sur").mkdir()
+    norte, sur = carpeta / "norte" / "tienda.xlsx", carpeta / "sur" / "tienda.xlsx"
+    _tienda(norte,
+            [["A", "Pan", 5, 10, 4, "Panadería"], ["B", "Leche", 15, 22, 2, "Lácteos"]],
+            [_venta("2026-01-10T10:00:00", "A", 2, 20.0, 10.0),
+             _venta("2026-02-03T10:00:00", "B", 1, 22.0, 7.0, "Fiado", "Ana")],
+            [["Ana", 22, 0, 22, "ADEUDA $22.00"]])
+    _tienda(sur,
+            [["A", "Pan", 5, 10, 6, "Panadería"]],
+            [_venta("2026-01-15T10:00:00", "A", 3, 30.0, 15.0),
+             _venta("2026-01-16T10:00:00", "", 1, 5.0, 0.0, "Pago", "Ana")],
+            [["Ana", 10, 5, 5, "ADEUDA $5.00"], [" ", 1, 0, 1, ""]])
+    return [str(norte), str(sur)]
+
+
+def test_combina_inventario_ventas_y_deudores(tmp_path):
+    res = app.consolidar_tiendas(_libros(tmp_path), paralelo=False)
+
+    # el mismo nombre de archivo en dos carpetas: se distinguen por la carpeta
+    assert res["tiendas"] == ["norte/tienda", "sur/tienda"]
+
+    inv = res["inventario"].set_index("Código")
+    assert inv.loc["A", ["Stock", "Stock norte/tienda", "Stock sur/tienda"]].tolist() == [10, 4, 6]
+    assert inv.loc["B", ["Stock", "Stock norte/tienda", "Stock sur/tienda"]].tolist() == [2, 2, 0]
+
+    assert len(res["ventas"]) == 4
+    gan = res["ganancias"].set_index("Mes")
+    assert gan.loc["2026-01", ["TotalVentasMes", "Ventas norte/tienda", "Ventas sur/tienda"]].tolist() == [50.0, 20.0, 30.0]
+    assert gan.loc["2026-02", "TotalGananciaMes"] == 7.0
+
+    deu = res["deudores"].set_index("Persona")
+    assert list(deu.index) == ["Ana"]  # la persona en blanco no cuenta
+    assert deu.loc["Ana", ["Adeuda", "Pagado", "TotalDeuda"]].tolist() == [32.0, 5.0, 27.0]
+    assert deu.loc["Ana", "Tiendas"] == "norte/tienda, sur/tienda"
+
+
+def test_paralelo_igual_a_secuencial(tmp_path):
+    archivos = _libros(tmp_path)
+    secuencial = app.consolidar_tiendas(archivos, paralelo=False)
+    paralelo = app.consolidar_tiendas(archivos, paralelo=True, procesos=2)
+    for clave in ("inventario", "ventas", "kpis", "ganancias", "deudores"):
+        pd.testing.assert_frame_equal(paralelo[clave], secuencial[clave])
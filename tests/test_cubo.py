@@ -0,0 +1,101 @@
+import random
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import Delicias_de_la_wera_inventario as app
+
+MEDIDAS = list(app.MEDIDAS_CUBO)
+
+
+def _inventario():
+    return pd.DataFrame([
+        ["A", "Pan", 5, 10, 9, "Panadería"],
+        ["B", "Leche", 15, 22, 9, np.nan],
+        ["C", "Dulce", 1, 3, 9, ""],
+        ["D", "Queso", 30, 45, 9, "Lácteos"],
+    ], columns=app.INV_COLS)
+
+
+def _ventas(rnd, n):
+    filas = []
+    inicio = datetime(2026, 1, 1, 8)
+    for _ in range(n):
+        fecha = inicio + timedelta(days=rnd.randint(0, 90), hours=rnd.randint(0, 12))
+        cant = rnd.randint(1, 4)
+        filas.append({
+            "Fecha": fecha.isoformat(),
+            "Código": rnd.choice("ABCDE"),  # E no está en el inventario
+            "Cantidad": cant,
+            "Total": cant * 10.0,
+            "Ganancia": cant * 3.5,
+            "Persona": "Ana",
+            "Tipo": rnd.choice(["Efectivo", "Transferencia", "Fiado", "Pago"]),
+        })
+    return filas
+
+
+def _ordenar(df, por):
+    df = df.astype({d: object for d in por if d in ("Categoría", "Tipo", "Código")})
+    return df.sort_values(por, ignore_index=True) if por else df
+
+
+def test_consulta_igual_a_groupby(hacer_ventas):
+    ven = hacer_ventas(_ventas(random.Random(41), 300))
+    cubo = app.CuboVentas()
+    cubo.reconstruir(ven, _inventario())
+
+    v = ven[ven["Tipo"] != "Pago"].copy()
+    v["Hora"] = pd.to_datetime(v["Fecha"]).dt.hour
+    cat = {"A": "Panadería", "D": "Lácteos"}
+    v["Categoría"] = v["Código"].map(cat).fillna("Sin categoría")
+    v["Movimientos"] = 1
+    esperado = v.groupby(["Categoría", "Hora"])[MEDIDAS].sum().reset_index()
+    res = cubo.consultar(["Categoría", "Hora"])
+    pd.testing.assert_frame_equal(_ordenar(res, ["Categoría", "Hora"]), _ordenar(esperado, ["Categoría", "Hora"]),
+                                  check_dtype=False)
+
+    # corte por fechas (inclusive) y filtro
+    dia = pd.to_datetime(v["Fecha"]).dt.date
+    m = (dia >= date(2026, 2, 1)) & (dia <= date(2026, 2, 28)) & (v["Tipo"] == "Fiado")
+    total = cubo.consultar([], date(2026, 2, 1), date(2026, 2, 28), Tipo="Fiado")
+    assert total[MEDIDAS].iloc[0].tolist() == v.loc[m, MEDIDAS].sum().tolist()
+
+
+def test_incremental_igual_a_reconstruccion(hacer_ventas, monkeypatch):
+    monkeypatch.setattr(app, "CUBO_MAX_PENDIENTES", 7)  # que también se integre a mitad de camino
+    rnd = random.Random(2026)
+    filas = _ventas(rnd, 250)
+    inv = _inventario()
+    categoria = dict(zip(inv["Código"], inv["Categoría"]))
+
+    cubo = app.CuboVentas()
+    cubo.reconstruir(hacer_ventas(filas[:100]), inv)
+    for f in filas[100:]:
+        cubo.registrar(f, categoria.get(f["Código"]))  # NaN y "" como vienen del Inventario
+
+    completo = app.CuboVentas()
+    completo.reconstruir(hacer_ventas(filas), inv)
+    for por in (["Dia", "Hora", "Categoría", "Tipo", "Código"], ["Categoría"], ["Hora", "Tipo"], []):
+        for desde, hasta in ((None, None), (date(2026, 2, 10), date(2026, 3, 5))):
+            pd.testing.assert_frame_equal(_ordenar(cubo.consultar(por, desde, hasta), por),
+                                          _ordenar(completo.consultar(por, desde, hasta), por), check_dtype=False)
+    assert "nan" not in set(cubo.consultar(["Categoría"])["Categoría"].astype(str))
+
+
+def test_bajar_siempre_termina():
+    for inicio in app.DIMENSIONES_CUBO:
+        usadas, dim = set(), inicio
+        for _ in range(len(app.DIMENSIONES_CUBO)):
+            usadas.add(dim)
+            nueva = app._dimension_para_bajar(dim, usadas)
+            if nueva is None:
+                break
+            assert nueva not in usadas
+            dim = nueva
+        assert usadas == set(app.DIMENSIONES_CUBO)
+        assert app._dimension_para_bajar(dim, usadas) is None
+    # la sugerida si está libre
+    assert app._dimension_para_bajar("Categoría", {"Categoría"}) == "Código"
+    assert app._dimension_para_bajar("Hora", {"Hora", "Código", "Dia"}) == "Categoría"
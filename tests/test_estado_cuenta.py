@@ -0,0 +1,42 @@
+import Delicias_de_la_wera_inventario as app
+
+
+def _movimientos(hacer_ventas):
+    return hacer_ventas([
+        {"Fecha": "2026-01-01T10:00:00", "Persona": "Ana", "Tipo": "Fiado", "Total": 100.0},
+        {"Fecha": "2026-01-02T10:00:00", "Persona": " Ana ", "Tipo": "Efectivo", "Total": 30.0},
+        {"Fecha": "2026-01-03T10:00:00", "Persona": "Luis", "Tipo": "Fiado", "Total": 50.0},
+        {"Fecha": "2026-01-04T10:00:00", "Persona": "Ana", "Tipo": "Pago", "Total": 40.0},
+        {"Fecha": "2026-01-05T10:00:00", "Persona": None, "Tipo": "Efectivo", "Total": 5.0},
+    ])
+
+
+def test_indice_agrupa_por_persona_sin_espacios(hacer_ventas):
+    ven = _movimientos(hacer_ventas)
+    idx = app.IndicePersonas()
+    assert idx.posiciones("Ana", ven) == [0, 1, 3]
+    assert idx.posiciones("  Luis", ven) == [2]
+    assert idx.posiciones("Nadie", ven) == []
+    assert idx.personas(ven) == ["Ana", "Luis"]
+
+
+def test_agregar_igual_a_reconstruir(hacer_ventas):
+    ven = _movimientos(hacer_ventas)
+    idx = app.IndicePersonas()
+    idx.reconstruir(ven.iloc[:3])
+    for pos in (3, 4):
+        idx.agregar(ven.iloc[pos]["Persona"], pos)
+
+    completo = app.IndicePersonas()
+    for persona in ("Ana", "Luis", ""):
+        assert idx.posiciones(persona, ven) == completo.posiciones(persona, ven)
+
+
+def test_estado_de_cuenta_con_saldo(hacer_ventas):
+    ven = _movimientos(hacer_ventas)
+    idx = app.IndicePersonas()
+    edo = app.estado_de_cuenta(ven, idx.posiciones("Ana", ven))
+    assert edo["Tipo"].tolist() == ["Fiado", "Pago"]  # Efectivo no entra al estado de cuenta
+    assert edo["Cargo"].tolist() == [100.0, 0.0]
+    assert edo["Abono"].tolist() == [0.0, 40.0]
+    assert edo["Saldo"].tolist() == [100.0, 60.0]
@@ -0,0 +1,144 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pandas as pd
+
+import Delicias_de_la_wera_inventario as app
+
+
+class _RootFalso:
+    """Timers de Tk sin pantalla: after() guarda la función y no la corre sola."""
+
+    def __init__(self):
+        self.timers = {}
+
+    def after(self, ms, fn):
+        iid = f"after#{len(self.timers)}"
+        self.timers[iid] = fn
+        return iid
+
+    def after_idle(self, fn):
+        return self.after(0, fn)
+
+    def after_cancel(self, iid):
+        self.timers.pop(iid, None)
+
+
+class _Estado:
+    def __init__(self):
+        self.texto = ""
+
+    def set(self, texto):
+        self.texto = texto
+
+    def get(self):
+        return self.texto
+
+
+def _app_sin_ventana(hacer_ventas):
+    """Solo lo que usa el guardado; la ventana (y la pantalla) no hacen falta."""
+    a = app.DeliciasApp.__new__(app.DeliciasApp)
+    a.root = _RootFalso()
+    a.status_var = _Estado()
+    a._lock_guardado = threading.Lock()
+    a._seq_guardado = a._seq_escrito = 0
+    a._guardado_pendiente = None
+    a._guardado_pool = ThreadPoolExecutor(max_workers=1)
+    a._error_ventas = None
+    a._carga_ventas = None
+    a.lotes = app.LotesFIFO()
+    a.df_inv = pd.DataFrame([["A", "Pan", 5.0, 10.0, 3, "Panadería"]], columns=app.INV_COLS)
+    a.df_ven = hacer_ventas([{"Fecha": "2026-01-05T10:00:00", "Código": "A", "Total": 10.0, "Ganancia": 5.0}])
+    a.agregados_ven = app.agregados_desde_ventas(a.df_ven)
+    a.df_deu = app._df_vacio_por_hoja(app.SHEET_DEU)
+    a.df_res = app._df_vacio_por_hoja(app.SHEET_RES)
+    a.df_gan = app._df_vacio_por_hoja(app.SHEET_GAN)
+    a.df_tra = pd.DataFrame({"Fecha": ["2026-01-05"], "Total": ["10"]})
+    return a
+
+
+def test_instantanea_no_comparte_hojas_editables(hacer_ventas):
+    a = _app_sin_ventana(hacer_ventas)
+    _, (inv, ven, deu, tra, res, gan, lot) = a._instantanea()
+    for vivo, copia in ((a.df_inv, inv), (a.df_deu, deu), (a.df_tra, tra), (a.df_res, res), (a.df_gan, gan)):
+        assert vivo is not copia
+    a.df_tra["Total"] = [99]  # escritura en sitio después de la instantánea
+    a.df_inv.at[0, "Stock"] = 0
+    assert tra["Total"].tolist() == ["10"]
+    assert inv.at[0, "Stock"] == 3
+    a._guardado_pool.shutdown()
+
+
+def test_vaciar_guardado_escribe_lo_pendiente(hacer_ventas, en_carpeta):
+    a = _app_sin_ventana(hacer_ventas)
+    a.persistir(diferido=True)
+    assert a._guardado_pendiente is not None and not (en_carpeta / app.DATA_FILE).exists()
+
+    a._vaciar_guardado()
+    assert a._guardado_pendiente is None and not a.root.timers  # el timer se canceló
+    ven = pd.read_excel(en_carpeta / app.DATA_FILE, sheet_name=app.SHEET_VEN)
+    assert ven["Total"].tolist() == [10.0]
+
+    # una escritura en segundo plano ya encolada también se espera
+    a.df_inv.at[0, "Stock"] = 7
+    a._guardado_pool.submit(a._escribir, a._instantanea())
+    a._vaciar_guardado()
+    assert pd.read_excel(en_carpeta / app.DATA_FILE, sheet_name=app.SHEET_INV)["Stock"].tolist() == [7]
+    a._guardado_pool.shutdown()
+
+
+def test_no_guarda_si_ventas_no_se_pudo_leer(hacer_ventas, en_carpeta):
+    a = _app_sin_ventana(hacer_ventas)
+    a._error_ventas = "archivo dañado"
+    a.persistir()
+    a.persistir(diferido=True)
+    assert not (en_carpeta / app.DATA_FILE).exists()
+    assert a._guardado_pendiente is None
+    assert "NO GUARDADO" in a.status_var.get()
+    a._guardado_pool.shutdown()
+
+
+def test_guardar_espera_la_lectura_de_ventas(hacer_ventas, en_carpeta):
+    a = _app_sin_ventana(hacer_ventas)
+    a.versiones, a.version_catalogo = dict.fromkeys(app.HOJAS, 0), 0
+    a.personas, a.antiguedad, a.cubo = app.IndicePersonas(), app.AntiguedadDeudas(), app.CuboVentas()
+    a.invalidos_carga = {h: {} for h in app.HOJAS}
+    leida = hacer_ventas([{"Fecha": "2026-01-05T10:00:00", "Código": "A", "Total": 10.0},
+                          {"Fecha": "2026-01-06T10:00:00", "Código": "A", "Total": 20.0}])
+    a.df_ven = app._df_vacio_por_hoja(app.SHEET_VEN)  # lo que hay mientras se lee
+    fut = a._carga_ventas = Future()
+    fut.set_result((leida, app.agregados_desde_ventas(leida), app.MotorVelocidad()))
+
+    a.persistir()
+    assert a._carga_ventas is None and a.versiones[app.SHEET_VEN] == 1
+    assert a.version_catalogo == 1  # Ventas nueva: las velocidades en caché ya no valen
+    assert pd.read_excel(en_carpeta / app.DATA_FILE, sheet_name=app.SHEET_VEN)["Total"].tolist() == [10.0, 20.0]
+    assert a._ventas_listas in a.root.timers.values()  # refrescos y avisos, fuera de quien esperó
+
+    # si la lectura falla, nada se guarda encima del archivo
+    fut = a._carga_ventas = Future()
+    fut.set_exception(ValueError("archivo dañado"))
+    a.persistir()
+    assert a._error_ventas == "archivo dañado" and a.df_ven.empty
+    assert "NO GUARDADO" in a.status_var.get()
+    a._guardado_pool.shutdown()
+
+
+def test_venta_no_junta_ventas_ni_sube_hojas_ajenas(hacer_ventas, en_carpeta):
+    a = _app_sin_ventana(hacer_ventas)
+    a.versiones, a.version_catalogo = dict.fromkeys(app.HOJAS, 0), 0
+    a.personas, a.antiguedad, a.cubo = app.IndicePersonas(), app.AntiguedadDeudas(), app.CuboVentas()
+    a.velocidad, a.cache, a._idx_codigo = app.MotorVelocidad(), app.CacheResultados(), None
+    base = a._df_ven
+
+    a._vender(0, "A", 1, "Efectivo", "", "")
+    assert {h for h, v in a.versiones.items() if v} == {app.SHEET_INV, app.SHEET_VEN, app.SHEET_LOT}
+    assert a.version_catalogo == 0
+    seq, (inv, (ven, pendientes), *resto) = a._instantanea()
+    assert ven is base and a._df_ven is base and len(pendientes) == 1  # nada se juntó en la pantalla
+    a._escribir((seq, (inv, (ven, pendientes), *resto)))
+    assert pd.read_excel(en_carpeta / app.DATA_FILE, sheet_name=app.SHEET_VEN)["Total"].tolist() == [10.0, 10.0]
+
+    a._vender(0, "A", 1, "Fiado", "Ana", "")
+    assert a.versiones[app.SHEET_DEU] == a.versiones[app.SHEET_RES] == 1 and a.versiones[app.SHEET_TRA] == 0
+    a._guardado_pool.shutdown()
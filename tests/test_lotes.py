@@ -0,0 +1,140 @@
+import pandas as pd
+
+import Delicias_de_la_wera_inventario as app
+
+
+def test_consume_del_lote_mas_viejo():
+    lotes = app.LotesFIFO()
+    lotes.agregar("A", 3, 10.0, "2026-01-01T09:00:00")
+    lotes.agregar("A", 5, 12.0, "2026-01-10T09:00:00")
+    lotes.agregar("B", 2, 50.0, "2026-01-02T09:00:00")
+
+    assert lotes.consumir("A", 2, 99.0) == 20.0
+    assert lotes.consumir("A", 4, 99.0) == 10.0 + 3 * 12.0  # termina el primero y sigue con el segundo
+    assert lotes.lotes_de("A") == [("2026-01-10T09:00:00", 2, 12.0)]
+    # lo que ningún lote cubre se costea con el respaldo
+    assert lotes.consumir("A", 5, 9.0) == 2 * 12.0 + 3 * 9.0
+    assert lotes.lotes_de("A") == []
+    assert lotes.consumir("Z", 1, 7.0) == 7.0
+    assert lotes.lotes_de("B") == [("2026-01-02T09:00:00", 2, 50.0)]
+
+
+def test_tabla_cargar_y_descartar():
+    lotes = app.LotesFIFO()
+    lotes.agregar("A", 3, 10.0, "2026-01-01T09:00:00")
+    lotes.agregar("A", 0, 11.0)  # sin unidades no es lote
+    lotes.consumir("A", 1, 0.0)
+    tabla = lotes.tabla()
+    assert tabla is lotes.tabla()  # sin cambios no se vuelve a armar
+    assert tabla[["Código", "Cantidad", "Restante"]].values.tolist() == [["A", 3, 2]]
+
+    otra = app.LotesFIFO()
+    otra.cargar(tabla)
+    assert otra.lotes_de("A") == [("2026-01-01T09:00:00", 2, 10.0)]
+    otra.descartar("A")
+    assert otra.lotes_de("A") == []
+    assert otra.tabla()["Restante"].tolist() == [0]
+    assert tabla["Restante"].tolist() == [2]  # la tabla anterior no se toca
+
+
+def test_tabla_se_rearma_solo_con_cambios():
+    lotes = app.LotesFIFO()
+    lotes.agregar("A", 5, 2.0, "2026-01-01")
+    t1 = lotes.tabla()
+    lotes.consumir("Z", 1, 9.0)  # producto sin lotes: nada cambia
+    assert lotes.tabla() is t1
+    lotes.consumir("A", 2, 9.0)
+    t2 = lotes.tabla()
+    assert t2 is not t1 and t2["Restante"].tolist() == [3]
+    lotes.mermar("A", 1, 9.0, "2026-01-02")
+    assert lotes.tabla()["Cantidad"].tolist() == [5, -1]
+    lotes.descartar("A")
+    assert lotes.tabla()["Restante"].tolist() == [0, 0]
+    assert t2["Restante"].tolist() == [3]
+
+
+def test_abrir_inventario_solo_sin_lotes():
+    lotes = app.LotesFIFO()
+    lotes.agregar("A", 1, 5.0, "2026-01-01T09:00:00")
+    inv = pd.DataFrame([["A", "Pan", 5, 10, 4, ""], ["B", "Leche", 15, 22, 2, ""], ["C", "Sal", 3, 6, 0, ""]],
+                       columns=app.INV_COLS)
+    assert lotes.abrir_inventario(inv, "2026-02-01T00:00:00") == 1
+    assert lotes.lotes_de("B") == [("2026-02-01T00:00:00", 2, 15.0)]
+    assert lotes.lotes_de("C") == []
+
+
+def _historia(hacer_ventas, merma=False):
+    """Lotes y ventas pasados por el FIFO en vivo; las ventas guardan el costo que dio."""
+    lotes = app.LotesFIFO()
+    eventos = [
+        ("lote", "A", 4, 10.0, "2026-01-01T09:00:00"),
+        ("lote", "B", 10, 3.0, "2026-01-01T09:00:00"),
+        ("venta", "A", 3, 20.0, "2026-01-02T10:00:00"),
+        ("lote", "A", 4, 14.0, "2026-01-05T09:00:00"),
+        ("venta", "B", 2, 5.0, "2026-01-05T11:00:00"),
+        ("venta", "A", 3, 20.0, "2026-01-06T10:00:00"),
+        ("venta", "A", 4, 20.0, "2026-01-07T10:00:00"),  # una unidad sin lote
+    ]
+    if merma:
+        eventos.insert(3, ("merma", "A", 1, 0.0, "2026-01-03T18:00:00"))
+    filas = []
+    for tipo, codigo, cant, precio, fecha in eventos:
+        if tipo == "lote":
+            lotes.agregar(codigo, cant, precio, fecha)
+        elif tipo == "merma":
+            lotes.mermar(codigo, cant, 0.0, fecha)
+        else:
+            costo = lotes.consumir(codigo, cant, 8.0)
+            filas.append({"Fecha": fecha, "Código": codigo, "Cantidad": cant, "PrecioVenta": precio,
+                          "PrecioCompra": costo / cant, "Total": precio * cant, "Ganancia": precio * cant - costo})
+    return hacer_ventas(filas), lotes.tabla()
+
+
+def test_recosteo_repite_el_fifo_en_vivo(hacer_ventas):
+    ven, lot = _historia(hacer_ventas)
+    # las ventas quedaron con otro costo (p. ej. el PrecioCompra del inventario)
+    viejas = ven.assign(PrecioCompra=1.0, Ganancia=ven["Total"] - ven["Cantidad"] * 1.0)
+    pc, gan, descuadrados = app.recostear_fifo(viejas, lot)
+    assert descuadrados == []
+    pd.testing.assert_series_equal(gan[:3], ven["Ganancia"][:3], check_names=False)
+    # las 2 unidades sin lote conservan el PrecioCompra de la venta (1.0, no el respaldo 8.0)
+    assert pc.iloc[3] == (14.0 * 2 + 1.0 * 2) / 4
+
+
+def test_recosteo_repite_las_mermas(hacer_ventas):
+    ven, lot = _historia(hacer_ventas, merma=True)
+    assert lot["Cantidad"].tolist() == [4, 10, -1, 4]
+    pc, gan, descuadrados = app.recostear_fifo(ven.assign(Ganancia=0.0), lot)
+    assert descuadrados == []
+    # la merma se llevó la última unidad de $10: la segunda venta de A toma 3 de $14 (en vivo también)
+    pd.testing.assert_series_equal(gan[:3], ven["Ganancia"][:3], check_names=False)
+    assert gan[2] == 60.0 - 3 * 14.0
+
+    # sin la fila de merma la repetición daría otro costo
+    _, gan_sin, _ = app.recostear_fifo(ven.assign(Ganancia=0.0), lot[lot["Cantidad"] > 0])
+    assert gan_sin[2] == 60.0 - (10.0 + 2 * 14.0)
+
+
+def test_recosteo_no_toca_productos_que_no_cuadran(hacer_ventas):
+    ven, lot = _historia(hacer_ventas)
+    lot = lot.copy()
+    lot.loc[(lot["Código"] == "B"), "Restante"] = 5  # merma vieja que no quedó anotada
+    viejas = ven.assign(PrecioCompra=1.0, Ganancia=ven["Total"] - ven["Cantidad"] * 1.0)
+    pc, gan, descuadrados = app.recostear_fifo(viejas, lot)
+    assert descuadrados == ["B"]
+    es_b = ven["Código"] == "B"
+    assert (pc[es_b] == 1.0).all()
+    pd.testing.assert_series_equal(gan[~es_b][:2], ven.loc[~es_b, "Ganancia"][:2], check_names=False)
+
+
+def test_recosteo_ignora_pagos_y_ventas_antes_del_lote(hacer_ventas):
+    lot = pd.DataFrame([["2026-01-05T00:00:00", "A", 5, 10.0, 4]], columns=app.LOT_COLS)
+    ven = hacer_ventas([
+        {"Fecha": "2026-01-01T10:00:00", "Código": "A", "Cantidad": 2, "PrecioCompra": 7.0, "Total": 30.0, "Ganancia": 16.0},
+        {"Fecha": "2026-01-06T10:00:00", "Persona": "Ana", "Total": 50.0, "Tipo": "Pago"},
+        {"Fecha": "2026-01-06T11:00:00", "Código": "A", "Cantidad": 1, "PrecioCompra": 7.0, "Total": 15.0, "Ganancia": 8.0},
+    ])
+    pc, gan, descuadrados = app.recostear_fifo(ven, lot)
+    assert descuadrados == []
+    assert pc.tolist() == [7.0, 0.0, 10.0]
+    assert gan.tolist() == [16.0, 0.0, 5.0]
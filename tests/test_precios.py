@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import Delicias_de_la_wera_inventario as app
+
+
+def _inventario():
+    return pd.DataFrame([
+        ["A", "Pan", "6", "10", 3, "Panadería"],
+        ["B", "Leche", "15", "20", 2, None],
+        ["C", "Regalo", "0", "0", 1, "Varios"],
+    ], columns=app.INV_COLS, index=[10, 20, 30])
+
+
+def test_cambio_sobre_precio_de_venta():
+    prev = app.calcular_precios(_inventario(), app.MODOS_PRECIO[0], 10)
+    assert list(prev.index) == [10, 20, 30]  # el índice de df_inv
+    assert prev["PrecioNuevo"].tolist() == [11.0, 22.0, 0.0]
+    assert prev["MargenAntes"].tolist()[:2] == [40.0, 25.0]
+    assert np.isnan(prev["MargenAntes"].iloc[2])  # sin precio no hay margen
+    assert prev["Categoría"].tolist() == ["Panadería", "", "Varios"]
+
+
+def test_margen_deseado_es_margen_sobre_la_venta():
+    inv = _inventario()
+    inv.loc[30, "PrecioVenta"] = "8"  # sin costo pero con precio: la regla no lo puede calcular
+    prev = app.calcular_precios(inv, app.MODOS_PRECIO[1], 40)
+    assert prev["PrecioNuevo"].tolist() == [10.0, 25.0, 8.0]
+    assert prev["MargenDespues"].iloc[:2].round(6).tolist() == [40.0, 40.0]
+    assert prev["Aviso"].tolist() == ["", "", "Sin PrecioCompra"]
+
+
+def test_margen_de_100_o_mas_no_se_puede():
+    with pytest.raises(ValueError):
+        app.calcular_precios(_inventario(), app.MODOS_PRECIO[1], 100)
+
+
+def test_redondeo_y_sin_negativos():
+    prev = app.calcular_precios(_inventario(), app.MODOS_PRECIO[0], 3, redondeo=0.5)
+    assert prev["PrecioNuevo"].tolist() == [10.5, 20.5, 0.0]
+    prev = app.calcular_precios(_inventario(), app.MODOS_PRECIO[0], -150)
+    assert prev["PrecioNuevo"].tolist() == [0.0, 0.0, 0.0]
+    assert (prev["Aviso"] == "").all()  # bajar más del 100% es la regla, no el redondeo
+
+
+def test_redondeo_a_cero_conserva_el_precio():
+    inv = _inventario()
+    inv.loc[10, ["PrecioCompra", "PrecioVenta"]] = ["0.1", "0.3"]
+    prev = app.calcular_precios(inv, app.MODOS_PRECIO[0], 10, redondeo=1.0)
+    assert prev["PrecioNuevo"].tolist() == [0.3, 22.0, 0.0]
+    assert prev["Aviso"].tolist() == ["El redondeo lo dejaba en 0", "", ""]
@@ -0,0 +1,39 @@
+from datetime import date
+
+import pytest
+
+import Delicias_de_la_wera_inventario as app
+
+HOY = date(2026, 3, 18)  # miércoles; la semana empieza el lunes 16
+
+
+def _ventas(hacer_ventas):
+    return hacer_ventas([
+        {"Fecha": "2026-03-18T09:00:00", "Código": "A", "Nombre": "a", "Cantidad": 2, "Total": 20.0, "Ganancia": 8.0},
+        {"Fecha": "2026-03-16T09:00:00", "Código": "B", "Nombre": "b", "Cantidad": 1, "Total": 5.0, "Ganancia": 1.0},
+        {"Fecha": "2026-03-02T09:00:00", "Código": "A", "Nombre": "a", "Cantidad": 1, "Total": 10.0, "Ganancia": 4.0},
+        {"Fecha": "2026-01-10T09:00:00", "Código": "B", "Nombre": "b", "Cantidad": 3, "Total": 15.0, "Ganancia": 9.0},
+        {"Fecha": "2026-03-18T10:00:00", "Persona": "Ana", "Tipo": "Pago", "Total": 99.0},
+        {"Fecha": "", "Código": "A", "Nombre": "a", "Cantidad": 7, "Total": 70.0, "Ganancia": 7.0},
+    ])
+
+
+def test_kpis_y_tabla_por_filtro(hacer_ventas):
+    ven = _ventas(hacer_ventas)
+    res = app.calcular_reportes(ven, "Este mes", HOY)
+    assert res["inicio_semana"] == date(2026, 3, 16)
+    assert res["hoy"] == (2, 20.0, 8.0)
+    assert res["semana"] == (3, 25.0, 9.0)
+    assert res["mes"] == (4, 35.0, 13.0)
+    assert res["productos"] == [("A", "a", 3, 30.0, 12.0), ("B", "b", 1, 5.0, 1.0)]
+
+    todo = app.calcular_reportes(ven, "Todo", HOY)["productos"]
+    assert todo == [("A", "a", 3, 30.0, 12.0), ("B", "b", 4, 20.0, 10.0)]  # por ganancia
+    # "Todo" desde los agregados por producto da la misma tabla sin agrupar Ventas
+    productos = app.agregados_desde_ventas(ven)["producto"]
+    assert app.calcular_reportes(ven, "Todo", HOY, productos=productos)["productos"] == todo
+
+
+def test_cancelado_lanza_reporte_cancelado(hacer_ventas):
+    with pytest.raises(app.ReporteCancelado):
+        app.calcular_reportes(_ventas(hacer_ventas), "Todo", HOY, cancelado=lambda: True)
@@ -0,0 +1,89 @@
+import pandas as pd
+
+import Delicias_de_la_wera_inventario as app
+
+
+def _hojas(hacer_ventas):
+    inv = pd.DataFrame([
+        ["A", "Pan", 5, 10, 3, ""],
+        ["A", "Pan 2", 5, 10, 1, ""],
+        ["", "Sin código", 1, 2, 1, ""],
+        ["B", "Leche", 15, 22, -2, ""],
+    ], columns=app.INV_COLS)
+    ven = hacer_ventas([
+        {"Fecha": "2026-01-05T10:00:00", "Código": "A", "Total": 10.0, "Ganancia": 5.0, "Persona": "Ana", "Tipo": "Fiado"},
+        {"Fecha": "31/02/2026", "Código": "B", "Total": 22.0, "Ganancia": 7.0},
+        {"Fecha": "2026-01-06T10:00:00", "Código": "Z", "Total": 4.0, "Ganancia": 1.0},
+        {"Fecha": "2026-01-07T10:00:00", "Código": "", "Persona": "Ana", "Total": 10.0, "Tipo": "Pago"},
+        {"Fecha": "2026-01-05T10:00:00", "Código": "A", "Total": 5.0, "Ganancia": 2.0, "Persona": "Ana",
+         "Tipo": "Transferencia"},
+    ])
+    rec = app.reconstruir_derivadas(ven)
+    tra = pd.DataFrame({"Fecha": ["2026-01-05T10:00:00", ""], "Cantidad": ["1", "dos"], "Precio": ["5", "5"],
+                        "Total": ["5", "x"], "Persona": ["Ana", "Ana"]}, dtype=object)
+    lot = pd.DataFrame([["2026-01-01T00:00:00", "A", 3, 5.0, 3], ["2026-01-01T00:00:00", "Q", 1, 1.0, 1]],
+                       columns=app.LOT_COLS)
+    return inv, ven, tra, rec[app.SHEET_DEU], rec[app.SHEET_RES], rec[app.SHEET_GAN], lot
+
+
+def _lista(problemas):
+    filas = problemas["Fila"].fillna(-1).astype(int)  # sin renglón (Transferencias por persona): -1
+    return sorted(zip(problemas["Hoja"], filas, problemas["Columna"], problemas["Problema"]))
+
+
+def test_revisar_datos_encuentra_cada_problema(hacer_ventas):
+    inv, ven, tra, deu, res, gan, lot = _hojas(hacer_ventas)
+    deu = deu.assign(Adeuda=deu["Adeuda"] + 1)  # Deudas guardada ya no coincide con Ventas
+    invalidos = {app.SHEET_INV: {"PrecioVenta": [3]}}
+
+    problemas, rec = app.revisar_datos(inv, ven, tra, deu, res, gan, lot, invalidos)
+
+    assert _lista(problemas) == sorted([
+        (app.SHEET_INV, 2, "Código", "Código duplicado"),
+        (app.SHEET_INV, 3, "Código", "Código duplicado"),
+        (app.SHEET_INV, 4, "Código", "Código vacío"),
+        (app.SHEET_INV, 5, "Stock", "Stock negativo"),
+        (app.SHEET_INV, 5, "PrecioVenta", "Número ilegible (se usa 0)"),
+        (app.SHEET_TRA, 3, "Cantidad", "Número ilegible (se usa 0)"),
+        (app.SHEET_TRA, 3, "Total", "Número ilegible (se usa 0)"),
+        (app.SHEET_TRA, 3, "Fecha", "Fecha ilegible"),
+        (app.SHEET_VEN, 3, "Fecha", "Fecha ilegible"),
+        (app.SHEET_VEN, 4, "Código", "Código sin producto"),  # el Pago sin código no cuenta
+        (app.SHEET_LOT, 3, "Código", "Código sin producto"),
+        (app.SHEET_DEU, 2, "Adeuda", "No coincide con Ventas"),
+        (app.SHEET_TRA, -1, "Movimientos", "No coincide con Ventas"),  # 2 transferencias contra 1 en Ventas
+    ])
+    assert set(rec) == {app.SHEET_DEU, app.SHEET_RES, app.SHEET_GAN}
+    # no modifica lo que recibe
+    assert tra["Cantidad"].tolist() == ["1", "dos"]
+    assert invalidos == {app.SHEET_INV: {"PrecioVenta": [3]}}
+
+
+def test_revisar_datos_sin_problemas(hacer_ventas):
+    inv, ven, tra, deu, res, gan, lot = _hojas(hacer_ventas)
+    inv = inv.iloc[[0, 3]].assign(Stock=1)
+    ven = ven.drop(index=[1, 2])
+    rec = app.reconstruir_derivadas(ven)
+    tra = tra.iloc[:1]
+    problemas, _ = app.revisar_datos(inv, ven, tra, rec[app.SHEET_DEU], rec[app.SHEET_RES], rec[app.SHEET_GAN],
+                                     lot.iloc[:1])
+    assert problemas.empty
+
+
+def test_args_revision_copia_para_el_hilo(hacer_ventas):
+    inv, ven, tra, deu, res, gan, lot = _hojas(hacer_ventas)
+    a = app.DeliciasApp.__new__(app.DeliciasApp)
+    a._carga_ventas = None
+    a.df_inv, a.df_ven, a.df_tra, a.df_deu, a.df_res, a.df_gan = inv, ven, tra, deu, res, gan
+    a.lotes = app.LotesFIFO()
+    a.lotes.cargar(lot)
+    a.invalidos_carga = {app.SHEET_INV: {"PrecioVenta": [3]}}
+    a._seq_guardado = a._invalidos_seq = 0
+
+    args = a._args_revision(copiar=True)
+    for vivo, copia in zip((inv, tra, deu, res, gan), (args[0], args[2], args[3], args[4], args[5])):
+        assert vivo is not copia and vivo.equals(copia)
+    assert args[7] == a.invalidos_carga and args[7][app.SHEET_INV] is not a.invalidos_carga[app.SHEET_INV]
+
+    a._seq_guardado += 1  # tras guardar, las posiciones ilegibles ya no valen
+    assert a._args_revision()[7] is None
@@ -0,0 +1,71 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import Delicias_de_la_wera_inventario as app
+
+HOY = date(2026, 3, 15)
+
+
+def _inventario():
+    return pd.DataFrame({
+        "Código": ["A", "B", "C"], "Nombre": ["a", "b", "c"], "PrecioCompra": 1.0,
+        "PrecioVenta": 2.0, "Stock": [5, 100, 0], "Categoría": ["x", "", None],
+    }, columns=app.INV_COLS)
+
+
+def _venta(codigo, cantidad, dias_atras, tipo="Efectivo"):
+    fecha = datetime.combine(HOY - timedelta(days=dias_atras), datetime.min.time()).replace(hour=10)
+    return {"Fecha": fecha.isoformat(), "Código": codigo, "Cantidad": cantidad, "Tipo": tipo}
+
+
+def test_velocidades_por_ventana(hacer_ventas):
+    ven = hacer_ventas([
+        _venta("A", 7, 0), _venta("A", 30, 20), _venta("A", 90, 60),
+        _venta("A", 1000, 200),            # fuera de todas las ventanas
+        _venta("B", 50, 1, tipo="Pago"),   # los pagos no cuentan
+    ])
+    t = app.MotorVelocidad().tabla(_inventario(), ven, HOY)
+    a = t.set_index("Código").loc["A"]
+    assert a["V7"] == 1.0
+    assert a["V30"] == (7 + 30) / 30
+    assert a["V90"] == (7 + 30 + 90) / 90
+    assert t.set_index("Código").loc["B", "V30"] == 0.0
+
+
+def test_reorden_y_sugerido(hacer_ventas):
+    # A vende 3/día (90 en 30 días) y tiene 5: debajo del punto de reorden
+    ven = hacer_ventas([_venta("A", 3, d) for d in range(30)])
+    t = app.MotorVelocidad().tabla(_inventario(), ven, HOY).set_index("Código")
+    assert t.loc["A", "PuntoReorden"] == np.ceil(3 * (app.DIAS_ENTREGA + app.DIAS_SEGURIDAD))
+    assert bool(t.loc["A", "BajoStock"])
+    assert t.loc["A", "Sugerido"] == 3 * (app.DIAS_ENTREGA + app.DIAS_OBJETIVO) - 5
+    assert t.loc["A", "DiasCobertura"] == 5 / 3
+    assert t.loc["B", "DiasCobertura"] == np.inf and not t.loc["B", "BajoStock"]
+
+
+def test_registrar_venta_igual_a_reconstruir(hacer_ventas):
+    historia = [_venta("A", 2, d) for d in range(1, 40, 3)] + [_venta("B", 5, 10)]
+    nuevas = [_venta("A", 4, 0), _venta("C", 1, 0), _venta("B", 2, 0)]
+
+    motor = app.MotorVelocidad()
+    motor.tabla(_inventario(), hacer_ventas(historia), HOY)
+    for v in nuevas:
+        motor.registrar_venta(v["Código"], v["Cantidad"], v["Fecha"])
+    incremental = motor.tabla(_inventario(), None, HOY)
+
+    completo = app.MotorVelocidad().tabla(_inventario(), hacer_ventas(historia + nuevas), HOY)
+    pd.testing.assert_frame_equal(incremental, completo)
+
+
+def test_actualizar_fila_igual_a_tabla_nueva(hacer_ventas):
+    inv = pd.concat([_inventario(), _inventario().iloc[[0]]], ignore_index=True)  # "A" repetido
+    motor = app.MotorVelocidad()
+    t = motor.tabla(inv, hacer_ventas([_venta("A", 3, d) for d in range(1, 30)] + [_venta("B", 2, 5)]), HOY)
+    for idx, cantidad in ((0, 4), (2, 1), (1, 95)):  # C no tenía ventas; B queda en punto de reorden
+        inv.at[idx, "Stock"] -= cantidad
+        motor.registrar_venta(inv.at[idx, "Código"], cantidad, _venta("", 0, 0)["Fecha"])
+        motor.actualizar_fila(t, inv, idx)
+        pd.testing.assert_frame_equal(t, motor.tabla(inv, None, HOY))
+    assert bool(t.loc[1, "BajoStock"])
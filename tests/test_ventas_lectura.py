@@ -0,0 +1,113 @@
+import openpyxl
+import pandas as pd
+
+import Delicias_de_la_wera_inventario as app
+
+
+def _libro(ruta, filas):
+    """Libro con solo la hoja Ventas; cada fila es un dict columna -> celda."""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = app.SHEET_VEN
+    ws.append(app.VEN_COLS)
+    for f in filas:
+        ws.append([f.get(c) for c in app.VEN_COLS])
+    wb.save(ruta)
+
+
+def test_streaming_numeros_ilegibles(tmp_path):
+    ruta = tmp_path / "v.xlsx"
+    _libro(ruta, [
+        {"Fecha": "2026-01-05T10:00:00", "Código": "A", "Cantidad": 2, "Total": 20, "Ganancia": 8, "Tipo": "Efectivo"},
+        {"Fecha": "2026-01-06T10:00:00", "Código": "A", "Cantidad": "inf", "Total": "abc", "Ganancia": 1, "Tipo": "Efectivo"},
+        {"Fecha": "2026-01-07T10:00:00", "Código": "B", "Cantidad": 1e30, "Total": "-inf", "Ganancia": "", "Tipo": "Efectivo"},
+        {"Fecha": "2026-01-08T10:00:00", "Código": "B", "Cantidad": " 3 ", "Total": "7.5", "Ganancia": 2, "Tipo": "Pago"},
+    ])
+    # bloques de 2 filas: las posiciones tienen que seguir contando entre bloques
+    df, agregados = app.leer_ventas_streaming(archivo=ruta, tam_bloque=2)
+
+    assert df["Cantidad"].tolist() == [2, 0, 0, 3]
+    assert df["Total"].tolist() == [20.0, 0.0, 0.0, 7.5]
+    assert df["Ganancia"].tolist() == [8.0, 1.0, 0.0, 2.0]  # vacío es 0, no ilegible
+    assert agregados["invalidos"] == {"Cantidad": [1, 2], "Total": [1, 2]}
+    assert agregados["filas"] == 4
+    assert agregados["mensual"] == {"2026-01": [20.0, 9.0]}  # sin el Pago
+
+
+def test_agregados_desde_ventas_igual_a_streaming(tmp_path, hacer_ventas):
+    filas = [
+        {"Fecha": "2026-01-05T10:00:00", "Código": "A", "Nombre": "Pan", "Cantidad": 2, "Total": 20.0, "Ganancia": 8.0},
+        {"Fecha": "2026-01-31T23:00:00", "Código": "B", "Nombre": "Leche", "Cantidad": 1, "Total": 5.5, "Ganancia": 1.5,
+         "Tipo": "Fiado"},
+        {"Fecha": "2026-02-01T08:00:00", "Código": "A", "Nombre": "Pan", "Cantidad": 1, "Total": 10.0, "Ganancia": 4.0},
+        {"Fecha": "2026-02-02T08:00:00", "Nombre": "Pago", "Persona": "Ana", "Total": 50.0, "Tipo": "Pago"},
+        {"Fecha": "sin fecha", "Código": "C", "Nombre": "Sal", "Cantidad": 1, "Total": 3.0, "Ganancia": 1.0},
+    ]
+    ruta = tmp_path / "v.xlsx"
+    _libro(ruta, filas)
+    _, leidos = app.leer_ventas_streaming(archivo=ruta)
+
+    calculados = app.agregados_desde_ventas(hacer_ventas(filas))
+    assert calculados["mensual"] == leidos["mensual"] == {"2026-01": [25.5, 9.5], "2026-02": [10.0, 4.0]}
+    # la fila sin fecha tampoco cuenta por producto (igual que en reportes)
+    assert calculados["producto"] == leidos["producto"] == {("A", "Pan"): [3, 30.0, 12.0], ("B", "Leche"): [1, 5.5, 1.5]}
+    assert calculados["filas"] == leidos["filas"] == 5
+
+
+def test_mes_sale_de_la_fecha_interpretada(tmp_path, hacer_ventas):
+    filas = [
+        {"Fecha": "2026-1-5", "Código": "A", "Nombre": "Pan", "Cantidad": 2, "Total": 20.0, "Ganancia": 8.0},
+        {"Fecha": "2026-01-31 23:00:00", "Código": "A", "Nombre": "Pan", "Cantidad": 1, "Total": 10.0, "Ganancia": 4.0},
+        {"Fecha": "2026-02-01", "Código": "B", "Nombre": "Leche", "Cantidad": 1, "Total": 5.0, "Ganancia": 1.0},
+        {"Fecha": "2026-13-01", "Código": "B", "Nombre": "Leche", "Cantidad": 9, "Total": 90.0, "Ganancia": 9.0},
+    ]
+    ven = hacer_ventas(filas)
+    agregados = app.agregados_desde_ventas(ven)
+    assert agregados["mensual"] == {"2026-01": [30.0, 12.0], "2026-02": [5.0, 1.0]}
+    assert agregados["producto"] == {("A", "Pan"): [3, 30.0, 12.0], ("B", "Leche"): [1, 5.0, 1.0]}
+
+    rec = app.reconstruir_derivadas(ven)[app.SHEET_GAN]
+    assert rec[["Mes", "TotalVentasMes"]].values.tolist() == [["2026-01", 30.0], ["2026-02", 5.0]]
+
+    ruta = tmp_path / "v.xlsx"
+    _libro(ruta, filas)
+    assert app.leer_ventas_streaming(archivo=ruta)[1]["mensual"] == agregados["mensual"]
+
+
+def test_acumular_venta_igual_a_reconstruir(hacer_ventas):
+    filas = [
+        {"Fecha": "2026-03-01T10:00:00", "Código": "A", "Nombre": "Pan", "Cantidad": 2, "Total": 20.0, "Ganancia": 8.0},
+        {"Fecha": "2026-03-02T10:00:00", "Código": "B", "Nombre": "Leche", "Cantidad": 1, "Total": 22.0, "Ganancia": 7.0},
+    ]
+    nuevas = [
+        {"Fecha": "2026-04-01T09:00:00", "Código": "A", "Nombre": "Pan", "Cantidad": 1, "Total": 10.0, "Ganancia": 4.0},
+        {"Fecha": "2026-04-01T09:30:00", "Código": "C", "Nombre": "Sal", "Cantidad": 3, "Total": 18.0, "Ganancia": 9.0},
+    ]
+    agregados = app.agregados_desde_ventas(hacer_ventas(filas))
+    for f in nuevas:
+        app.acumular_venta(agregados, f["Fecha"], f["Código"], f["Nombre"], f["Cantidad"], f["Total"], f["Ganancia"])
+    completos = app.agregados_desde_ventas(hacer_ventas(filas + nuevas))
+    assert agregados["mensual"] == completos["mensual"]
+    assert agregados["producto"] == completos["producto"]
+
+
+def test_ganancias_desde_agregados_igual_a_reconstruccion(hacer_ventas):
+    ven = hacer_ventas([
+        {"Fecha": "2026-03-01T10:00:00", "Total": 12.0, "Ganancia": 3.0},
+        {"Fecha": "2026-03-15T10:00:00", "Total": 8.0, "Ganancia": 2.0, "Tipo": "Fiado"},
+        {"Fecha": "2026-04-02T10:00:00", "Total": 30.0, "Ganancia": 9.0},
+        {"Fecha": "2026-04-03T10:00:00", "Total": 100.0, "Tipo": "Pago"},
+    ])
+    gan = app.ganancias_desde_agregados(app.agregados_desde_ventas(ven))
+    rec = app.reconstruir_derivadas(ven)[app.SHEET_GAN]
+    cols = ["Mes", "TotalVentasMes", "TotalGananciaMes"]
+    pd.testing.assert_frame_equal(gan[cols].reset_index(drop=True), rec[cols].reset_index(drop=True),
+                                  check_dtype=False)
+
+
+def test_columna_numerica_infinito():
+    df = pd.DataFrame({"Stock": ["4", "inf", "-inf", "x", "", None]}, dtype=object)
+    invalidos = {}
+    num = app._columna_numerica(df, "Stock", invalidos, entero=True)
+    assert num.tolist() == [4, 0, 0, 0, 0, 0]
+    assert invalidos == {"Stock": [1, 2, 3]}
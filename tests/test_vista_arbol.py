@@ -0,0 +1,118 @@
+import random
+
+import Delicias_de_la_wera_inventario as app
+
+
+class _TreeFalso:
+    """Lo que VistaArbol usa de ttk.Treeview, con la misma semántica (hijos de la raíz solamente)."""
+
+    def __init__(self):
+        self.hijos = []
+        self.items = {}
+        self._n = 0
+
+    def insert(self, padre, pos, values=(), tags=()):
+        assert padre == "" and pos == "end"
+        self._n += 1
+        iid = f"I{self._n:03d}"
+        self.items[iid] = (tuple(values), tuple(tags))
+        self.hijos.append(iid)
+        return iid
+
+    def delete(self, *iids):
+        for iid in iids:
+            del self.items[iid]
+            if iid in self.hijos:
+                self.hijos.remove(iid)
+
+    def item(self, iid, values, tags):
+        self.items[iid] = (tuple(values), tuple(tags))
+
+    def detach(self, iid):
+        self.hijos.remove(iid)
+
+    def move(self, iid, padre, pos):
+        assert padre == "" and iid in self.items
+        if iid in self.hijos:
+            self.hijos.remove(iid)
+        self.hijos.insert(max(0, min(pos, len(self.hijos))), iid)
+
+    def index(self, iid):
+        return self.hijos.index(iid)
+
+    def get_children(self, padre=""):
+        return tuple(self.hijos)
+
+    def yview(self):
+        return (0.0, 1.0)
+
+    def yview_moveto(self, y):
+        pass
+
+
+def _mostrado(tree):
+    return [tree.items[iid] for iid in tree.get_children()]
+
+
+def test_subsecuencia_creciente_mas_larga():
+    rnd = random.Random(7)
+    for _ in range(300):
+        seq = rnd.sample(range(40), rnd.randint(0, 12))
+        pos = app._subsecuencia_creciente_mas_larga(seq)
+        valores = [seq[i] for i in pos]
+        assert pos == sorted(pos) and all(a < b for a, b in zip(valores, valores[1:]))
+        # largo máximo, por programación dinámica O(n²)
+        largo = [1] * len(seq)
+        for i in range(len(seq)):
+            for j in range(i):
+                if seq[j] < seq[i]:
+                    largo[i] = max(largo[i], largo[j] + 1)
+        assert len(pos) == max(largo, default=0)
+
+
+def test_aplicar_secuencias_aleatorias():
+    rnd = random.Random(2026)
+    tree = _TreeFalso()
+    vista = app.VistaArbol(tree)
+    claves = [f"C{i}" for i in range(30)]
+    actuales = []
+    for paso in range(400):
+        # altas, bajas, reordenes y cambios de valores al azar sobre la lista anterior
+        orden = [c for c in actuales if rnd.random() > 0.15]
+        for c in rnd.sample(claves, rnd.randint(0, 5)):
+            if c not in orden:
+                orden.insert(rnd.randint(0, len(orden)), c)
+        if orden and rnd.random() < 0.5:
+            i, j = rnd.randrange(len(orden)), rnd.randrange(len(orden))
+            orden.insert(j, orden.pop(i))
+        if rnd.random() < 0.1:
+            rnd.shuffle(orden)
+        filas = [(c, (c, rnd.randint(0, 3)), ("bajo",) if rnd.random() < 0.2 else ()) for c in orden]
+
+        iids_antes = {c: vista.iid_por_clave[c] for c in actuales if c in orden}
+        stats = vista.aplicar(filas)
+
+        assert _mostrado(tree) == [(valores, tags) for _, valores, tags in filas], paso
+        assert len(tree.items) == len(orden)  # las bajas se borran, no quedan sueltas
+        # las filas que siguen no se recrean (selección y scroll se conservan)
+        assert all(vista.iid_por_clave[c] == iid for c, iid in iids_antes.items())
+        assert stats["altas"] == len(set(orden) - set(actuales))
+        assert stats["bajas"] == len(set(actuales) - set(orden))
+        actuales = orden
+
+
+def test_aplicar_sin_cambios_no_toca_el_arbol():
+    tree = _TreeFalso()
+    vista = app.VistaArbol(tree)
+    filas = [(c, (c, 1), ()) for c in "ABCDE"]
+    vista.aplicar(filas)
+    assert vista.aplicar(filas) == {"altas": 0, "cambios": 0, "bajas": 0, "movimientos": 0}
+
+    # mover una sola fila mueve una sola fila
+    stats = vista.aplicar([filas[4]] + filas[:4])
+    assert stats["movimientos"] == 1
+    assert [tree.items[i][0][0] for i in tree.get_children()] == list("EABCD")
+
+    assert vista.actualizar_fila("B", ("B", 9), ("bajo",))
+    assert not vista.actualizar_fila("Z", ("Z", 0))
+    assert vista.valores("B") == (("B", 9), ("bajo",))